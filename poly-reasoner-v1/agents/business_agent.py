@@ -1,6 +1,6 @@
-from agents.base import BaseAgent
-
-
-class BusinessAgent(BaseAgent):
-    name = "business"
-    system_prompt = "Evaluate market demand and differentiation."
+from agents.base import BaseAgent
+
+
+class BusinessAgent(BaseAgent):
+    name = "business"
+    system_prompt = "Evaluate market demand and differentiation."
@@ -1,6 +1,6 @@
-from agents.base import BaseAgent
-
-
-class LongTermAgent(BaseAgent):
-    name = "longterm"
-    system_prompt = "Evaluate long-term sustainability and maintenance."
+from agents.base import BaseAgent
+
+
+class LongTermAgent(BaseAgent):
+    name = "longterm"
+    system_prompt = "Evaluate long-term sustainability and maintenance."
@@ -0,0 +1,21 @@
+# agents/registry.py
+
+from agents.security_agent import SecurityAgent
+from agents.risk_agent import RiskAgent
+from agents.business_agent import BusinessAgent
+from agents.finance_agent import FinanceAgent
+from agents.longterm_agent import LongTermAgent
+from agents.shortterm_agent import ShortTermAgent
+
+
+# -----------------------------
+# Agent registry
+# -----------------------------
+AGENTS = {
+    "security": SecurityAgent(),
+    "risk": RiskAgent(),
+    "business": BusinessAgent(),
+    "finance": FinanceAgent(),
+    "longterm": LongTermAgent(),
+    "shortterm": ShortTermAgent(),
+}
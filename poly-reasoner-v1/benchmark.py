@@ -0,0 +1,320 @@
+# benchmark.py
+
+import argparse
+import itertools
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from agents.registry import AGENTS
+from pool import AgentPool
+
+SAMPLE_QUERIES = [
+    "should I build a prompt injection testing CLI tool",
+    "is it worth building an LLM firewall for enterprise apps",
+    "should I do a quick MVP of a cost estimation engine for SaaS",
+]
+
+
+# -----------------------------
+# Agent pool throughput (K = 1..N)
+# -----------------------------
+def bench_pool(max_workers: int, thread_budget: int, rounds: int):
+    n_jobs = len(SAMPLE_QUERIES) * len(AGENTS) * rounds
+    rows = []
+
+    for k in range(1, max_workers + 1):
+        pool = AgentPool(k, thread_budget)
+
+        start = time.perf_counter()
+        pool.warmup()
+        load_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for query in SAMPLE_QUERIES * rounds:
+            pool.run(list(AGENTS), query)
+        elapsed = time.perf_counter() - start
+        pool.shutdown()
+
+        rows.append((k, pool.threads_per_worker, load_s, elapsed, n_jobs / elapsed * 60))
+        print(f"K={k}: {n_jobs} jobs in {elapsed:.1f}s (load {load_s:.1f}s)")
+
+    base = rows[0][4]
+    print("\nworkers  threads  jobs/min  speedup")
+    for k, threads, _, _, per_min in rows:
+        print(f"{k:>7}  {threads:>7}  {per_min:>8.1f}  {per_min / base:>6.2f}x")
+    return rows
+
+
+# -----------------------------
+# Startup: import cost and first embedding route
+# -----------------------------
+STARTUP_SNIPPETS = {
+    "import app": "import app",
+    "import app + first route": (
+        "import app, router; router.embedding_route('should I build an LLM firewall')"
+    ),
+}
+
+
+def _time_python(code: str) -> float:
+    """Wall time of a fresh interpreter running `code` in this directory"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(__file__) or ".")
+    return time.perf_counter() - start
+
+
+def bench_startup(runs: int):
+    import router
+
+    rows = []
+    for label, code in STARTUP_SNIPPETS.items():
+        times = sorted(_time_python(code) for _ in range(runs))
+        rows.append((label, times[len(times) // 2]))
+
+    # anchor cache: cold (encode + save) vs warm (load .npy)
+    route = STARTUP_SNIPPETS["import app + first route"]
+    shutil.rmtree(router.ANCHOR_CACHE_DIR, ignore_errors=True)
+    rows.append(("first route, no anchor cache", _time_python(route)))
+    rows.append(("first route, cached anchors", _time_python(route)))
+
+    heavy = subprocess.run(
+        [sys.executable, "-c", "import sys, app; print(sorted({'torch', 'sentence_transformers', "
+                               "'llama_cpp'} & set(sys.modules)))"],
+        check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+    print(f"\nstartup (median of {runs}, fresh interpreter each)")
+    for label, seconds in rows:
+        print(f"  {label:<32} {seconds:6.2f}s")
+    print(f"  heavy modules after 'import app': {heavy}")
+    return rows
+
+
+# -----------------------------
+# Routing throughput: one-at-a-time vs batched
+# -----------------------------
+ROUTE_QUERIES = SAMPLE_QUERIES + [
+    "give me some startup ideas for developer tools",
+    "what can I build with a local LLM",
+    "hello, how are you today",
+    "what is the capital of France",
+    "pros and cons of open sourcing my side project",
+]
+
+
+def bench_route(sizes: list, batch_size: int):
+    import router
+
+    router.get_anchor_matrix()  # load model + anchors outside the timings
+    rows = []
+    for n in sizes:
+        queries = [f"{ROUTE_QUERIES[i % len(ROUTE_QUERIES)]} #{i}" for i in range(n)]
+
+        start = time.perf_counter()
+        single = [router.embedding_route(q) for q in queries] if n <= 1000 else None
+        single_s = time.perf_counter() - start if single is not None else None
+
+        start = time.perf_counter()
+        batched = router.embedding_route_batch(queries, batch_size=batch_size)
+        batched_s = time.perf_counter() - start
+
+        if single is not None:
+            assert single == batched, "batched labels differ from embedding_route"
+        rows.append((n, single_s, batched_s))
+
+    print(f"\nqueries  single q/s  batched q/s  (batch_size={batch_size})")
+    for n, single_s, batched_s in rows:
+        single = f"{n / single_s:>10.1f}" if single_s else f"{'-':>10}"
+        print(f"{n:>7}  {single}  {n / batched_s:>11.1f}")
+    return rows
+
+
+# -----------------------------
+# Idea retrieval: BM25 index vs linear scan
+# -----------------------------
+RAG_VOCAB = (
+    "prompt injection firewall llm agent saas cost estimation startup validation red team "
+    "simulation framework cli tool privacy audit compliance invoice billing analytics "
+    "dashboard monitoring vector search embedding pipeline workflow automation crm email "
+    "scheduler marketplace freelancer budget tracker onboarding chatbot support ticket"
+).split()
+RAG_TAGS = ["security", "business", "finance", "devtools", "productivity"]
+
+
+def _synthetic_ideas(n: int, seed: int = 0) -> list:
+    """Ideas drawn from a Zipf-like vocabulary: domain words common, a long tail of rare ones"""
+    import random
+
+    rng = random.Random(seed)
+    vocab = RAG_VOCAB + [f"term{i}" for i in range(20000)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocab))))
+    return [
+        {"id": i, "text": " ".join(rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(4, 10))),
+         "tag": rng.choice(RAG_TAGS)}
+        for i in range(n)
+    ]
+
+
+def _linear_scan(ideas: list, query: str, limit: int) -> list:
+    """The previous retrieve_ideas: substring checks over every idea"""
+    q = query.lower()
+    return [idea for idea in ideas if any(word in idea["text"].lower() for word in q.split())][:limit]
+
+
+def bench_rag(sizes: list, queries: int):
+    import tempfile
+
+    from rag import BM25Index, IndexStore
+
+    rows = []
+    for n in sizes:
+        ideas = _synthetic_ideas(n)
+        probes = [" ".join(idea["text"].split()[:3]) for idea in _synthetic_ideas(queries, seed=1)]
+
+        start = time.perf_counter()
+        index = BM25Index()
+        for idea in ideas:
+            index.add(idea)
+        build_s = time.perf_counter() - start
+
+        path = os.path.join(tempfile.mkdtemp(), "ideas_index.db")
+        start = time.perf_counter()
+        store = IndexStore(path)
+        store.add(ideas)
+        store.commit()
+        save_s = time.perf_counter() - start
+        start = time.perf_counter()
+        store.load_index()
+        load_s = time.perf_counter() - start
+        store.close()
+        shutil.rmtree(os.path.dirname(path))
+
+        latencies = {}
+        for name, search in [("bm25", lambda q: index.search(q, 3)),
+                             ("scan", lambda q: _linear_scan(ideas, q, 3))]:
+            times = []
+            for query in probes:
+                start = time.perf_counter()
+                search(query)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            latencies[name] = (times[len(times) // 2] * 1000, times[int(len(times) * 0.95)] * 1000)
+
+        rows.append((n, build_s, save_s, load_s, latencies))
+
+    print(f"\n{'ideas':>7}  {'build':>7}  {'save':>6}  {'load':>6}  "
+          f"{'bm25 p50':>9}  {'bm25 p95':>9}  {'scan p50':>9}  {'scan p95':>9}")
+    for n, build_s, save_s, load_s, lat in rows:
+        print(f"{n:>7}  {build_s:>6.2f}s  {save_s:>5.2f}s  {load_s:>5.2f}s  "
+              f"{lat['bm25'][0]:>7.3f}ms  {lat['bm25'][1]:>7.3f}ms  "
+              f"{lat['scan'][0]:>7.3f}ms  {lat['scan'][1]:>7.3f}ms")
+    return rows
+
+
+# -----------------------------
+# Dense idea index: recall and latency vs brute force
+# -----------------------------
+def _clustered_vectors(centers: np.ndarray, n: int, seed: int) -> np.ndarray:
+    """Normalized vectors around topic centers (embeddings are clustered, not uniform)"""
+    rng = np.random.default_rng(seed)
+    vectors = centers[rng.integers(len(centers), size=n)]
+    # noise of norm ~0.8 around unit centers: ~0.6 cosine between ideas on the same topic
+    noise = rng.normal(scale=0.8 / np.sqrt(centers.shape[1]), size=vectors.shape).astype(np.float32)
+    vectors = vectors + noise
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def bench_dense(sizes: list, dtypes: list, nprobes: list, queries: int, dim: int):
+    import tempfile
+
+    from dense_index import CHUNK_ROWS, DenseIndex, build_index
+
+    centers = np.random.default_rng(0).normal(size=(1000, dim)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    rows = []
+    for n in sizes:
+        def batches():
+            for start in range(0, n, CHUNK_ROWS):
+                count = min(CHUNK_ROWS, n - start)
+                yield range(start, start + count), _clustered_vectors(centers, count, seed=start + 1)
+
+        probes = _clustered_vectors(centers, queries, seed=0)
+        for dtype in dtypes:
+            path = os.path.join(tempfile.mkdtemp(), "idea_vectors")
+            start = time.perf_counter()
+            meta = build_index(batches(), path, dtype)
+            build_s = time.perf_counter() - start
+            size_mb = os.path.getsize(os.path.join(path, "vectors.npy")) / 1024 ** 2
+
+            index = DenseIndex(path)
+            start = time.perf_counter()
+            for query in probes:
+                index.search_exact(query, 10)
+            exact_ms = (time.perf_counter() - start) / queries * 1000
+
+            for nprobe in nprobes:
+                start = time.perf_counter()
+                for query in probes:
+                    index.search(query, 10, nprobe)
+                ivf_ms = (time.perf_counter() - start) / queries * 1000
+                recall = index.recall(probes, 10, nprobe)
+                rows.append((n, dtype, meta["nlist"], nprobe, size_mb, build_s, exact_ms, ivf_ms, recall))
+            del index
+            shutil.rmtree(os.path.dirname(path))
+
+    print(f"\n{'ideas':>7}  {'dtype':>7}  {'nlist':>5}  {'nprobe':>6}  {'file':>8}  {'build':>6}  "
+          f"{'exact':>8}  {'ivf':>8}  recall@10")
+    for n, dtype, nlist, nprobe, size_mb, build_s, exact_ms, ivf_ms, recall in rows:
+        print(f"{n:>7}  {dtype:>7}  {nlist:>5}  {nprobe:>6}  {size_mb:>6.1f}MB  {build_s:>5.1f}s  "
+              f"{exact_ms:>6.2f}ms  {ivf_ms:>6.2f}ms  {recall:>9.3f}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Polyreasoner v1 benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    pool = sub.add_parser("pool", help="agent throughput with K worker processes")
+    pool.add_argument("--max-workers", type=int, default=4)
+    pool.add_argument("--threads", type=int, default=None, help="total thread budget")
+    pool.add_argument("--rounds", type=int, default=1)
+
+    startup = sub.add_parser("startup", help="import time and first embedding route")
+    startup.add_argument("--runs", type=int, default=5)
+
+    route = sub.add_parser("route", help="embedding_route vs embedding_route_batch throughput")
+    route.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    route.add_argument("--batch-size", type=int, default=256)
+
+    rag = sub.add_parser("rag", help="BM25 idea retrieval latency across corpus sizes")
+    rag.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 200000])
+    rag.add_argument("--queries", type=int, default=200)
+
+    dense = sub.add_parser("dense", help="dense idea index recall and latency vs brute force")
+    dense.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 200000])
+    dense.add_argument("--dtypes", nargs="+", default=["float16", "int8"])
+    dense.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 32])
+    dense.add_argument("--queries", type=int, default=100)
+    dense.add_argument("--dim", type=int, default=384, help="MiniLM-L6 embedding size")
+
+    args = parser.parse_args()
+
+    if args.bench == "pool":
+        bench_pool(args.max_workers, args.threads, args.rounds)
+    elif args.bench == "startup":
+        bench_startup(args.runs)
+    elif args.bench == "route":
+        bench_route(args.sizes, args.batch_size)
+    elif args.bench == "rag":
+        bench_rag(args.sizes, args.queries)
+    elif args.bench == "dense":
+        bench_dense(args.sizes, args.dtypes, args.nprobe, args.queries, args.dim)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# dense_index.py
+
+import argparse
+import json
+import os
+import shutil
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+INDEX_DIR = "cache/idea_vectors"
+INDEX_VERSION = 1
+
+# float16 halves the matrix, int8 quarters it (per-row scale, ~0.01 cosine error)
+DTYPE = "float16"
+# IVF: vectors are grouped by nearest k-means centroid; a query scans NPROBE lists
+NPROBE = 16
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+# rows per chunk when writing or brute-force scanning - bounds memory use
+CHUNK_ROWS = 16384
+
+# reciprocal rank fusion constant for hybrid BM25 + dense results
+RRF_K = 60
+
+
+def default_nlist(n: int) -> int:
+    return int(max(1, min(4096, round(np.sqrt(n)))))
+
+
+def _kmeans(sample: np.ndarray, k: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on normalized rows, returns (k, dim) unit centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = (sample @ centroids.T).argmax(axis=1)
+        counts = np.bincount(assign, minlength=k)
+        order = np.argsort(assign, kind="stable")
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        centroids[filled] = np.add.reduceat(sample[order], starts, axis=0)
+        # empty lists restart from random rows
+        empty = np.flatnonzero(counts == 0)
+        centroids[empty] = sample[rng.integers(len(sample), size=len(empty))]
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+    return centroids
+
+
+def build_index(
+    batches: Iterable[Tuple[List[int], np.ndarray]],
+    path: str = INDEX_DIR,
+    dtype: str = DTYPE,
+    nlist: Optional[int] = None,
+    model: str = "",
+) -> Dict:
+    """
+    Build an IVF index from (idea ids, normalized embeddings) batches.
+
+    Vectors are spooled to disk as they arrive, so memory stays at one
+    chunk plus the k-means sample. The index is written to a temporary
+    directory and swapped in; processes that already mapped the old files
+    keep reading them. Returns the index metadata.
+    """
+    if dtype not in ("float16", "int8"):
+        raise ValueError(f"dtype must be float16 or int8, got {dtype}")
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # 1. spool float16 rows in arrival order
+    raw_path = os.path.join(tmp_dir, "spool.f16")
+    ids: List[int] = []
+    dim = None
+    with open(raw_path, "wb") as f:
+        for batch_ids, vectors in batches:
+            vectors = np.asarray(vectors, dtype=np.float32)
+            dim = vectors.shape[1]
+            f.write(vectors.astype(np.float16).tobytes())
+            ids.extend(int(i) for i in batch_ids)
+    if not ids:
+        shutil.rmtree(tmp_dir)
+        raise ValueError("no vectors to index")
+
+    n = len(ids)
+    spool = np.memmap(raw_path, dtype=np.float16, mode="r", shape=(n, dim))
+
+    # 2. centroids from a sample, then every row's list
+    nlist = min(nlist or default_nlist(n), n)
+    rng = np.random.default_rng(0)
+    sample_rows = np.sort(rng.choice(n, min(n, nlist * KMEANS_SAMPLE_PER_LIST), replace=False))
+    centroids = _kmeans(spool[sample_rows].astype(np.float32), nlist)
+
+    assign = np.empty(n, dtype=np.int32)
+    for start in range(0, n, CHUNK_ROWS):
+        chunk = spool[start:start + CHUNK_ROWS].astype(np.float32)
+        assign[start:start + CHUNK_ROWS] = (chunk @ centroids.T).argmax(axis=1)
+
+    # 3. rows grouped by list, so each list is one contiguous slice
+    order = np.argsort(assign, kind="stable")
+    offsets = np.zeros(nlist + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assign, minlength=nlist), out=offsets[1:])
+
+    vectors = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, "vectors.npy"), mode="w+", dtype=np.dtype(dtype), shape=(n, dim)
+    )
+    scales = np.ones(n, dtype=np.float32)
+    for start in range(0, n, CHUNK_ROWS):
+        rows = order[start:start + CHUNK_ROWS]
+        chunk = spool[rows].astype(np.float32)
+        if dtype == "int8":
+            scale = np.abs(chunk).max(axis=1) / 127 + 1e-12
+            chunk = np.round(chunk / scale[:, None])
+            scales[start:start + len(rows)] = scale
+        vectors[start:start + len(rows)] = chunk
+    vectors.flush()
+    del vectors, spool
+    os.remove(raw_path)
+
+    np.save(os.path.join(tmp_dir, "ids.npy"), np.asarray(ids, dtype=np.int64)[order])
+    np.save(os.path.join(tmp_dir, "scales.npy"), scales)
+    np.save(os.path.join(tmp_dir, "centroids.npy"), centroids.astype(np.float32))
+    np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+
+    meta = {"version": INDEX_VERSION, "model": model, "dtype": dtype, "n": n, "dim": dim, "nlist": nlist}
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    # 4. swap directories (a rename can't replace a non-empty directory)
+    old_dir = f"{path}.{os.getpid()}.old"
+    if os.path.exists(path):
+        os.replace(path, old_dir)
+    os.replace(tmp_dir, path)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return meta
+
+
+class DenseIndex:
+    """
+    Read-only IVF index over memory-mapped idea embeddings.
+
+    Only the centroids and list offsets are held in memory; vectors are
+    mapped with mmap_mode="r", so every process opening the same index
+    shares one copy through the OS page cache.
+    """
+
+    def __init__(self, path: str = INDEX_DIR):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"index version {self.meta.get('version')} != {INDEX_VERSION}")
+
+        self.path = path
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.centroids = np.load(os.path.join(path, "centroids.npy"))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _score_rows(self, start: int, end: int, query: np.ndarray) -> np.ndarray:
+        scores = self.vectors[start:end].astype(np.float32) @ query
+        if self.meta["dtype"] == "int8":
+            scores *= self.scales[start:end]
+        return scores
+
+    @staticmethod
+    def _top(rows: np.ndarray, scores: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        if len(scores) > limit:
+            keep = np.argpartition(-scores, limit)[:limit]
+            rows, scores = rows[keep], scores[keep]
+        best = np.argsort(-scores)
+        return rows[best], scores[best]
+
+    def search(self, query_emb, limit: int = 3, nprobe: int = NPROBE) -> List[Tuple[int, float]]:
+        """[(idea id, cosine)] from the nprobe lists nearest to the query"""
+        query = np.asarray(query_emb, dtype=np.float32)
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        rows, scores = [], []
+        for c in lists:
+            start, end = int(self.offsets[c]), int(self.offsets[c + 1])
+            if end > start:
+                rows.append(np.arange(start, end))
+                scores.append(self._score_rows(start, end, query))
+        if not rows:
+            return []
+
+        rows, scores = self._top(np.concatenate(rows), np.concatenate(scores), limit)
+        return [(int(self.ids[r]), float(s)) for r, s in zip(rows, scores)]
+
+    def search_exact(self, query_emb, limit: int = 3) -> List[Tuple[int, float]]:
+        """Brute force over every row (chunked) - the reference for recall"""
+        query = np.asarray(query_emb, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, len(self), CHUNK_ROWS):
+            end = min(start + CHUNK_ROWS, len(self))
+            rows = np.concatenate([best_rows, np.arange(start, end)])
+            scores = np.concatenate([best_scores, self._score_rows(start, end, query)])
+            best_rows, best_scores = self._top(rows, scores, limit)
+        return [(int(self.ids[r]), float(s)) for r, s in zip(best_rows, best_scores)]
+
+    def recall(self, queries: np.ndarray, limit: int = 10, nprobe: int = NPROBE) -> float:
+        """Fraction of the exact top-`limit` ids that the IVF search also returns"""
+        found = total = 0
+        for query in queries:
+            exact = {i for i, _ in self.search_exact(query, limit)}
+            approx = {i for i, _ in self.search(query, limit, nprobe)}
+            found += len(exact & approx)
+            total += len(exact)
+        return found / total if total else 1.0
+
+
+_index = None
+_index_checked = False
+
+
+def get_dense_index() -> Optional[DenseIndex]:
+    """Shared index, or None when none has been built for the current router model"""
+    global _index, _index_checked
+    if not _index_checked:
+        _index_checked = True
+        from router import MODEL_NAME
+
+        try:
+            index = DenseIndex(INDEX_DIR)
+        except (OSError, ValueError):
+            return None
+        if index.meta["model"] != MODEL_NAME:
+            print(f"[dense_index] {INDEX_DIR} was built with {index.meta['model']}, ignoring it")
+            return None
+        _index = index
+    return _index
+
+
+def search_ideas(query: str, query_emb, limit: int = 3) -> List[Dict]:
+    """
+    Ideas for the "ideas" intent: BM25 and dense results fused by
+    reciprocal rank, so paraphrases and exact keywords both count.
+    Falls back to BM25 alone until a dense index is built.
+    """
+    from rag import get_index, retrieve_ideas
+
+    index = get_dense_index()
+    if index is None or query_emb is None:
+        return retrieve_ideas(query, limit)
+
+    docs = get_index().docs
+    fused: Dict[int, float] = {}
+    candidates = limit * 4
+    keyword = [idea["id"] for idea in retrieve_ideas(query, candidates)]
+    dense = [idea_id for idea_id, _ in index.search(query_emb, candidates)]
+    for ranking in (keyword, dense):
+        for rank, idea_id in enumerate(ranking):
+            fused[idea_id] = fused.get(idea_id, 0.0) + 1 / (RRF_K + rank + 1)
+
+    ranked = sorted(fused, key=fused.get, reverse=True)
+    return [docs[idea_id] for idea_id in ranked if idea_id in docs][:limit]
+
+
+def build_from_ideas(dtype: str = DTYPE, nlist: Optional[int] = None, batch_size: int = 256) -> Dict:
+    """Embed every idea in the BM25 store with the router model and rebuild the index"""
+    from rag import get_index
+    from router import MODEL_NAME, embed
+
+    ideas = list(get_index().docs.values())
+
+    def batches():
+        for start in range(0, len(ideas), batch_size):
+            chunk = ideas[start:start + batch_size]
+            yield [idea["id"] for idea in chunk], embed([idea["text"] for idea in chunk], batch_size)
+
+    return build_index(batches(), INDEX_DIR, dtype, nlist, MODEL_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the dense idea index")
+    parser.add_argument("--dtype", choices=["float16", "int8"], default=DTYPE)
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (default ~sqrt(n))")
+    args = parser.parse_args()
+    print(build_from_ideas(args.dtype, args.nlist))
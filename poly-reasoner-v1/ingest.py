@@ -0,0 +1,276 @@
+# ingest.py
+
+import argparse
+import csv
+import glob
+import hashlib
+import itertools
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+import rag
+
+# dedupe hashes, per-file progress and the id counter live in the BM25
+# store's database (rag.INDEX_PATH), so one commit covers a checkpoint
+# one .npz of (ids, float16 vectors) per embedded batch, input to the dense index
+PARTS_DIR = "cache/ingest/embeddings"
+
+BATCH_SIZE = 256
+# records between checkpoints (sqlite commit)
+CHECKPOINT_EVERY = 8192
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def read_records(path: str) -> Iterator[Optional[Dict]]:
+    """One dict per JSONL line / CSV row, None for lines that don't parse"""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if ext in (".jsonl", ".ndjson"):
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield record if isinstance(record, dict) else None
+        elif ext == ".csv":
+            yield from csv.DictReader(f)
+        else:
+            raise ValueError(f"{path}: expected .jsonl, .ndjson or .csv")
+
+
+def content_hash(text: str) -> str:
+    normalized = re.sub(r"\s+", " ", text.strip().lower())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def source_key(path: str) -> str:
+    """A file is resumed only while its size and mtime are unchanged"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_size}|{int(stat.st_mtime)}"
+
+
+# -----------------------------
+# Progress store
+# -----------------------------
+def init_db(db: sqlite3.Connection):
+    db.execute("CREATE TABLE IF NOT EXISTS seen (hash TEXT PRIMARY KEY, id INTEGER)")
+    db.execute("CREATE TABLE IF NOT EXISTS sources (key TEXT PRIMARY KEY, records INTEGER, done INTEGER)")
+    db.execute("CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value INTEGER)")
+    # ids with a spooled embedding part, refreshed by embedding_batches
+    db.execute("CREATE TABLE IF NOT EXISTS embedded (id INTEGER PRIMARY KEY)")
+    db.commit()
+
+
+def get_state(db: sqlite3.Connection, name: str) -> Optional[int]:
+    row = db.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def set_state(db: sqlite3.Connection, name: str, value: int):
+    db.execute("INSERT OR REPLACE INTO state (name, value) VALUES (?, ?)", (name, value))
+
+
+# -----------------------------
+# Ingestion
+# -----------------------------
+class Ingestor:
+    """
+    Streams idea files into the BM25 store (and embedding parts for the
+    dense index) in fixed-size batches.
+
+    Each batch's docs and postings are written to the store's SQLite file,
+    and a checkpoint commits them together with the dedupe hashes, file
+    offset and id counter - its cost is the records since the last one,
+    not the index size. Work between checkpoints is rolled back by a crash
+    and redone: ids come from the committed counter, so embedding parts
+    beyond it are dropped and rewritten. Memory is one batch (plus
+    SQLite's page cache); the index is never loaded.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE, checkpoint_every: int = CHECKPOINT_EVERY,
+                 embed_vectors: bool = True):
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        self.embed_vectors = embed_vectors
+
+        self.store = rag.get_store()
+        if self.store is None:
+            raise SystemExit("[ingest] rag.INDEX_PATH is not set - nowhere to store the index")
+        self.db = self.store.db
+        init_db(self.db)
+        self.next_id = get_state(self.db, "next_id")
+        if self.next_id is None:
+            self.next_id = self.store.max_id() + 1
+            # existing ideas count as seen, so re-ingesting them is a no-op
+            self.db.executemany(
+                "INSERT OR IGNORE INTO seen (hash, id) VALUES (?, ?)",
+                ((content_hash(idea["text"]), idea["id"]) for idea in self.store.ideas()),
+            )
+            set_state(self.db, "next_id", self.next_id)
+            self.db.commit()
+        self._drop_uncommitted_parts()
+
+        self.batch: List[Dict] = []
+        self.counts = {"read": 0, "added": 0, "duplicate": 0, "invalid": 0}
+        self.started = time.perf_counter()
+
+    def _drop_uncommitted_parts(self):
+        for path in glob.glob(os.path.join(PARTS_DIR, "part-*.npz")):
+            first_id = int(os.path.basename(path)[5:-4])
+            if first_id >= self.next_id:
+                os.remove(path)
+
+    def ingest_file(self, path: str):
+        key = source_key(path)
+        row = self.db.execute("SELECT records, done FROM sources WHERE key = ?", (key,)).fetchone()
+        skip, done = row if row else (0, 0)
+        if done:
+            print(f"[ingest] {path}: already ingested ({skip} records), skipping")
+            return
+        if skip:
+            print(f"[ingest] {path}: resuming after {skip} records")
+
+        consumed = skip
+        since_checkpoint = 0
+        for record in itertools.islice(read_records(path), skip, None):
+            consumed += 1
+            since_checkpoint += 1
+            self._add(record)
+            if len(self.batch) >= self.batch_size:
+                self._flush()
+            if since_checkpoint >= self.checkpoint_every:
+                self._checkpoint(key, consumed, done=False)
+                since_checkpoint = 0
+        self._checkpoint(key, consumed, done=True)
+
+    def _add(self, record: Optional[Dict]):
+        self.counts["read"] += 1
+        text = (record or {}).get("text")
+        if not isinstance(text, str) or not text.strip():
+            self.counts["invalid"] += 1
+            return
+
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO seen (hash, id) VALUES (?, ?)", (content_hash(text), self.next_id)
+        )
+        if not cursor.rowcount:
+            self.counts["duplicate"] += 1
+            return
+
+        idea = {"id": self.next_id, "text": text.strip(), "tag": (record.get("tag") or "").strip()}
+        if record.get("id") not in (None, ""):
+            idea["source_id"] = record["id"]
+        self.next_id += 1
+        self.batch.append(idea)
+
+    def _flush(self):
+        if not self.batch:
+            return
+        self.store.add(self.batch)
+
+        if self.embed_vectors:
+            from router import embed
+
+            ids = np.array([idea["id"] for idea in self.batch], dtype=np.int64)
+            vectors = embed([idea["text"] for idea in self.batch], self.batch_size).astype(np.float16)
+            os.makedirs(PARTS_DIR, exist_ok=True)
+            path = os.path.join(PARTS_DIR, f"part-{ids[0]:012d}.npz")
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.savez(f, ids=ids, vectors=vectors)
+            os.replace(tmp, path)
+
+        self.counts["added"] += len(self.batch)
+        self.batch = []
+
+    def _checkpoint(self, key: str, consumed: int, done: bool):
+        self._flush()
+        self.db.execute(
+            "INSERT OR REPLACE INTO sources (key, records, done) VALUES (?, ?, ?)", (key, consumed, int(done))
+        )
+        set_state(self.db, "next_id", self.next_id)
+        self.db.commit()
+        self.report()
+
+    def rate(self) -> float:
+        return self.counts["read"] / max(time.perf_counter() - self.started, 1e-9)
+
+    def report(self):
+        c = self.counts
+        print(f"[ingest] read {c['read']}  added {c['added']}  duplicate {c['duplicate']}  "
+              f"invalid {c['invalid']}  ({self.rate():.0f} records/s)")
+
+
+def embedding_batches(batch_size: int = BATCH_SIZE):
+    """
+    Spooled parts, then any indexed idea without a part (e.g. the built-in
+    IDEAS). Coverage is recorded in the store's `embedded` table as the
+    parts are read, and the ideas missing from it are streamed from a
+    cursor, so memory stays at one batch whatever the corpus size.
+    """
+    from router import embed
+
+    db = rag.get_store().db
+    init_db(db)
+    # rebuilt from the parts on disk, so a deleted part is embedded again
+    db.execute("DELETE FROM embedded")
+    for path in sorted(glob.glob(os.path.join(PARTS_DIR, "part-*.npz"))):
+        with np.load(path) as part:
+            ids = part["ids"]
+            db.executemany("INSERT OR IGNORE INTO embedded (id) VALUES (?)", ((int(i),) for i in ids))
+            yield ids, part["vectors"]
+    db.commit()
+
+    cursor = db.execute(
+        "SELECT docs.idea FROM docs LEFT JOIN embedded ON embedded.id = docs.id "
+        "WHERE embedded.id IS NULL ORDER BY docs.id"
+    )
+    while True:
+        chunk = [json.loads(raw) for (raw,) in cursor.fetchmany(batch_size)]
+        if not chunk:
+            break
+        yield [idea["id"] for idea in chunk], embed([idea["text"] for idea in chunk], batch_size)
+
+
+def build_dense(dtype: str, batch_size: int = BATCH_SIZE) -> Dict:
+    from dense_index import INDEX_DIR, build_index
+    from router import MODEL_NAME
+
+    start = time.perf_counter()
+    meta = build_index(embedding_batches(batch_size), INDEX_DIR, dtype, model=MODEL_NAME)
+    print(f"[ingest] dense index: {meta['n']} vectors, {meta['nlist']} lists "
+          f"({time.perf_counter() - start:.1f}s)")
+    return meta
+
+
+def main():
+    from dense_index import DTYPE, INDEX_DIR
+
+    parser = argparse.ArgumentParser(description="Stream JSONL/CSV idea files into the retrieval indexes")
+    parser.add_argument("paths", nargs="+", help=".jsonl / .ndjson / .csv with a 'text' column (optional 'tag', 'id')")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    parser.add_argument("--no-embed", action="store_true", help="BM25 only, skip embeddings and the dense index")
+    parser.add_argument("--dtype", choices=["float16", "int8"], default=DTYPE)
+    args = parser.parse_args()
+
+    ingestor = Ingestor(args.batch_size, args.checkpoint_every, not args.no_embed)
+    for path in args.paths:
+        ingestor.ingest_file(path)
+
+    # the IVF lists are trained on all vectors, so the dense index is rebuilt once at the end
+    if ingestor.embed_vectors and (ingestor.counts["added"] or not os.path.exists(INDEX_DIR)):
+        build_dense(args.dtype, args.batch_size)
+    print(f"[ingest] done in {time.perf_counter() - ingestor.started:.1f}s, {len(ingestor.store)} ideas indexed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,96 @@
-from llama_cpp import Llama
-
-MODEL_PATH = r"paste the model path here"
-_llm = None
-
-
-def get_llm():
-    global _llm
-    if _llm is None:
-        print("🔵 Loading model once...")
-        _llm = Llama(
-            model_path=MODEL_PATH,
-            n_ctx=4096,
-            n_threads=8,
-            n_batch=1024,
-            n_gpu_layers=35,
-            verbose=False,
-        )
-        print("✅ Model loaded")
-    return _llm
-
+import os
+from typing import TYPE_CHECKING
+
+from cache import CompletionCache
+
+if TYPE_CHECKING:
+    from llama_cpp import Llama
+
+MODEL_PATH = r"paste the model path here"
+N_THREADS = 8
+
+# >1 = run decision agents in a process pool, one model per worker (see pool.py)
+AGENT_WORKERS = 1
+THREAD_BUDGET = None  # total threads split across workers (None = all cores)
+
+# Cache for deterministic calls (temperature=0 or explicit seed)
+COMPLETION_CACHE = {
+    "enabled": True,
+    "memory_entries": 256,
+    "disk_dir": "cache/completions",  # None = memory only
+    "max_disk_mb": 256,
+}
+
+_llm = None
+_cache = None
+
+
+class CachedLlama:
+    """
+    Wraps the Llama instance and caches deterministic completions.
+
+    Extra keyword args per call:
+    - cache=False  opt this call out
+    - stage="..."  name used for per-stage hit rates
+    """
+
+    def __init__(self, llm: "Llama", cache: CompletionCache):
+        self.llm = llm
+        self.cache = cache
+        self.model_id = model_identity(MODEL_PATH)
+
+    def __call__(self, prompt: str, cache: bool = True, stage: str = "default", **kwargs):
+        deterministic = kwargs.get("temperature", 0.8) == 0 or kwargs.get("seed") is not None
+        if not (cache and self.cache and deterministic) or kwargs.get("stream"):
+            return self.llm(prompt, **kwargs)
+
+        key = self.cache.make_key(self.model_id, prompt, kwargs)
+        hit = self.cache.get(key, stage)
+        if hit is not None:
+            return hit
+
+        out = self.llm(prompt, **kwargs)
+        self.cache.put(key, out)
+        return out
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+def model_identity(path: str) -> str:
+    """Path + size + mtime, so a replaced model file never hits old entries"""
+    try:
+        stat = os.stat(path)
+        return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    except OSError:
+        return path
+
+
+def get_cache():
+    global _cache
+    if _cache is None and COMPLETION_CACHE["enabled"]:
+        _cache = CompletionCache(
+            memory_entries=COMPLETION_CACHE["memory_entries"],
+            disk_dir=COMPLETION_CACHE["disk_dir"],
+            max_disk_bytes=COMPLETION_CACHE["max_disk_mb"] * 1024 * 1024,
+        )
+    return _cache
+
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        from llama_cpp import Llama  # imported here so startup stays light
+
+        print("🔵 Loading model once...")
+        model = Llama(
+            model_path=MODEL_PATH,
+            n_ctx=4096,
+            n_threads=N_THREADS,
+            n_batch=1024,
+            n_gpu_layers=35,
+            verbose=False,
+        )
+        _llm = CachedLlama(model, get_cache())
+        print("✅ Model loaded")
+    return _llm
@@ -0,0 +1,95 @@
+# pool.py
+
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+
+_warm_barrier = None
+
+
+def _init_worker(n_threads: int, barrier):
+    # one model instance per worker, with its share of the thread budget
+    global _warm_barrier
+    _warm_barrier = barrier
+    import llm
+    llm.N_THREADS = n_threads
+    llm.get_llm()
+
+
+def _run_agent(agent_name: str, user_input: str) -> Dict:
+    from agents.registry import AGENTS
+    return {"agent": agent_name, "output": AGENTS[agent_name].run(user_input)}
+
+
+def _ping() -> int:
+    # blocks until every worker holds one ping, so no worker can take two
+    _warm_barrier.wait()
+    return os.getpid()
+
+
+class AgentPool:
+    """
+    Runs decision agents concurrently on K model instances,
+    each in its own process.
+    """
+
+    def __init__(self, workers: int, thread_budget: Optional[int] = None):
+        self.workers = workers
+        self.thread_budget = thread_budget or os.cpu_count() or workers
+        self.threads_per_worker = max(1, self.thread_budget // workers)
+
+        # spawn, not fork: a forked llama.cpp context is not safe to reuse
+        context = mp.get_context("spawn")
+        # shared with the workers at spawn (barriers can't be sent with a task)
+        self.barrier = context.Barrier(workers)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker, self.barrier),
+        )
+
+    def warmup(self) -> List[int]:
+        """
+        Start every worker and wait until all models are loaded. Each
+        worker takes one ping after its initializer ran, and the pings
+        meet at a barrier, so a fast worker can't answer for the others.
+        """
+        futures = [self.executor.submit(_ping) for _ in range(self.workers)]
+        return [f.result() for f in futures]
+
+    def run(self, agent_names: List[str], user_input: str) -> List[Dict]:
+        """
+        Returns [{"agent", "output"}] in the same order as agent_names.
+        """
+        futures = [self.executor.submit(_run_agent, name, user_input) for name in agent_names]
+
+        results = []
+        for name, future in zip(agent_names, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"agent": name, "output": f"Error: {e}"})
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+_pool = None
+
+
+def get_pool() -> Optional[AgentPool]:
+    global _pool
+    from llm import AGENT_WORKERS, THREAD_BUDGET
+
+    if AGENT_WORKERS <= 1:
+        return None
+    if _pool is None:
+        print(f"🔵 Starting {AGENT_WORKERS} agent workers...")
+        _pool = AgentPool(AGENT_WORKERS, THREAD_BUDGET)
+        _pool.warmup()
+        print(f"✅ Agent workers ready ({_pool.threads_per_worker} threads each)")
+    return _pool
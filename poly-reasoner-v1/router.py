@@ -1,52 +1,145 @@
-# router.py
-
-import numpy as np
-from sentence_transformers import SentenceTransformer, util
-
-# lightweight + fast
-_model = SentenceTransformer("all-MiniLM-L6-v2")
-
-INTENT_ANCHORS = {
-    "ideas": [
-        "suggest ideas",
-        "give me ideas",
-        "what can I build",
-        "startup ideas",
-        "tool ideas",
-        "product ideas",
-    ],
-    "decision": [
-        "should I build",
-        "is it worth building",
-        "should I do this",
-        "pros and cons",
-        "evaluate this idea",
-        "is this a good idea",
-    ],
-}
-
-# precompute anchor embeddings ONCE
-ANCHOR_EMBEDDINGS = {
-    intent: _model.encode(texts, normalize_embeddings=True)
-    for intent, texts in INTENT_ANCHORS.items()
-}
-
-
-def embedding_route(user_input: str, threshold: float = 0.35) -> str:
-    """
-    Returns: 'ideas' | 'decision' | 'chat'
-    """
-    query_emb = _model.encode(user_input, normalize_embeddings=True)
-
-    scores = {}
-    for intent, emb in ANCHOR_EMBEDDINGS.items():
-        sim = util.cos_sim(query_emb, emb).max().item()
-        scores[intent] = sim
-
-    best_intent = max(scores, key=scores.get)
-    best_score = scores[best_intent]
-
-    if best_score < threshold:
-        return "chat"
-
-    return best_intent
+# router.py
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# lightweight + fast
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# anchor embeddings are cached on disk; bump the version when the encoding
+# changes (model name and anchor texts are part of the file name already)
+ANCHOR_CACHE_VERSION = 1
+ANCHOR_CACHE_DIR = "cache/anchors"
+
+INTENT_ANCHORS = {
+    "ideas": [
+        "suggest ideas",
+        "give me ideas",
+        "what can I build",
+        "startup ideas",
+        "tool ideas",
+        "product ideas",
+    ],
+    "decision": [
+        "should I build",
+        "is it worth building",
+        "should I do this",
+        "pros and cons",
+        "evaluate this idea",
+        "is this a good idea",
+    ],
+}
+
+# loaded on first use - importing sentence_transformers pulls in torch
+_model = None
+_anchor_matrix = None
+
+INTENTS = list(INTENT_ANCHORS)
+# row offset of each intent's first anchor in the stacked matrix
+INTENT_OFFSETS = np.cumsum([0] + [len(a) for a in INTENT_ANCHORS.values()])[:-1]
+
+
+def get_model():
+    global _model
+    if _model is None:
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+
+def embed(texts, batch_size: int = 32):
+    """Normalized MiniLM embeddings, shape (len(texts), dim)"""
+    return get_model().encode(texts, batch_size=batch_size, normalize_embeddings=True)
+
+
+def anchor_cache_path() -> str:
+    raw = json.dumps([MODEL_NAME, INTENT_ANCHORS], sort_keys=True)
+    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(ANCHOR_CACHE_DIR, f"anchors-v{ANCHOR_CACHE_VERSION}-{digest}.npy")
+
+
+def get_anchor_matrix() -> np.ndarray:
+    """
+    All anchors stacked in INTENT_ANCHORS order, shape (n_anchors, dim),
+    rows L2-normalized. Read from the versioned .npy cache, encoded
+    (and saved) only when the cache is missing or stale.
+    """
+    global _anchor_matrix
+    if _anchor_matrix is not None:
+        return _anchor_matrix
+
+    path = anchor_cache_path()
+    texts = [text for anchors in INTENT_ANCHORS.values() for text in anchors]
+
+    try:
+        matrix = np.load(path)
+        if len(matrix) != len(texts):
+            raise ValueError("anchor count changed")
+    except (OSError, ValueError):
+        matrix = embed(texts).astype(np.float32)
+        os.makedirs(ANCHOR_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp, path)
+
+    _anchor_matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    return _anchor_matrix
+
+
+def get_anchor_embeddings():
+    """{intent: (n_anchors, dim)} views into the stacked anchor matrix"""
+    matrix = get_anchor_matrix()
+    return {
+        intent: matrix[offset:offset + len(INTENT_ANCHORS[intent])]
+        for intent, offset in zip(INTENTS, INTENT_OFFSETS)
+    }
+
+
+def intent_scores(query_embs) -> np.ndarray:
+    """
+    Best anchor similarity per intent for each query, shape (n, n_intents).
+    One matrix multiply over all anchors, then a max within each intent's rows.
+    """
+    query_embs = np.asarray(query_embs, dtype=np.float32).reshape(-1, get_anchor_matrix().shape[1])
+    similarity = query_embs @ get_anchor_matrix().T
+    return np.maximum.reduceat(similarity, INTENT_OFFSETS, axis=1)
+
+
+def embedding_route_batch(
+    user_inputs: list,
+    threshold: float = 0.35,
+    query_embs=None,
+    batch_size: int = 256,
+) -> list:
+    """
+    Route many queries at once - same labels as embedding_route.
+    Queries are encoded in batches of batch_size; pass query_embs
+    (from embed) to skip encoding.
+    """
+    if query_embs is None:
+        if not user_inputs:
+            return []
+        query_embs = embed(list(user_inputs), batch_size=batch_size)
+
+    scores = intent_scores(query_embs)
+    best = scores.argmax(axis=1)
+    best_score = scores[np.arange(len(scores)), best]
+
+    return [
+        INTENTS[i] if score >= threshold else "chat"
+        for i, score in zip(best.tolist(), best_score.tolist())
+    ]
+
+
+def embedding_route(user_input: str, threshold: float = 0.35, query_emb=None) -> str:
+    """
+    Returns: 'ideas' | 'decision' | 'chat'
+    Pass query_emb (from embed) to reuse an embedding computed elsewhere.
+    """
+    if query_emb is None:
+        query_emb = embed([user_input])[0]
+    return embedding_route_batch([user_input], threshold, query_embs=[query_emb])[0]
@@ -0,0 +1,189 @@
+# rules.py
+
+import bisect
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Same engine as v2 core/rules.py; v1 has no config.py, so its tables live here.
+# v1 routes with embeddings + MainAgent, so only the weight table is used.
+ROUTING_RULES: List[Dict] = []
+DEFAULT_ROUTING_SCORES: Dict[str, float] = {}
+
+# keyword → synthesis weights, first match wins. Keywords match at the start
+# of a word.
+WEIGHT_RULES = [
+    {
+        "keywords": ["security", "attack", "defense"],
+        "weights": {
+            "security": 0.4,
+            "risk": 0.3,
+            "business": 0.15,
+            "finance": 0.05,
+            "longterm": 0.05,
+            "shortterm": 0.05,
+        },
+    },
+    {
+        "keywords": ["startup", "saas"],
+        "weights": {
+            "business": 0.35,
+            "finance": 0.25,
+            "risk": 0.2,
+            "longterm": 0.15,
+            "security": 0.05,
+            "shortterm": 0.0,
+        },
+    },
+    {
+        "keywords": ["quick", "mvp"],
+        "weights": {
+            "shortterm": 0.4,
+            "risk": 0.25,
+            "business": 0.2,
+            "longterm": 0.1,
+            "security": 0.05,
+            "finance": 0.0,
+        },
+    },
+]
+
+DEFAULT_WEIGHTS = {
+    "security": 0.15,
+    "risk": 0.15,
+    "business": 0.2,
+    "finance": 0.1,
+    "longterm": 0.2,
+    "shortterm": 0.2,
+}
+
+
+def _trie_pattern(words) -> str:
+    """
+    Regex for a set of words with shared prefixes factored out
+    ("cost|concern" -> "c(?:o(?:st|ncern))"), so the matcher walks a trie
+    instead of trying every alternative. Longer words win at the same spot.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class RuleEngine:
+    """
+    Keyword rules for agent routing and synthesis weights, compiled into one
+    trie-shaped regex over every keyword of every table.
+
+    A query is scanned once (in C, by the re module) and each matched keyword
+    maps to the rules that use it. Keywords match at the start of a word, so
+    they cover their inflections ("risk" -> "risky") but not words that merely
+    contain them ("now" in "know"). Results are memoized per set of matched rules -
+    there are only a handful of distinct combinations.
+    """
+
+    def __init__(
+        self,
+        routing_rules: List[Dict] = ROUTING_RULES,
+        weight_rules: List[Dict] = WEIGHT_RULES,
+        default_scores: Dict[str, float] = DEFAULT_ROUTING_SCORES,
+        default_weights: Dict[str, float] = DEFAULT_WEIGHTS,
+        agents=DEFAULT_WEIGHTS,
+    ):
+        self.routing_rules = routing_rules
+        self.weight_rules = weight_rules
+        self.default_scores = default_scores
+        self.default_weights = default_weights
+        self.agents = list(agents)
+
+        # keyword -> (bitmask of routing rules, bitmask of weight rules)
+        self.keyword_rules: Dict[str, Tuple[int, int]] = {}
+        for table, rules in ((0, routing_rules), (1, weight_rules)):
+            for i, rule in enumerate(rules):
+                for keyword in rule["keywords"]:
+                    masks = list(self.keyword_rules.get(keyword.lower(), (0, 0)))
+                    masks[table] |= 1 << i
+                    self.keyword_rules[keyword.lower()] = tuple(masks)
+
+        self.pattern = re.compile(r"\b(" + _trie_pattern(self.keyword_rules) + ")")
+        self._resolved: Dict[Tuple[int, int], Dict] = {}
+
+    def _resolve(self, routing: int, weights: int) -> Dict:
+        key = (routing, weights)
+        if key not in self._resolved:
+            matched = [i for i in range(len(self.routing_rules)) if routing >> i & 1]
+            scores = {agent: 0.0 for agent in self.agents}
+            for i in matched:
+                scores.update(self.routing_rules[i]["scores"])
+            if max(scores.values(), default=0.0) == 0.0:
+                scores.update(self.default_scores)
+
+            # lowest set bit = first matching weight rule
+            weight_rule = (weights & -weights).bit_length() - 1 if weights else None
+            self._resolved[key] = {
+                "scores": scores,
+                "weights": self.weight_rules[weight_rule]["weights"] if weight_rule is not None else self.default_weights,
+                "routing_rules": matched,
+                "weight_rule": weight_rule,
+            }
+        return self._resolved[key]
+
+    def _result(self, keywords: List[str]) -> Dict:
+        routing = weights = 0
+        for keyword in keywords:
+            r, w = self.keyword_rules[keyword]
+            routing |= r
+            weights |= w
+        resolved = self._resolve(routing, weights)
+        return {
+            "scores": dict(resolved["scores"]),
+            "weights": dict(resolved["weights"]),
+            "keywords": keywords,
+            "routing_rules": resolved["routing_rules"],
+            "weight_rule": resolved["weight_rule"],
+        }
+
+    def match(self, text: str) -> Dict:
+        """
+        {"scores": agent relevance, "weights": synthesis weights,
+         "keywords": matched keywords, "routing_rules", "weight_rule"}
+        """
+        return self._result([m.group(1) for m in self.pattern.finditer(text.lower())])
+
+    def match_batch(self, texts: List[str]) -> List[Dict]:
+        """match() for many queries with a single scan over all of them"""
+        lowered = [text.lower() for text in texts]
+        joined = "\n".join(lowered)
+        starts = []
+        offset = 0
+        for text in lowered:
+            starts.append(offset)
+            offset += len(text) + 1
+
+        keywords: List[List[str]] = [[] for _ in texts]
+        for m in self.pattern.finditer(joined):
+            keywords[bisect.bisect_right(starts, m.start()) - 1].append(m.group(1))
+        return [self._result(found) for found in keywords]
+
+    def select_agents(self, text: str, threshold: float) -> Dict[str, float]:
+        return {k: v for k, v in self.match(text)["scores"].items() if v >= threshold}
+
+
+_engine: Optional[RuleEngine] = None
+
+
+def get_rule_engine() -> RuleEngine:
+    global _engine
+    if _engine is None:
+        _engine = RuleEngine()
+    return _engine
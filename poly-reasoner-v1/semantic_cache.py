@@ -0,0 +1,151 @@
+# semantic_cache.py
+
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# similarity needed to reuse an evaluation (cosine, MiniLM embeddings)
+SIMILARITY_THRESHOLD = 0.85
+TTL_SECONDS = 24 * 3600
+MAX_ENTRIES = 2000
+# "return" = answer from cache directly, "offer" = ask before reusing
+MODE = "offer"
+
+
+class SemanticCache:
+    """
+    Cache of finished evaluations keyed by query meaning.
+
+    Embeddings live in one preallocated (max_entries, dim) matrix, so a
+    lookup is a single matrix-vector product. Entries expire after
+    ttl_seconds; when full, the least recently used slot is reused.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], np.ndarray],
+        threshold: float = SIMILARITY_THRESHOLD,
+        ttl_seconds: float = TTL_SECONDS,
+        max_entries: int = MAX_ENTRIES,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self.vectors: Optional[np.ndarray] = None  # allocated on first add
+        self.used = np.zeros(max_entries, dtype=bool)
+        self.created = np.zeros(max_entries)
+        self.last_used = np.zeros(max_entries)
+        self.queries: List[Optional[str]] = [None] * max_entries
+        self.values: List[Optional[Dict]] = [None] * max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return int(self.used.sum())
+
+    def _expire(self, now: float):
+        expired = self.used & (now - self.created > self.ttl_seconds)
+        for slot in np.flatnonzero(expired):
+            self.queries[slot] = None
+            self.values[slot] = None
+        self.used &= ~expired
+
+    def _scores(self, vector: np.ndarray) -> np.ndarray:
+        scores = self.vectors @ vector
+        scores[~self.used] = -np.inf
+        return scores
+
+    def lookup(self, query: str, vector: Optional[np.ndarray] = None) -> Optional[Dict]:
+        """
+        Returns the best match above threshold as
+        {"value", "matched_query", "similarity", "threshold", "age_s",
+         "runner_up", "why"} or None.
+        """
+        now = time.time()
+        self._expire(now)
+
+        if not len(self):
+            self.misses += 1
+            return None
+
+        if vector is None:
+            vector = self.embed([query])[0]
+        scores = self._scores(vector.astype(np.float32))
+
+        order = np.argsort(-scores)[:2]
+        best = int(order[0])
+        similarity = float(scores[best])
+
+        if similarity < self.threshold:
+            self.misses += 1
+            return None
+
+        runner_up = None
+        if len(order) > 1 and np.isfinite(scores[order[1]]):
+            runner_up = {
+                "query": self.queries[order[1]],
+                "similarity": round(float(scores[order[1]]), 3),
+            }
+
+        self.hits += 1
+        self.last_used[best] = now
+        age = float(now - self.created[best])
+
+        return {
+            "value": self.values[best],
+            "matched_query": self.queries[best],
+            "similarity": round(similarity, 3),
+            "threshold": self.threshold,
+            "age_s": round(age, 1),
+            "runner_up": runner_up,
+            "why": (
+                f'similarity {similarity:.3f} >= {self.threshold:.2f} with '
+                f'"{self.queries[best]}" (evaluated {age / 60:.0f} min ago)'
+            ),
+        }
+
+    def add(self, query: str, value: Dict, vector: Optional[np.ndarray] = None):
+        now = time.time()
+        self._expire(now)
+
+        if vector is None:
+            vector = self.embed([query])[0]
+        vector = vector.astype(np.float32)
+
+        if self.vectors is None:
+            self.vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+
+        slot = self._pick_slot(vector)
+        self.vectors[slot] = vector
+        self.used[slot] = True
+        self.created[slot] = now
+        self.last_used[slot] = now
+        self.queries[slot] = query
+        self.values[slot] = value
+
+    def _pick_slot(self, vector: np.ndarray) -> int:
+        if len(self):
+            # same question again → overwrite instead of duplicating
+            scores = self._scores(vector)
+            best = int(np.argmax(scores))
+            if scores[best] >= 0.999:
+                return best
+
+        free = np.flatnonzero(~self.used)
+        if len(free):
+            return int(free[0])
+
+        return int(np.argmin(self.last_used))
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,187 @@
+import argparse
+import time
+from typing import Dict, List
+
+from agents.agents import AGENTS
+from core.pool import AgentPool
+
+SAMPLE_QUERIES = [
+    "Should I build a SaaS for freelancers to track invoices?",
+    "Is an LLM firewall for enterprise apps worth building?",
+    "Quick MVP for a budgeting app - what are the security risks?",
+]
+
+
+def bench_pool(max_workers: int, thread_budget: int, rounds: int) -> List[Dict]:
+    """Agent throughput for K = 1..max_workers model instances"""
+    jobs = [(name, q) for q in SAMPLE_QUERIES for name in AGENTS] * rounds
+    rows = []
+
+    for k in range(1, max_workers + 1):
+        pool = AgentPool(k, thread_budget)
+
+        start = time.perf_counter()
+        pool.warmup()
+        load_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for query in SAMPLE_QUERIES * rounds:
+            pool.run(list(AGENTS), query)
+        elapsed = time.perf_counter() - start
+        pool.shutdown()
+
+        rows.append({
+            "workers": k,
+            "threads_each": pool.threads_per_worker,
+            "load_s": round(load_s, 1),
+            "jobs": len(jobs),
+            "total_s": round(elapsed, 1),
+            "jobs_per_min": round(len(jobs) / elapsed * 60, 1),
+        })
+        print(rows[-1])
+
+    base = rows[0]["jobs_per_min"]
+    print("\nworkers  threads  jobs/min  speedup")
+    for row in rows:
+        print(f"{row['workers']:>7}  {row['threads_each']:>7}  {row['jobs_per_min']:>8}  "
+              f"{row['jobs_per_min'] / base:>6.2f}x")
+    return rows
+
+
+# -----------------------------
+# Keyword rules: compiled engine vs per-rule substring scans
+# -----------------------------
+RULE_QUERIES = SAMPLE_QUERIES + [
+    "What are the long-term growth risks of a marketplace for tutors?",
+    "How much funding do I need for a hardware startup with a small budget?",
+    "Is there a privacy concern with storing customer chat logs?",
+    "Tell me about the history of the printing press",
+    "I know it's not urgent but could we scale the product next year?",
+]
+
+
+def _legacy_rules(text: str) -> Dict:
+    """Scores and weights the way Router/Synthesizer computed them before the engine"""
+    from config import DEFAULT_ROUTING_SCORES, DEFAULT_WEIGHTS, ROUTING_RULES, WEIGHT_RULES
+
+    text = text.lower()
+    scores = {agent: 0.0 for agent in DEFAULT_WEIGHTS}
+    for rule in ROUTING_RULES:
+        if any(w in text for w in rule["keywords"]):
+            scores.update(rule["scores"])
+    if max(scores.values()) == 0.0:
+        scores.update(DEFAULT_ROUTING_SCORES)
+
+    weights = DEFAULT_WEIGHTS
+    for rule in WEIGHT_RULES:
+        if any(kw in text for kw in rule["keywords"]):
+            weights = rule["weights"]
+            break
+    return {"scores": scores, "weights": weights}
+
+
+def bench_rules(n: int) -> Dict:
+    from core.rules import RuleEngine
+
+    queries = [RULE_QUERIES[i % len(RULE_QUERIES)] + f" #{i}" for i in range(n)]
+    engine = RuleEngine()
+
+    timings = {}
+    start = time.perf_counter()
+    legacy = [_legacy_rules(q) for q in queries]
+    timings["legacy"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = [engine.match(q) for q in queries]
+    timings["engine"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = engine.match_batch(queries)
+    timings["engine_batch"] = time.perf_counter() - start
+
+    assert [(m["scores"], m["weights"]) for m in single] == [(m["scores"], m["weights"]) for m in batch]
+    differ = [q for q, old, new in zip(queries, legacy, single)
+              if (old["scores"], old["weights"]) != (new["scores"], new["weights"])]
+
+    print(f"\n{n} queries")
+    for name, seconds in timings.items():
+        print(f"  {name:<13} {seconds * 1e6 / n:7.2f} us/query  {timings['legacy'] / seconds:5.2f}x")
+    print(f"  {len(differ)} queries route differently (word-start matching); e.g.:")
+    for q in list(dict.fromkeys(q.rsplit(' #', 1)[0] for q in differ))[:3]:
+        print(f"    {q}")
+    return timings
+
+
+# -----------------------------
+# Conversation memory: bounded context vs unbounded history
+# -----------------------------
+def bench_context(turns: int, summary_delay_s: float) -> List[Dict]:
+    """Stored bytes as a session grows; the summarizer is simulated with a sleep"""
+    import random
+    import sys
+
+    from memory.context import ConversationContext, extractive_summary
+
+    def slow_summary(summary, batch):
+        time.sleep(summary_delay_s)
+        return extractive_summary(summary, batch)
+
+    rng = random.Random(0)
+    context = ConversationContext(summarizer=slow_summary)
+    unbounded = []
+    add_times = []
+    rows = []
+    for i in range(1, turns + 1):
+        user = f"Follow-up question {i}: " + " ".join(["detail"] * rng.randint(5, 40))
+        ai = "Here is the analysis. " + " ".join(["reasoning"] * rng.randint(200, 900))
+
+        start = time.perf_counter()
+        context.add_turn(user, ai, "analyze")
+        add_times.append(time.perf_counter() - start)
+        unbounded.append({"user": user, "ai": ai})
+
+        if i in (10, 100, turns):
+            stats = context.stats()
+            rows.append({
+                "turns": i,
+                "unbounded_kb": round(sum(sys.getsizeof(t["user"]) + sys.getsizeof(t["ai"]) for t in unbounded) / 1024, 1),
+                "bounded_kb": round(stats["bytes"] / 1024, 1),
+                "stored_tokens": stats["tokens"],
+            })
+            print(rows[-1])
+
+    add_times.sort()
+    print(f"add_turn p50 {add_times[len(add_times) // 2] * 1000:.2f} ms, "
+          f"p99 {add_times[int(len(add_times) * 0.99)] * 1000:.2f} ms (summarizer {summary_delay_s}s, off the hot path)")
+    context.wait_idle()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poly-Reasoner benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    pool = sub.add_parser("pool", help="agent throughput with K worker processes")
+    pool.add_argument("--max-workers", type=int, default=4)
+    pool.add_argument("--threads", type=int, default=None, help="total thread budget")
+    pool.add_argument("--rounds", type=int, default=1)
+
+    rules = sub.add_parser("rules", help="keyword rule engine vs per-rule substring scans")
+    rules.add_argument("--queries", type=int, default=100000)
+
+    context = sub.add_parser("context", help="conversation memory per session as it grows")
+    context.add_argument("--turns", type=int, default=1000)
+    context.add_argument("--summary-delay", type=float, default=0.5, help="simulated summarizer seconds")
+
+    args = parser.parse_args()
+
+    if args.bench == "pool":
+        bench_pool(args.max_workers, args.threads, args.rounds)
+    elif args.bench == "rules":
+        bench_rules(args.queries)
+    elif args.bench == "context":
+        bench_context(args.turns, args.summary_delay)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,115 @@
-# Model configuration
-MODEL_PATH = r"paste the model path here"
-MODEL_CONFIG = {
-    "n_ctx": 4096,
-    "n_threads": 6,
-    "n_batch": 512,
-    "n_gpu_layers": 35,
-}
-
-# Agent expertise definitions
-AGENT_PROFILES = {
-    "security": "cybersecurity risks, vulnerabilities, threat modeling, data protection, compliance requirements",
-    "risk": "operational risks, failure modes, mitigation strategies, contingency planning, risk-reward analysis",
-    "business": "market viability, competitive positioning, scalability, business model, customer acquisition",
-    "finance": "cost structure, revenue potential, ROI, funding requirements, financial sustainability",
-    "longterm": "strategic vision, future-proofing, sustainability, evolution roadmap, technical debt prevention",
-    "shortterm": "immediate execution, MVP feasibility, quick wins, resource efficiency, time-to-market",
-}
-
-# Dynamic weight rules (keyword → weight distribution)
-WEIGHT_RULES = [
-    {
-        "keywords": ["security", "attack", "breach", "vulnerability", "exploit"],
-        "weights": {"security": 0.40, "risk": 0.30, "business": 0.15, "finance": 0.05, "longterm": 0.05, "shortterm": 0.05}
-    },
-    {
-        "keywords": ["startup", "saas", "product", "market"],
-        "weights": {"business": 0.35, "finance": 0.25, "risk": 0.20, "longterm": 0.15, "shortterm": 0.05, "security": 0.00}
-    },
-    {
-        "keywords": ["quick", "mvp", "fast", "immediate", "urgent"],
-        "weights": {"shortterm": 0.40, "risk": 0.25, "business": 0.20, "longterm": 0.10, "security": 0.05, "finance": 0.00}
-    },
-    {
-        "keywords": ["cost", "budget", "price", "funding", "investment"],
-        "weights": {"finance": 0.40, "business": 0.25, "risk": 0.20, "longterm": 0.10, "shortterm": 0.05, "security": 0.00}
-    },
-]
-
-# Routing thresholds
-RELEVANCE_THRESHOLD = 0.4  # Min score to activate an agent
-COMPLEXITY_THRESHOLD = 5   # Word count below = simple chat
-
-CONFIDENCE_THRESHOLD = 0.7  # Min confidence to show result
+# Model configuration
+MODEL_PATH = r"paste the model path here"
+MODEL_CONFIG = {
+    "n_ctx": 4096,
+    "n_threads": 6,
+    "n_batch": 512,
+    "n_gpu_layers": 35,
+}
+
+# Agent expertise definitions
+AGENT_PROFILES = {
+    "security": "cybersecurity risks, vulnerabilities, threat modeling, data protection, compliance requirements",
+    "risk": "operational risks, failure modes, mitigation strategies, contingency planning, risk-reward analysis",
+    "business": "market viability, competitive positioning, scalability, business model, customer acquisition",
+    "finance": "cost structure, revenue potential, ROI, funding requirements, financial sustainability",
+    "longterm": "strategic vision, future-proofing, sustainability, evolution roadmap, technical debt prevention",
+    "shortterm": "immediate execution, MVP feasibility, quick wins, resource efficiency, time-to-market",
+}
+
+# Agent routing rules (keyword → relevance scores). Matched rules are applied
+# in order, so a later rule overrides scores set by an earlier one.
+# Keywords match at the start of a word: "budget" matches "budgeting" and "risk"
+# matches "risky", but "now" no longer matches "know". Forms that don't start with
+# the keyword ("pricing", "scaling") are listed separately.
+ROUTING_RULES = [
+    {
+        "keywords": ["security", "hack", "breach", "attack", "privacy", "compliance", "vulnerability"],
+        "scores": {"security": 0.9, "risk": 0.7}
+    },
+    {
+        "keywords": ["business", "startup", "saas", "product", "market", "customer", "idea", "project"],
+        "scores": {"business": 0.9, "finance": 0.6, "shortterm": 0.6}
+    },
+    {
+        "keywords": ["cost", "price", "pricing", "funding", "revenue", "investment", "budget", "money", "roi"],
+        "scores": {"finance": 0.9, "business": 0.7}
+    },
+    {
+        "keywords": ["risk", "danger", "problem", "issue", "concern", "threat"],
+        "scores": {"risk": 0.9, "security": 0.6}
+    },
+    {
+        "keywords": ["quick", "fast", "mvp", "immediate", "now", "short"],
+        "scores": {"shortterm": 0.9}
+    },
+    {
+        "keywords": ["future", "longterm", "long-term", "sustainable", "scale", "scaling", "growth"],
+        "scores": {"longterm": 0.9}
+    },
+]
+# Used when no routing keyword matches (default for ideas)
+DEFAULT_ROUTING_SCORES = {"business": 0.7, "shortterm": 0.6}
+
+# Dynamic weight rules (keyword → weight distribution), first match wins
+WEIGHT_RULES = [
+    {
+        "keywords": ["security", "attack", "breach", "vulnerability", "exploit"],
+        "weights": {"security": 0.40, "risk": 0.30, "business": 0.15, "finance": 0.05, "longterm": 0.05, "shortterm": 0.05}
+    },
+    {
+        "keywords": ["startup", "saas", "product", "market"],
+        "weights": {"business": 0.35, "finance": 0.25, "risk": 0.20, "longterm": 0.15, "shortterm": 0.05, "security": 0.00}
+    },
+    {
+        "keywords": ["quick", "mvp", "fast", "immediate", "urgent"],
+        "weights": {"shortterm": 0.40, "risk": 0.25, "business": 0.20, "longterm": 0.10, "security": 0.05, "finance": 0.00}
+    },
+    {
+        "keywords": ["cost", "budget", "price", "pricing", "funding", "investment"],
+        "weights": {"finance": 0.40, "business": 0.25, "risk": 0.20, "longterm": 0.10, "shortterm": 0.05, "security": 0.00}
+    },
+]
+
+DEFAULT_WEIGHTS = {agent: 0.166 for agent in AGENT_PROFILES}
+
+# Conversation memory per session: recent turns verbatim, older ones folded into a
+# rolling summary off the hot path. Stored text stays under roughly
+# max_verbatim_tokens + max_pending_tokens + summary_tokens.
+CONVERSATION_CONTEXT = {
+    "recent_turns": 6,            # turns kept word for word
+    "max_verbatim_tokens": 3000,
+    "max_pending_tokens": 2000,   # past this, turns are folded without waiting for the summarizer
+    "summary_tokens": 256,
+    "context_tokens": 1024,       # default get_recent_context budget
+    "summarizer": "llm",          # "llm" or "extractive" (first sentences, no model call)
+}
+
+# Routing thresholds
+RELEVANCE_THRESHOLD = 0.4  # Min score to activate an agent
+COMPLEXITY_THRESHOLD = 5   # Word count below = simple chat
+
+CONFIDENCE_THRESHOLD = 0.7  # Min confidence to show result
+
+# Agent execution
+AGENT_WORKERS = 1      # >1 = run agents in a process pool, one model instance per worker
+THREAD_BUDGET = None   # Total CPU threads split across workers (None = all cores)
+
+# Completion cache - only deterministic calls are cached (temperature 0 or a fixed seed)
+LLM_SEED = None  # Set an int to make sampled calls reproducible (and cacheable)
+COMPLETION_CACHE = {
+    "enabled": True,
+    "memory_entries": 256,
+    "disk_dir": "cache/completions",  # None = memory only
+    "max_disk_mb": 256,
+}
+
+# Speculative decoding: draft tokens by n-gram lookup in the prompt and let the
+# model verify several per pass. Synthesis mostly quotes agent outputs, so it
+# benefits most. Enabling it makes the model keep logits for every token.
+SPECULATIVE = {
+    "mode": None,             # "prompt_lookup" or None (off)
+    "stages": ["synthesis"],  # generate() stages that use drafts
+    "num_pred_tokens": 10,
+    "max_ngram_size": 2,
+}
@@ -1,34 +1,148 @@
-from llama_cpp import Llama
-from config import MODEL_PATH, MODEL_CONFIG
-
-class LLMWrapper:
-    _instance = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
-    
-    def __init__(self):
-        if self._initialized:
-            return
-        
-        print("🔵 Loading model...")
-        self.llm = Llama(model_path=MODEL_PATH, verbose=False, **MODEL_CONFIG)
-        self._initialized = True
-        print("✅ Model ready")
-    
-    def generate(self, prompt: str, max_tokens=256, temperature=0.3, stop=None):
-        """Generate completion"""
-        response = self.llm(
-            prompt,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            stop=stop or [],
-        )
-        return response["choices"][0]["text"].strip()
-
-# Global accessor
-def get_llm():
-    return LLMWrapper()
\ No newline at end of file
+import os
+import threading
+from typing import Optional
+
+from llama_cpp import Llama, StoppingCriteriaList
+from config import MODEL_PATH, MODEL_CONFIG, LLM_SEED, COMPLETION_CACHE, SPECULATIVE
+from core.speculative import TrackedDraft
+from utils.cache import CompletionCache
+
+# Settings that change speed but not output; pool workers override n_threads,
+# so they are left out of the cache key and share entries with this process
+RUNTIME_SETTINGS = {"n_threads", "n_threads_batch"}
+
+
+class Preempted(Exception):
+    """A background generation gave the model up to a foreground call"""
+
+
+class LLMWrapper:
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+    
+    def __init__(self):
+        if self._initialized:
+            return
+        
+        print("🔵 Loading model...")
+        self.draft = None
+        extra = {}
+        if SPECULATIVE["mode"] == "prompt_lookup":
+            from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+            self.draft = TrackedDraft(LlamaPromptLookupDecoding(
+                max_ngram_size=SPECULATIVE["max_ngram_size"],
+                num_pred_tokens=SPECULATIVE["num_pred_tokens"],
+            ))
+            extra["logits_all"] = True  # drafts are verified at every position
+        
+        self.llm = Llama(model_path=MODEL_PATH, verbose=False, **MODEL_CONFIG, **extra)
+        self.lock = threading.Lock()
+        self.foreground = 0  # foreground calls waiting for or holding the lock
+        self._foreground_lock = threading.Lock()
+        self.model_id = self._model_identity()
+        self.cache = None
+        if COMPLETION_CACHE["enabled"]:
+            self.cache = CompletionCache(
+                memory_entries=COMPLETION_CACHE["memory_entries"],
+                disk_dir=COMPLETION_CACHE["disk_dir"],
+                max_disk_bytes=COMPLETION_CACHE["max_disk_mb"] * 1024 * 1024,
+            )
+        self._initialized = True
+        print("✅ Model ready")
+    
+    def _model_identity(self) -> str:
+        """Path + size + mtime + output-affecting settings, so a changed model never hits old entries"""
+        settings = sorted((k, v) for k, v in MODEL_CONFIG.items() if k not in RUNTIME_SETTINGS)
+        try:
+            stat = os.stat(MODEL_PATH)
+            return f"{os.path.abspath(MODEL_PATH)}:{stat.st_size}:{stat.st_mtime_ns}:{settings}"
+        except OSError:
+            return MODEL_PATH
+    
+    def generate(self, prompt: str, max_tokens=256, temperature=0.3, stop=None,
+                 seed: Optional[int] = None, cache: bool = True, stage: str = "default",
+                 background: bool = False):
+        """
+        Generate completion.
+        Deterministic calls (temperature 0 or a seed) are served from the
+        completion cache; cache=False opts a call out, stage names the caller
+        for per-stage hit rates.
+        background=True yields the model to foreground calls: it raises
+        Preempted instead of starting while one is running or waiting, and
+        stops (also raising Preempted) as soon as one arrives.
+        """
+        params = {
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stop": stop or [],
+        }
+        seed = seed if seed is not None else LLM_SEED
+        if seed is not None:
+            params["seed"] = seed
+        
+        deterministic = temperature == 0 or seed is not None
+        key = None
+        if cache and self.cache and deterministic:
+            key = self.cache.make_key(self.model_id, prompt, params)
+            hit = self.cache.get(key, stage)
+            if hit is not None:
+                return hit["text"]
+        
+        # One generation at a time - the context summarizer calls in from a background thread
+        if background:
+            with self.lock:
+                if self.foreground:
+                    raise Preempted(stage)
+                yielded = []
+
+                def foreground_waiting(input_ids, logits) -> bool:
+                    if self.foreground:
+                        yielded.append(True)
+                    return bool(yielded)
+
+                response = self._complete(prompt, params, stage, StoppingCriteriaList([foreground_waiting]))
+                if yielded:
+                    raise Preempted(stage)
+        else:
+            with self._foreground_lock:
+                self.foreground += 1
+            try:
+                with self.lock:
+                    response = self._complete(prompt, params, stage)
+            finally:
+                with self._foreground_lock:
+                    self.foreground -= 1
+        text = response["choices"][0]["text"].strip()
+        
+        if key:
+            self.cache.put(key, {"text": text})
+        return text
+
+    def _complete(self, prompt: str, params: dict, stage: str, stopping_criteria=None):
+        """One llama call (caller holds self.lock)"""
+        speculate = self.draft is not None and stage in SPECULATIVE["stages"]
+        if speculate:
+            self.draft.begin(stage)
+            self.llm.draft_model = self.draft
+        try:
+            return self.llm(prompt, stopping_criteria=stopping_criteria, **params)
+        finally:
+            if speculate:
+                self.llm.draft_model = None
+                self.draft.end()
+
+    def count_tokens(self, text: str) -> int:
+        """Exact token count with the model's tokenizer"""
+        return len(self.llm.tokenize(text.encode("utf-8"), add_bos=False)) if text else 0
+
+    def speculative_stats(self):
+        return self.draft.summary() if self.draft else {}
+
+# Global accessor
+def get_llm():
+    return LLMWrapper()
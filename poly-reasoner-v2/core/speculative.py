@@ -0,0 +1,67 @@
+import time
+from typing import Dict
+
+import numpy as np
+
+
+class TrackedDraft:
+    """
+    Wraps a llama-cpp draft model and counts accepted draft tokens per stage.
+    llama-cpp calls the draft with every confirmed token, so the previous
+    proposal is settled against the tokens appended since.
+    """
+
+    def __init__(self, draft):
+        self.draft = draft
+        self.stage = None
+        self.stats: Dict[str, Dict] = {}
+        self._pending = None
+        self._started = None
+
+    def begin(self, stage: str):
+        self.stage = stage
+        self._pending = None
+        self._started = time.perf_counter()
+        self._stage_stats()["calls"] += 1
+
+    def end(self):
+        # last proposal is cut off by stop/max_tokens, leave it uncounted
+        self._pending = None
+        self._stage_stats()["seconds"] += time.perf_counter() - self._started
+
+    def _stage_stats(self) -> Dict:
+        return self.stats.setdefault(self.stage, {
+            "calls": 0, "steps": 0, "proposed": 0, "accepted": 0, "seconds": 0.0,
+        })
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs) -> np.ndarray:
+        stats = self._stage_stats()
+
+        if self._pending is not None:
+            start, proposal = self._pending
+            accepted = 0
+            for a, b in zip(proposal, input_ids[start:].tolist()):
+                if a != b:
+                    break
+                accepted += 1
+            stats["steps"] += 1
+            stats["proposed"] += len(proposal)
+            stats["accepted"] += accepted
+
+        proposal = self.draft(input_ids, **kwargs)
+        self._pending = (len(input_ids), proposal.tolist())
+        return proposal
+
+    def summary(self) -> Dict:
+        """Per stage: acceptance rate and tokens produced per model pass"""
+        result = {}
+        for stage, s in self.stats.items():
+            tokens = s["steps"] + s["accepted"]
+            result[stage] = {
+                **s,
+                "seconds": round(s["seconds"], 2),
+                "acceptance_rate": round(s["accepted"] / s["proposed"], 3) if s["proposed"] else 0.0,
+                "tokens_per_pass": round(tokens / s["steps"], 2) if s["steps"] else 0.0,
+                "tokens_per_s": round(tokens / s["seconds"], 1) if s["seconds"] else 0.0,
+            }
+        return result
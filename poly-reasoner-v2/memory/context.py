@@ -1,66 +1,270 @@
-from typing import List, Dict, Optional
-from datetime import datetime
-
-class ConversationContext:
-    """Tracks conversation state and history"""
-    
-    def __init__(self):
-        self.history: List[Dict] = []
-        self.current_topic: Optional[str] = None
-        self.current_state: str = "idle"  # idle, active, closing
-        self.last_intent: Optional[str] = None
-    
-    def add_turn(self, user_input: str, ai_response: str, intent: str):
-        """Add conversation turn"""
-        self.history.append({
-            "timestamp": datetime.now().isoformat(),
-            "user": user_input,
-            "ai": ai_response,
-            "intent": intent
-        })
-        self.last_intent = intent
-        
-        # Update state
-        if intent == "chat" and any(word in user_input.lower() for word in ["thanks", "thank", "ok", "got it"]):
-            self.current_state = "closing"
-            self.current_topic = None
-        elif intent == "analyze":
-            self.current_state = "active"
-        elif intent == "chat" and user_input.lower() in ["hi", "hello", "hey"]:
-            if self.current_state == "closing":
-                self.current_state = "idle"  # Reset
-    
-    def get_state_summary(self) -> str:
-        """Get current conversation state as string"""
-        if self.current_state == "idle":
-            return "New conversation, no active topic"
-        elif self.current_state == "active":
-            return f"Active discussion about: {self.current_topic or 'ongoing topic'}"
-        elif self.current_state == "closing":
-            return "User acknowledged response, topic closed"
-        return "Unknown state"
-    
-    def get_recent_context(self, n=3) -> str:
-        """Get last n conversation turns as context"""
-        if not self.history:
-            return "No previous conversation"
-        
-        recent = self.history[-n:]
-        formatted = []
-        for turn in recent:
-            formatted.append(f"User: {turn['user']}")
-            formatted.append(f"AI: {turn['ai'][:100]}...")  # Truncate AI response
-        
-        return "\n".join(formatted)
-    
-    def should_use_perspectives(self) -> bool:
-        """Determine if we should activate perspective agents"""
-        # Don't use perspectives if just closed a topic
-        if self.current_state == "closing":
-            return False
-        
-        # Don't use for simple greetings
-        if self.last_intent == "chat":
-            return False
-        
-        return True
\ No newline at end of file
+import re
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional
+from datetime import datetime
+
+from config import CONVERSATION_CONTEXT
+
+# (summary, turns) -> new summary, or None to retry after the next turn
+Summarizer = Callable[[str, List[Dict]], Optional[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token; used when no tokenizer is passed in"""
+    return (len(text) + 3) // 4
+
+
+def first_sentence(text: str, max_chars: int = 160) -> str:
+    sentence = re.split(r"(?<=[.!?])\s|\n", text.strip(), maxsplit=1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars].rstrip() + "..."
+
+
+def turn_lines(turns: List[Dict]) -> List[str]:
+    return [f"- User: {first_sentence(t['user'])} / AI: {first_sentence(t['ai'])}" for t in turns]
+
+
+def extractive_summary(summary: str, turns: List[Dict]) -> str:
+    """Cheap fallback: previous summary plus the first sentence of each side of each turn"""
+    return "\n".join(([summary] if summary else []) + turn_lines(turns))
+
+
+def llm_summarizer(llm, max_tokens: int = CONVERSATION_CONTEXT["summary_tokens"]) -> Summarizer:
+    """
+    Rolling summary written by the model (runs on the context's background
+    thread). It only uses the model while no turn is being answered: a
+    turn arriving mid-summary stops it, and it is retried once that turn
+    is done.
+    """
+    from core.llm import Preempted
+
+    def summarize(summary: str, turns: List[Dict]) -> Optional[str]:
+        conversation = "\n".join(f"User: {t['user']}\nAI: {t['ai']}" for t in turns)
+        prompt = (
+            "Update the running summary of a conversation with the new turns. Keep the user's goals, "
+            "decisions and open questions; drop pleasantries. Write at most a few short sentences.\n\n"
+            f"Current summary:\n{summary or '(empty)'}\n\nNew turns:\n{conversation}\n\nUpdated summary:"
+        )
+        try:
+            return llm.generate(prompt, max_tokens=max_tokens, temperature=0, stage="summary", background=True)
+        except Preempted:
+            return None
+    return summarize
+
+
+class ConversationContext:
+    """
+    Tracks conversation state and a bounded, token-counted history.
+
+    The last `recent_turns` turns are kept verbatim. Older turns move to a
+    pending queue and are folded into one rolling summary on a background
+    thread, so add_turn never waits on the summarizer. If the summarizer
+    falls behind, turns past `max_pending_tokens` are folded extractively
+    right away - stored text never exceeds the configured token limits.
+    A summarizer that returns None (the model was needed for a turn) leaves
+    the turns pending; they are resubmitted by the next add_turn.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        summarizer: Optional[Summarizer] = None,
+        recent_turns: int = CONVERSATION_CONTEXT["recent_turns"],
+        max_verbatim_tokens: int = CONVERSATION_CONTEXT["max_verbatim_tokens"],
+        max_pending_tokens: int = CONVERSATION_CONTEXT["max_pending_tokens"],
+        summary_tokens: int = CONVERSATION_CONTEXT["summary_tokens"],
+    ):
+        self.history: Deque[Dict] = deque()   # verbatim turns, oldest first
+        self.pending: Deque[Dict] = deque()   # waiting to be summarized
+        self.summary = ""
+        self.summary_token_count = 0
+        self.summarized_turns = 0
+        self.current_topic: Optional[str] = None
+        self.current_state: str = "idle"  # idle, active, closing
+        self.last_intent: Optional[str] = None
+
+        self.count_tokens = count_tokens
+        self.summarizer = summarizer or extractive_summary
+        self.recent_turns = recent_turns
+        self.max_verbatim_tokens = max_verbatim_tokens
+        self.max_pending_tokens = max_pending_tokens
+        self.summary_tokens = summary_tokens
+
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="context-summary")
+        self._in_flight = 0  # pending turns handed to the summarizer
+        self._late_lines: List[str] = []
+        self._future = None
+
+    def add_turn(self, user_input: str, ai_response: str, intent: str):
+        """Add conversation turn"""
+        # A single oversized turn is cut so it can't exceed the verbatim budget on its own
+        user_input = self._truncate(user_input, self.max_verbatim_tokens // 4)
+        user_tokens = self.count_tokens(user_input)
+        stored_ai = self._truncate(ai_response, self.max_verbatim_tokens - user_tokens)
+        turn = {
+            "timestamp": datetime.now().isoformat(),
+            "user": user_input,
+            "ai": stored_ai,
+            "intent": intent,
+            "tokens": user_tokens + self.count_tokens(stored_ai)
+        }
+        with self._lock:
+            self.history.append(turn)
+            self._compact()
+        self.last_intent = intent
+
+        # Update state
+        if intent == "chat" and any(word in user_input.lower() for word in ["thanks", "thank", "ok", "got it"]):
+            self.current_state = "closing"
+            self.current_topic = None
+        elif intent == "analyze":
+            self.current_state = "active"
+        elif intent == "chat" and user_input.lower() in ["hi", "hello", "hey"]:
+            if self.current_state == "closing":
+                self.current_state = "idle"  # Reset
+
+    # -----------------------------
+    # Compaction
+    # -----------------------------
+    def _compact(self):
+        """Move old turns to pending and schedule a summary (caller holds the lock)"""
+        while len(self.history) > 1 and (
+            len(self.history) > self.recent_turns
+            or sum(t["tokens"] for t in self.history) > self.max_verbatim_tokens
+        ):
+            self.pending.append(self.history.popleft())
+
+        # Summarizer behind: fold turns it hasn't picked up yet without it
+        waiting = list(self.pending)[self._in_flight:]
+        if sum(t["tokens"] for t in self.pending) > self.max_pending_tokens and waiting:
+            lines = turn_lines(waiting)
+            if self._in_flight:
+                self._late_lines.extend(lines)  # re-applied on top of the in-flight summary
+            self._set_summary("\n".join([self.summary] + lines))
+            self.summarized_turns += len(waiting)
+            for _ in waiting:
+                self.pending.pop()
+
+        if self.pending and self._in_flight == 0:
+            self._submit()
+
+    def _submit(self):
+        self._in_flight = len(self.pending)
+        self._late_lines = []
+        self._future = self._executor.submit(self._summarize, list(self.pending), self.summary)
+
+    def _summarize(self, turns: List[Dict], summary: str):
+        try:
+            new_summary = self.summarizer(summary, turns)
+        except Exception as e:
+            print(f"[context] summarizer failed ({e}), using extractive summary")
+            new_summary = extractive_summary(summary, turns)
+
+        if new_summary is None:
+            # Postponed - the turns stay pending and are resubmitted by the next add_turn
+            with self._lock:
+                self._in_flight = 0
+            return
+
+        with self._lock:
+            # Turns folded extractively meanwhile are newer than these - keep them after
+            self._set_summary("\n".join([new_summary] + self._late_lines))
+            for _ in turns:
+                self.pending.popleft()
+            self.summarized_turns += len(turns)
+            self._in_flight = 0
+            if self.pending:
+                self._submit()
+
+    def _set_summary(self, text: str):
+        self.summary = self._truncate(text.strip(), self.summary_tokens, keep="end")
+        self.summary_token_count = self.count_tokens(self.summary)
+
+    def _truncate(self, text: str, max_tokens: int, keep: str = "start") -> str:
+        """Cut text to about max_tokens, keeping its start (or end for summaries)"""
+        tokens = self.count_tokens(text)
+        if tokens <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+        chars = int(len(text) * max_tokens / tokens)
+        return text[:chars].rstrip() + "..." if keep == "start" else "..." + text[-chars:].lstrip()
+
+    def wait_idle(self, timeout: Optional[float] = None):
+        """Block until background summarization has caught up"""
+        while True:
+            with self._lock:
+                future = self._future if self._in_flight else None
+            if future is None:
+                return
+            future.result(timeout)
+
+    def get_state_summary(self) -> str:
+        """Get current conversation state as string"""
+        if self.current_state == "idle":
+            return "New conversation, no active topic"
+        elif self.current_state == "active":
+            return f"Active discussion about: {self.current_topic or 'ongoing topic'}"
+        elif self.current_state == "closing":
+            return "User acknowledged response, topic closed"
+        return "Unknown state"
+
+    def get_recent_context(self, max_tokens: int = CONVERSATION_CONTEXT["context_tokens"]) -> str:
+        """
+        Newest turns that fit in max_tokens (the oldest included turn may
+        be cut short), preceded by the rolling summary if room remains
+        """
+        with self._lock:
+            turns = list(self.pending) + list(self.history)
+            summary = self.summary
+        if not turns and not summary:
+            return "No previous conversation"
+
+        budget = max_tokens
+        formatted = []
+        for turn in reversed(turns):
+            user_tokens = self.count_tokens(turn["user"])
+            if turn["tokens"] <= budget:
+                formatted.append(f"User: {turn['user']}\nAI: {turn['ai']}")
+                budget -= turn["tokens"]
+                continue
+            if user_tokens < budget:
+                ai = self._truncate(turn["ai"], budget - user_tokens)
+                formatted.append(f"User: {turn['user']}\nAI: {ai}")
+            budget = 0
+            break
+
+        if summary and budget > 0:
+            formatted.append(f"Earlier in the conversation: {self._truncate(summary, budget)}")
+        return "\n".join(reversed(formatted))
+
+    def stats(self) -> Dict:
+        """Stored turns, tokens and approximate bytes held by this session"""
+        with self._lock:
+            turns = list(self.history) + list(self.pending)
+            size = sys.getsizeof(self.summary) + sum(
+                sys.getsizeof(t) + sum(sys.getsizeof(v) for v in t.values()) for t in turns
+            )
+            return {
+                "verbatim_turns": len(self.history),
+                "pending_turns": len(self.pending),
+                "summarized_turns": self.summarized_turns,
+                "tokens": sum(t["tokens"] for t in turns) + self.summary_token_count,
+                "summary_tokens": self.summary_token_count,
+                "bytes": size
+            }
+
+    def should_use_perspectives(self) -> bool:
+        """Determine if we should activate perspective agents"""
+        # Don't use perspectives if just closed a topic
+        if self.current_state == "closing":
+            return False
+
+        # Don't use for simple greetings
+        if self.last_intent == "chat":
+            return False
+
+        return True
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Run from poly-reasoner-v2: modules import each other by top-level name (config, core.*)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,81 @@
+"""The compiled rule engines (v2 core/rules.py and its v1 copy) against the substring scans they replaced"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from config import DEFAULT_ROUTING_SCORES, DEFAULT_WEIGHTS, ROUTING_RULES, WEIGHT_RULES
+from core.rules import RuleEngine
+
+V1_RULES = Path(__file__).resolve().parents[2] / "poly-reasoner-v1" / "rules.py"
+
+# Example queries from benchmark.py plus word forms the substring scans matched
+PHRASES = [
+    "Should I build a SaaS for freelancers to track invoices?",
+    "Is an LLM firewall for enterprise apps worth building?",
+    "Quick MVP for a budgeting app - what are the security risks?",
+    "What are the long-term growth risks of a marketplace for tutors?",
+    "How much funding do I need for a hardware startup with a small budget?",
+    "Is there a privacy concern with storing customer chat logs?",
+    "Tell me about the history of the printing press",
+    "is this risky",
+    "protect against hackers",
+    "scaling the team",
+    "costly rewrite",
+    "ship it quickly",
+    "pricing for startups",
+    "attacks on our defenses",
+    "MVPs built quickly by SaaS startups",
+]
+
+
+def substring_scan(text, routing_rules, weight_rules, default_scores, default_weights):
+    """How Router.select_agents and Synthesizer.get_dynamic_weights matched before the engine"""
+    text = text.lower()
+    scores = {agent: 0.0 for agent in default_weights}
+    for rule in routing_rules:
+        if any(w in text for w in rule["keywords"]):
+            scores.update(rule["scores"])
+    if max(scores.values()) == 0.0:
+        scores.update(default_scores)
+
+    weights = default_weights
+    for rule in weight_rules:
+        if any(kw in text for kw in rule["keywords"]):
+            weights = rule["weights"]
+            break
+    return scores, weights
+
+
+def load_v1_rules():
+    spec = importlib.util.spec_from_file_location("v1_rules", V1_RULES)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("phrase", PHRASES)
+def test_v2_engine_matches_substring_scan(phrase):
+    result = RuleEngine().match(phrase)
+    expected = substring_scan(phrase, ROUTING_RULES, WEIGHT_RULES, DEFAULT_ROUTING_SCORES, DEFAULT_WEIGHTS)
+    assert (result["scores"], result["weights"]) == expected
+
+
+@pytest.mark.parametrize("phrase", PHRASES)
+def test_v1_engine_matches_substring_scan(phrase):
+    v1 = load_v1_rules()
+    result = v1.RuleEngine().match(phrase)
+    _, weights = substring_scan(phrase, v1.ROUTING_RULES, v1.WEIGHT_RULES,
+                                v1.DEFAULT_ROUTING_SCORES, v1.DEFAULT_WEIGHTS)
+    assert result["weights"] == weights
+
+
+def test_batch_matches_single():
+    engine = RuleEngine()
+    assert engine.match_batch(PHRASES) == [engine.match(phrase) for phrase in PHRASES]
+
+
+@pytest.mark.parametrize("phrase, keyword", [("I know it's late", "now"), ("an android app", "roi")])
+def test_keyword_inside_a_word_does_not_match(phrase, keyword):
+    assert keyword not in RuleEngine().match(phrase)["keywords"]
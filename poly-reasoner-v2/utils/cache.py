@@ -0,0 +1,129 @@
+import copy
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class CompletionCache:
+    """
+    Two-tier cache for deterministic completions:
+    - memory: LRU of the most recent entries
+    - disk: one JSON file per entry, oldest evicted past max_disk_bytes
+
+    The disk tier is safe to share between processes (atomic writes).
+    Values are copied in and out, so callers may mutate what they get.
+    """
+
+    def __init__(
+        self,
+        memory_entries: int = 256,
+        disk_dir: Optional[str] = "cache/completions",
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.memory_entries = memory_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self.stats_by_stage: Dict[str, Dict[str, int]] = {}
+        self.disk_bytes = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.disk_bytes = sum(e.stat().st_size for e in os.scandir(disk_dir) if e.is_file())
+
+    @staticmethod
+    def make_key(model_id: str, prompt: str, params: Dict) -> str:
+        raw = json.dumps([model_id, prompt, params], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, stage: str, field: str):
+        counts = self.stats_by_stage.setdefault(stage, {"memory": 0, "disk": 0, "miss": 0})
+        counts[field] += 1
+
+    def get(self, key: str, stage: str = "default") -> Optional[Dict]:
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self._count(stage, "memory")
+            return copy.deepcopy(self.memory[key])
+
+        if self.disk_dir:
+            path = os.path.join(self.disk_dir, f"{key}.json")
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+                os.utime(path)  # keep recently used entries off the eviction list
+                self._remember(key, value)
+                self._count(stage, "disk")
+                return value
+            except (OSError, ValueError):
+                pass
+
+        self._count(stage, "miss")
+        return None
+
+    def put(self, key: str, value: Dict):
+        self._remember(key, value)
+
+        if not self.disk_dir:
+            return
+
+        path = os.path.join(self.disk_dir, f"{key}.json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        try:
+            replaced = os.path.getsize(path)  # overwriting an entry frees its old file
+        except OSError:
+            replaced = 0
+        self.disk_bytes += os.path.getsize(tmp) - replaced
+        os.replace(tmp, path)
+
+        if self.disk_bytes > self.max_disk_bytes:
+            self._evict_disk()
+
+    def _remember(self, key: str, value: Dict):
+        self.memory[key] = copy.deepcopy(value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Delete least recently used files until 90% of the size budget"""
+        entries = sorted(
+            (e for e in os.scandir(self.disk_dir) if e.is_file()),
+            key=lambda e: e.stat().st_mtime,
+        )
+        total = sum(e.stat().st_size for e in entries)
+        target = self.max_disk_bytes * 0.9
+
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                pass
+        self.disk_bytes = total
+
+    def stats(self) -> Dict:
+        """Hit rates overall and per stage"""
+        def summarize(counts: Dict[str, int]) -> Dict:
+            total = sum(counts.values())
+            hits = counts["memory"] + counts["disk"]
+            return {**counts, "hit_rate": round(hits / total, 3) if total else 0.0}
+
+        overall = {"memory": 0, "disk": 0, "miss": 0}
+        for counts in self.stats_by_stage.values():
+            for field, n in counts.items():
+                overall[field] += n
+
+        return {
+            "overall": summarize(overall),
+            "stages": {stage: summarize(c) for stage, c in self.stats_by_stage.items()},
+            "memory_entries": len(self.memory),
+            "disk_mb": round(self.disk_bytes / 1024 ** 2, 1),
+        }
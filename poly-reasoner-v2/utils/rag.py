@@ -1,20 +1,275 @@
-# rag.py
-
-IDEAS = [
-    {"id": 1, "text": "Prompt injection testing CLI tool", "tag": "security"},
-    {"id": 2, "text": "LLM firewall for enterprise apps", "tag": "security"},
-    {"id": 3, "text": "AI red-team simulation framework", "tag": "security"},
-    {"id": 4, "text": "Startup idea validation tool", "tag": "business"},
-    {"id": 5, "text": "Cost estimation engine for SaaS", "tag": "finance"},
-]
-
-
-def retrieve_ideas(query: str, limit: int = 3):
-    q = query.lower()
-    results = []
-
-    for idea in IDEAS:
-        if any(word in idea["text"].lower() for word in q.split()):
-            results.append(idea)
-
-    return results[:limit]
+# rag.py
+
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+IDEAS = [
+    {"id": 1, "text": "Prompt injection testing CLI tool", "tag": "security"},
+    {"id": 2, "text": "LLM firewall for enterprise apps", "tag": "security"},
+    {"id": 3, "text": "AI red-team simulation framework", "tag": "security"},
+    {"id": 4, "text": "Startup idea validation tool", "tag": "business"},
+    {"id": 5, "text": "Cost estimation engine for SaaS", "tag": "finance"},
+]
+
+# persisted index (sqlite); IDEAS are (re)added on open whenever they change
+INDEX_PATH = "cache/ideas_index.db"
+INDEX_VERSION = 2
+
+# standard BM25 parameters
+K1 = 1.2
+B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "build", "by", "can", "do", "for",
+    "from", "give", "i", "idea", "ideas", "in", "is", "it", "me", "my", "of", "on",
+    "or", "some", "suggest", "that", "the", "this", "to", "we", "what", "with",
+}
+
+
+def tokenize(text: str) -> list:
+    """Shared by indexing and querying: lowercase words, stopwords dropped, plural s stripped"""
+    tokens = []
+    for word in TOKEN_PATTERN.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def idea_terms(idea: dict) -> list:
+    """Indexed terms of an idea: its text plus its tag"""
+    return tokenize(f"{idea['text']} {idea.get('tag', '')}")
+
+
+class BM25Index:
+    """
+    Inverted index (term -> {idea id: term frequency}) scored with BM25.
+    Ideas can be added and removed incrementally; a query only touches
+    the postings of its own terms.
+    """
+
+    def __init__(self, k1: float = K1, b: float = B):
+        self.k1 = k1
+        self.b = b
+        self.docs = {}      # id -> idea
+        self.lengths = {}   # id -> token count
+        self.postings = {}  # term -> {id: tf}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, idea: dict):
+        """Index an idea; an idea with the same id is replaced"""
+        idea_id = idea["id"]
+        if idea_id in self.docs:
+            self.remove(idea_id)
+
+        tokens = idea_terms(idea)
+        self.docs[idea_id] = idea
+        self.lengths[idea_id] = len(tokens)
+        self.total_length += len(tokens)
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, {})[idea_id] = tf
+
+    def remove(self, idea_id) -> bool:
+        idea = self.docs.pop(idea_id, None)
+        if idea is None:
+            return False
+
+        self.total_length -= self.lengths.pop(idea_id)
+        for term in set(idea_terms(idea)):
+            docs = self.postings[term]
+            del docs[idea_id]
+            if not docs:
+                del self.postings[term]
+        return True
+
+    def idf(self, term: str) -> float:
+        n = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.docs) - n + 0.5) / (n + 0.5))
+
+    def search(self, query: str, limit: int = 3) -> list:
+        """[(idea, score)] best first; ideas sharing no term with the query are skipped"""
+        if not self.docs:
+            return []
+
+        # tf saturation term k1 * (1 - b + b * length / avg_length), split out of the loop
+        avg_length = self.total_length / len(self.docs) or 1.0
+        base = self.k1 * (1 - self.b)
+        per_token = self.k1 * self.b / avg_length
+        lengths = self.lengths
+
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            weight = self.idf(term) * (self.k1 + 1)
+            for idea_id, tf in docs.items():
+                scores[idea_id] = scores.get(idea_id, 0.0) + weight * tf / (tf + base + per_token * lengths[idea_id])
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.docs[idea_id], score) for idea_id, score in best]
+
+
+class IndexStore:
+    """
+    The BM25 index on disk (SQLite): ideas with their token counts, and
+    postings keyed (term, id). Adding or removing ideas writes only their
+    own rows, so an index can grow batch by batch without being held in
+    RAM or rewritten. load_index() reads it into a BM25Index for serving.
+    Writes are committed by the caller.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # the app may query and add from different threads; writes are serialized by _lock
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, idea TEXT, length INTEGER)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS postings (term TEXT, id INTEGER, tf INTEGER, PRIMARY KEY (term, id)) "
+            "WITHOUT ROWID"
+        )
+        self._lock = threading.Lock()
+        if self.get_meta("version") != str(INDEX_VERSION):
+            self.db.execute("DELETE FROM docs")
+            self.db.execute("DELETE FROM postings")
+            self.db.execute("DELETE FROM meta")
+            self.set_meta("version", INDEX_VERSION)
+        self.db.commit()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def get_meta(self, name: str):
+        row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value)))
+
+    def add(self, ideas):
+        """Index ideas; an idea with the same id is replaced"""
+        with self._lock:
+            for idea in ideas:
+                self._remove(idea["id"])
+                tokens = idea_terms(idea)
+                self.db.execute("INSERT INTO docs (id, idea, length) VALUES (?, ?, ?)",
+                                (idea["id"], json.dumps(idea), len(tokens)))
+                self.db.executemany("INSERT INTO postings (term, id, tf) VALUES (?, ?, ?)",
+                                    ((term, idea["id"], tf) for term, tf in Counter(tokens).items()))
+
+    def remove(self, idea_ids) -> int:
+        with self._lock:
+            return sum(self._remove(idea_id) for idea_id in idea_ids)
+
+    def _remove(self, idea_id) -> bool:
+        row = self.db.execute("SELECT idea FROM docs WHERE id = ?", (idea_id,)).fetchone()
+        if row is None:
+            return False
+        self.db.execute("DELETE FROM docs WHERE id = ?", (idea_id,))
+        self.db.executemany("DELETE FROM postings WHERE term = ? AND id = ?",
+                            ((term, idea_id) for term in set(idea_terms(json.loads(row[0])))))
+        return True
+
+    def commit(self):
+        with self._lock:
+            self.db.commit()
+
+    def max_id(self) -> int:
+        return self.db.execute("SELECT COALESCE(MAX(id), 0) FROM docs").fetchone()[0]
+
+    def ideas(self):
+        """Every idea in id order, streamed from disk"""
+        for (raw,) in self.db.execute("SELECT idea FROM docs ORDER BY id"):
+            yield json.loads(raw)
+
+    def load_index(self, k1: float = K1, b: float = B) -> BM25Index:
+        index = BM25Index(k1, b)
+        for idea_id, raw, length in self.db.execute("SELECT id, idea, length FROM docs"):
+            index.docs[idea_id] = json.loads(raw)
+            index.lengths[idea_id] = length
+            index.total_length += length
+        rows = self.db.execute("SELECT term, id, tf FROM postings ORDER BY term")
+        for term, group in itertools.groupby(rows, key=lambda row: row[0]):
+            index.postings[term] = {idea_id: tf for _, idea_id, tf in group}
+        return index
+
+    def close(self):
+        self.db.close()
+
+
+_index = None
+_store = None
+
+
+def ideas_seed() -> str:
+    raw = json.dumps(IDEAS, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def get_store():
+    """IndexStore at INDEX_PATH (None without one), with IDEAS (re)added whenever they change"""
+    global _store
+    if _store is None and INDEX_PATH:
+        store = IndexStore(INDEX_PATH)
+        if store.get_meta("seed") != ideas_seed():
+            store.add(IDEAS)
+            store.set_meta("seed", ideas_seed())
+            store.commit()
+        _store = store
+    return _store
+
+
+def get_index() -> BM25Index:
+    """Index loaded from INDEX_PATH, or built from IDEAS without one"""
+    global _index
+    if _index is None:
+        store = get_store()
+        if store is not None:
+            _index = store.load_index()
+        else:
+            _index = BM25Index()
+            for idea in IDEAS:
+                _index.add(idea)
+    return _index
+
+
+def add_ideas(ideas, save: bool = True):
+    ideas = list(ideas)
+    index = get_index()
+    for idea in ideas:
+        index.add(idea)
+    store = get_store()
+    if save and store is not None:
+        store.add(ideas)
+        store.commit()
+
+
+def remove_ideas(idea_ids, save: bool = True) -> int:
+    idea_ids = list(idea_ids)
+    index = get_index()
+    removed = sum(index.remove(idea_id) for idea_id in idea_ids)
+    store = get_store()
+    if save and store is not None:
+        store.remove(idea_ids)
+        store.commit()
+    return removed
+
+
+def retrieve_ideas(query: str, limit: int = 3):
+    return [idea for idea, _ in get_index().search(query, limit)]
@@ -1,118 +1,309 @@
-"""
-Polyreasoner Agents
-Individual perspective execution logic
-"""
-
-import json
-import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from prompts import AGENT_PROMPTS
-
-
-def run_agent(agent_name: str, idea: str, context: str, llm) -> dict:
-    """
-    Run a single agent and return its analysis.
-    Each agent is isolated - sees only the idea and its own prompt.
-    """
-    if agent_name not in AGENT_PROMPTS:
-        return {
-            "agent": agent_name,
-            "error": f"Unknown agent: {agent_name}"
-        }
-    
-    # Build prompt with idea
-    prompt = AGENT_PROMPTS[agent_name] + f"\n\n{idea}"
-    if context:
-        prompt += f"\n\nAdditional context: {context}"
-    
-    try:
-        # Generate response
-        response = llm(
-            prompt,
-            max_tokens=200,  # Shorter for speed
-            temperature=0.7,
-            stop=["</response>", "\n\n\n"]
-        )
-        
-        output_text = response["choices"][0]["text"].strip()
-        
-        # Parse JSON from response
-        result = parse_agent_output(output_text)
-        result["agent"] = agent_name
-        
-        return result
-        
-    except Exception as e:
-        return {
-            "agent": agent_name,
-            "error": str(e),
-            "raw_output": output_text if 'output_text' in dir() else None
-        }
-
-
-def parse_agent_output(text: str) -> dict:
-    """
-    Extract JSON from agent response.
-    Handles cases where model outputs extra text around JSON.
-    """
-    # Try direct JSON parse
-    try:
-        return json.loads(text)
-    except:
-        pass
-    
-    # Try to find JSON in response
-    json_match = re.search(r'\{[\s\S]*\}', text)
-    if json_match:
-        try:
-            return json.loads(json_match.group())
-        except:
-            pass
-    
-    # Fallback: return raw text as result
-    return {
-        "verdict": "unknown",
-        "confidence": 0.5,
-        "raw_output": text,
-        "parse_failed": True
-    }
-
-
-def run_agents_sequential(agent_names: list, idea: str, context: str, llm) -> list:
-    """
-    Run agents sequentially (llama-cpp doesn't support parallel access to same model).
-    Each agent runs in isolation - no shared state.
-    """
-    results = []
-    
-    for name in agent_names:
-        try:
-            result = run_agent(name, idea, context, llm)
-            results.append(result)
-            print(f"  ✓ {name} complete")
-        except Exception as e:
-            results.append({
-                "agent": name,
-                "error": str(e)
-            })
-            print(f"  ✗ {name} failed: {e}")
-    
-    return results
-
-
-def format_agent_outputs(results: list) -> str:
-    """
-    Format agent outputs for synthesis prompt.
-    """
-    formatted = []
-    
-    for result in results:
-        agent = result.get("agent", "unknown")
-        
-        if "error" in result:
-            formatted.append(f"**{agent.upper()}**: Error - {result['error']}")
-        else:
-            # Pretty format the result
-            formatted.append(f"**{agent.upper()}**:\n```json\n{json.dumps(result, indent=2)}\n```")
-    
-    return "\n\n".join(formatted)
+"""
+Polyreasoner Agents
+Individual perspective execution logic
+"""
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import AGENT_EXECUTION, AGENT_GRAMMAR, AGENT_MAX_TOKENS
+from prompts import AGENT_PROMPTS
+from prompt_cache import prime_prefix
+from grammars import get_agent_grammar
+from context_window import count_tokens, prompt_budget, trim_text
+
+# Generation settings shared by every execution mode
+AGENT_TEMPERATURE = 0.7
+AGENT_STOP = ["</response>", "\n\n\n"]
+
+# Decoded tokens and parse failures across agent runs (see agent_stats)
+AGENT_STATS = {"runs": 0, "completion_tokens": 0, "parse_failures": 0}
+
+
+def build_agent_prompt(agent_name: str, idea: str, context: str) -> str:
+    """Agent prompt = static agent instructions + idea (+ router context)"""
+    prompt = AGENT_PROMPTS[agent_name] + f"\n\n{idea}"
+    if context:
+        prompt += f"\n\nAdditional context: {context}"
+    return prompt
+
+
+def fit_agent_inputs(agent_names: list, idea: str, context: str, llm, max_tokens: int) -> tuple[str, str]:
+    """
+    Trim the idea and router context so every agent prompt fits n_ctx with
+    max_tokens of output. The context gives way first (down to a quarter of
+    the room), then the idea keeps its start and end.
+    """
+    prompts = [AGENT_PROMPTS[name] for name in agent_names if name in AGENT_PROMPTS]
+    if not prompts:
+        return idea, context
+    budget = (prompt_budget(llm, max_tokens) - max(count_tokens(llm, p) for p in prompts)
+              - count_tokens(llm, "\n\n\n\nAdditional context: ") - 1)
+    if count_tokens(llm, idea) + (count_tokens(llm, context) if context else 0) <= budget:
+        return idea, context
+    if context:
+        context = trim_text(llm, context, max(budget - count_tokens(llm, idea), budget // 4))
+    idea = trim_text(llm, idea, budget - (count_tokens(llm, context) if context else 0), keep="both")
+    return idea, context
+
+
+def record_agent_run(result: dict, completion_tokens: int):
+    """Count one finished agent generation"""
+    AGENT_STATS["runs"] += 1
+    AGENT_STATS["completion_tokens"] += completion_tokens
+    if result.get("parse_failed"):
+        AGENT_STATS["parse_failures"] += 1
+
+
+def agent_stats() -> dict:
+    """Average decoded tokens and parse-failure rate since the last reset"""
+    runs = AGENT_STATS["runs"]
+    return {
+        **AGENT_STATS,
+        "avg_tokens": round(AGENT_STATS["completion_tokens"] / runs, 1) if runs else 0.0,
+        "parse_failure_rate": round(AGENT_STATS["parse_failures"] / runs, 3) if runs else 0.0
+    }
+
+
+def reset_agent_stats():
+    for key in AGENT_STATS:
+        AGENT_STATS[key] = 0
+
+
+def run_agent(agent_name: str, idea: str, context: str, llm, use_grammar: bool = AGENT_GRAMMAR,
+              max_tokens: int = AGENT_MAX_TOKENS) -> dict:
+    """
+    Run a single agent and return its analysis.
+    Each agent is isolated - sees only the idea and its own prompt.
+    With use_grammar, decoding is constrained to the agent's JSON schema.
+    """
+    if agent_name not in AGENT_PROMPTS:
+        return {
+            "agent": agent_name,
+            "error": f"Unknown agent: {agent_name}"
+        }
+    
+    # Build prompt with idea
+    prompt = build_agent_prompt(agent_name, idea, context)
+    
+    try:
+        # Restore the evaluated agent prompt so only the idea gets prefilled
+        prime_prefix(llm, AGENT_PROMPTS[agent_name])
+        
+        # Generate response
+        response = llm(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=AGENT_TEMPERATURE,
+            stop=AGENT_STOP,
+            grammar=get_agent_grammar(agent_name, max_tokens) if use_grammar else None
+        )
+        
+        output_text = response["choices"][0]["text"].strip()
+        
+        # Parse JSON from response
+        result = parse_agent_output(output_text)
+        result["agent"] = agent_name
+        record_agent_run(result, response["usage"]["completion_tokens"])
+        
+        return result
+        
+    except Exception as e:
+        return {
+            "agent": agent_name,
+            "error": str(e),
+            "raw_output": output_text if 'output_text' in dir() else None
+        }
+
+
+def parse_agent_output(text: str) -> dict:
+    """
+    Extract JSON from agent response.
+    Handles cases where model outputs extra text around JSON.
+    """
+    # Try direct JSON parse
+    try:
+        return json.loads(text)
+    except:
+        pass
+    
+    # Try to find JSON in response
+    json_match = re.search(r'\{[\s\S]*\}', text)
+    if json_match:
+        try:
+            return json.loads(json_match.group())
+        except:
+            pass
+    
+    # Fallback: return raw text as result
+    return {
+        "verdict": "unknown",
+        "confidence": 0.5,
+        "raw_output": text,
+        "parse_failed": True
+    }
+
+
+def run_agents_sequential(agent_names: list, idea: str, context: str, llm,
+                          use_grammar: bool = AGENT_GRAMMAR,
+                          max_tokens: int = AGENT_MAX_TOKENS) -> list:
+    """
+    Run agents sequentially (llama-cpp doesn't support parallel access to same model).
+    Each agent runs in isolation - no shared state.
+    """
+    results = []
+    
+    for name in agent_names:
+        try:
+            result = run_agent(name, idea, context, llm, use_grammar, max_tokens)
+            results.append(result)
+            print(f"  ✓ {name} complete")
+        except Exception as e:
+            results.append({
+                "agent": name,
+                "error": str(e)
+            })
+            print(f"  ✗ {name} failed: {e}")
+    
+    return results
+
+
+def run_agents_batched(agent_names: list, idea: str, context: str, llm,
+                       use_grammar: bool = AGENT_GRAMMAR,
+                       max_tokens: int = AGENT_MAX_TOKENS) -> list:
+    """
+    Decode all agents as parallel sequences in one llama context, so each
+    decode step shares a single pass over the weights.
+    Falls back to run_agents_sequential when batching isn't possible.
+    Agents are matched to outputs by position, so an agent listed twice
+    decodes twice.
+    """
+    known = [name for name in agent_names if name in AGENT_PROMPTS]
+    if len(known) < 2:
+        return run_agents_sequential(agent_names, idea, context, llm, use_grammar, max_tokens)
+    
+    try:
+        from batch_decode import decode_parallel
+        
+        outputs = decode_parallel(
+            llm,
+            prompts=[build_agent_prompt(name, idea, context) for name in known],
+            prefixes=[AGENT_PROMPTS[name] for name in known],
+            max_tokens=max_tokens,
+            temperature=AGENT_TEMPERATURE,
+            stop=AGENT_STOP,
+            grammars=[get_agent_grammar(name, max_tokens) for name in known] if use_grammar else None
+        )
+    except Exception as e:
+        print(f"  Batched decoding unavailable ({e}), running sequentially")
+        return run_agents_sequential(agent_names, idea, context, llm, use_grammar, max_tokens)
+    
+    outputs = iter(outputs)
+    results = []
+    
+    for name in agent_names:
+        if name not in AGENT_PROMPTS:
+            results.append({"agent": name, "error": f"Unknown agent: {name}"})
+            continue
+        
+        output = next(outputs)
+        result = parse_agent_output(output["text"].strip())
+        result["agent"] = name
+        record_agent_run(result, output["completion_tokens"])
+        results.append(result)
+        print(f"  ✓ {name} complete ({output['completion_tokens']} tokens, "
+              f"{output['tokens_per_s']} tok/s, prefilled {output['prefilled_tokens']}/"
+              f"{output['prompt_tokens']}, done at {output['total_s']}s)")
+    
+    return results
+
+
+def run_agents(agent_names: list, idea: str, context: str, llm,
+               use_grammar: bool = AGENT_GRAMMAR,
+               max_tokens: int = AGENT_MAX_TOKENS) -> list:
+    """Run agents with the execution mode selected in config.AGENT_EXECUTION"""
+    idea, context = fit_agent_inputs(agent_names, idea, context, llm, max_tokens)
+    if AGENT_EXECUTION == "batched":
+        return run_agents_batched(agent_names, idea, context, llm, use_grammar, max_tokens)
+    return run_agents_sequential(agent_names, idea, context, llm, use_grammar, max_tokens)
+
+
+def run_agents_many(tasks: list, llm, use_grammar: bool = AGENT_GRAMMAR,
+                    max_tokens: int = AGENT_MAX_TOKENS, max_sequences: int = 6) -> list:
+    """
+    Run the agents of several ideas, tasks = [(agent_names, idea, context)],
+    returning one result list per task. With batched execution the agent
+    prompts of different ideas share decode_parallel calls of up to
+    max_sequences sequences; a task whose call fails runs sequentially.
+    Agents are matched to outputs by position, so an agent listed twice
+    runs twice, as in run_agents.
+    """
+    if AGENT_EXECUTION != "batched":
+        return [run_agents(names, idea, context, llm, use_grammar, max_tokens) for names, idea, context in tasks]
+    
+    from batch_decode import decode_parallel
+    
+    inputs = []     # (idea, context) per task, trimmed to fit the context window
+    sequences = []  # ((task index, agent position), agent name, prompt)
+    for t, (names, idea, context) in enumerate(tasks):
+        idea, context = fit_agent_inputs(names, idea, context, llm, max_tokens)
+        inputs.append((idea, context))
+        sequences += [((t, i), name, build_agent_prompt(name, idea, context))
+                      for i, name in enumerate(names) if name in AGENT_PROMPTS]
+    
+    outputs = {}
+    failed = set()
+    for start in range(0, len(sequences), max_sequences):
+        group = sequences[start:start + max_sequences]
+        try:
+            decoded = decode_parallel(
+                llm,
+                prompts=[prompt for _, _, prompt in group],
+                prefixes=[AGENT_PROMPTS[name] for _, name, _ in group],
+                max_tokens=max_tokens,
+                temperature=AGENT_TEMPERATURE,
+                stop=AGENT_STOP,
+                grammars=[get_agent_grammar(name, max_tokens) for _, name, _ in group] if use_grammar else None
+            )
+        except Exception as e:
+            print(f"  Batched decoding unavailable ({e}), running those ideas sequentially")
+            failed.update(t for (t, _), _, _ in group)
+            continue
+        outputs.update({key: output for (key, _, _), output in zip(group, decoded)})
+    
+    results = []
+    for t, (names, _, _) in enumerate(tasks):
+        if t in failed:
+            idea, context = inputs[t]
+            results.append(run_agents_sequential(names, idea, context, llm, use_grammar, max_tokens))
+            continue
+        rows = []
+        for i, name in enumerate(names):
+            if (t, i) not in outputs:
+                rows.append({"agent": name, "error": f"Unknown agent: {name}"})
+                continue
+            output = outputs[(t, i)]
+            result = parse_agent_output(output["text"].strip())
+            result["agent"] = name
+            record_agent_run(result, output["completion_tokens"])
+            rows.append(result)
+        results.append(rows)
+    return results
+
+
+def format_agent_outputs(results: list) -> str:
+    """
+    Format agent outputs for synthesis prompt.
+    """
+    formatted = []
+    
+    for result in results:
+        agent = result.get("agent", "unknown")
+        
+        if "error" in result:
+            formatted.append(f"**{agent.upper()}**: Error - {result['error']}")
+        else:
+            # Pretty format the result
+            formatted.append(f"**{agent.upper()}**:\n```json\n{json.dumps(result, indent=2)}\n```")
+    
+    return "\n\n".join(formatted)
@@ -0,0 +1,324 @@
+"""
+Polyreasoner HTTP API
+asyncio JSON service for chat and evaluations, with a bounded request queue
+
+Usage:
+    python api.py                     # v3 (this directory)
+    python api.py --backend v2        # ../poly-reasoner-v2
+
+Endpoints:
+    POST /chat      {"message", "session_id"?, "budget_s"?}
+    POST /evaluate  {"idea", "agents"?, "session_id"?, "budget_s"?}
+    GET  /health    queue depth and counters
+
+A chat without session_id starts a new conversation; continue it with
+the session_id in the reply. An evaluation without one is one-off.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Defaults live here, not in config.py: the v2 backend imports its own config
+HOST = "127.0.0.1"
+PORT = 8000
+MAX_QUEUE = 16            # Requests waiting for the model; more get 429
+MAX_BODY_BYTES = 1024 ** 2
+RETRY_AFTER_S = 5
+LATENCY_WINDOW = 200      # Recent requests kept for the latency percentiles
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _text(body: dict, key: str) -> str:
+    value = body.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise HTTPError(400, f'"{key}" must be a non-empty string')
+    return value.strip()
+
+
+def _budget(body: dict) -> float | None:
+    value = body.get("budget_s")
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+        raise HTTPError(400, '"budget_s" must be a positive number of seconds or null')
+    return float(value)
+
+
+def _session(body: dict) -> str | None:
+    value = body.get("session_id")
+    if value is None:
+        return None
+    if not isinstance(value, str) or not value.strip():
+        raise HTTPError(400, '"session_id" must be a non-empty string')
+    return value.strip()
+
+
+def chat_request(body: dict) -> dict:
+    return {"message": _text(body, "message"), "budget_s": _budget(body), "session_id": _session(body)}
+
+
+def evaluate_request(body: dict) -> dict:
+    agents = body.get("agents") or []
+    if not isinstance(agents, list) or not all(isinstance(a, str) for a in agents):
+        raise HTTPError(400, '"agents" must be a list of agent names')
+    return {"idea": _text(body, "idea"), "agents": agents, "budget_s": _budget(body),
+            "session_id": _session(body)}
+
+
+class V3Backend:
+    """Polyreasoner (this directory) - chats keep a conversation per session_id"""
+
+    name = "v3"
+
+    def __init__(self):
+        from config import SESSIONS
+        from main import Polyreasoner
+
+        self.reasoner = Polyreasoner(session_db=SESSIONS["db_path"])
+
+    def load(self):
+        self.reasoner.load_router()
+
+    def chat(self, request: dict) -> dict:
+        session_id = request["session_id"] or f"api-{uuid.uuid4().hex}"
+        result = self.reasoner.evaluate(request["message"], request["budget_s"], session_id)
+        return {**result, "session_id": session_id}
+
+    def evaluate(self, request: dict) -> dict:
+        idea, budget_s, agents = request["idea"], request["budget_s"], request["agents"]
+        if request["session_id"] is not None:
+            return self.reasoner.evaluate(idea, budget_s, request["session_id"], agents=agents)
+
+        # One-off: don't keep a conversation nobody can continue
+        session_id = f"api-{uuid.uuid4().hex}"
+        try:
+            return self.reasoner.evaluate(idea, budget_s, session_id, agents=agents)
+        finally:
+            self.reasoner.clear_session(session_id)
+
+
+class V2Backend:
+    """PolyReasoner from ../poly-reasoner-v2 (one shared conversation, session_id is ignored)"""
+
+    name = "v2"
+
+    def __init__(self):
+        root = Path(__file__).resolve().parent.parent / "poly-reasoner-v2"
+        # v2's config/main shadow this directory's modules of the same name
+        sys.path.insert(0, str(root))
+        from main import PolyReasoner
+
+        self.reasoner = PolyReasoner()
+
+    def load(self):
+        pass  # the model is loaded by the constructor
+
+    def chat(self, request: dict) -> dict:
+        # budget_s is validated for the same API, but v2 has no latency planner
+        return self.reasoner.evaluate(request["message"])
+
+    def evaluate(self, request: dict) -> dict:
+        return self.reasoner.evaluate(request["idea"], analyze=True)
+
+
+BACKENDS = {"v3": V3Backend, "v2": V2Backend}
+
+
+class EvaluationServer:
+    """
+    Minimal HTTP/1.1 server on asyncio streams (one request per connection).
+
+    Requests are parsed and validated on the event loop (a bad body gets
+    its 400 without taking a queue slot) and queued; a single worker runs
+    them one at a time on a dedicated thread, since a llama model can't
+    serve two generations at once. At most `max_queue` requests wait - the
+    rest are answered 429 with Retry-After right away, so clients back off
+    instead of piling up on an unbounded backlog.
+    """
+
+    def __init__(self, backend, max_queue: int = MAX_QUEUE):
+        self.backend = backend
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llama")
+        self.queue = None  # created on the server's loop
+        self.busy = False
+        self.counts = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        # (method, path) -> (body validator, backend call)
+        self.routes = {("POST", "/chat"): (chat_request, backend.chat),
+                       ("POST", "/evaluate"): (evaluate_request, backend.evaluate)}
+
+    async def serve(self, host: str, port: int):
+        self.queue = asyncio.Queue(self.max_queue)
+        worker = asyncio.create_task(self._worker())
+        server = await asyncio.start_server(self._handle, host, port)
+        print(f"[api] {self.backend.name} backend on http://{host}:{port} (queue {self.max_queue})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            worker.cancel()
+            self.executor.shutdown(wait=False)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            fn, request, future, enqueued = await self.queue.get()
+            if future.cancelled():
+                continue
+            started = time.perf_counter()
+            self.busy = True
+            try:
+                result = await loop.run_in_executor(self.executor, fn, request)
+                if not future.cancelled():
+                    future.set_result((result, started - enqueued, time.perf_counter() - started))
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self.busy = False
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        start = time.perf_counter()
+        try:
+            method, path, body = await self._read_request(reader)
+            status, payload, headers = await self._dispatch(method, path, body, start)
+        except HTTPError as e:
+            status, payload, headers = e.status, {"error": str(e)}, {}
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            print(f"[api] request failed: {e}")
+            status, payload, headers = 500, {"error": str(e)}, {}
+
+        data = json.dumps(payload).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(data)}",
+                "Connection: close"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        try:
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, dict | None]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise HTTPError(400, "malformed request line")
+        method, path, _ = request_line
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length")
+        if length < 0:
+            raise HTTPError(400, "bad Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"body over {MAX_BODY_BYTES} bytes")
+        if not length:
+            return method, path.split("?")[0], None
+        try:
+            body = json.loads(await reader.readexactly(length))
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        return method, path.split("?")[0], body
+
+    async def _dispatch(self, method: str, path: str, body: dict | None, start: float):
+        if (method, path) == ("GET", "/health"):
+            return 200, self.stats(), {}
+        route = self.routes.get((method, path))
+        if route is None:
+            known = {p for _, p in self.routes} | {"/health"}
+            raise HTTPError(405 if path in known else 404, f"{method} {path} not supported")
+        validate, fn = route
+        request = validate(body or {})
+
+        if self.queue.full():
+            self.counts["rejected"] += 1
+            return 429, {"error": "queue full, retry later", "queued": self.queue.qsize()}, {
+                "Retry-After": RETRY_AFTER_S}
+
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((fn, request, future, time.perf_counter()))
+        self.counts["accepted"] += 1
+        try:
+            result, queue_s, service_s = await future
+        except Exception as e:
+            self.counts["failed"] += 1
+            print(f"[api] {path} failed: {e}")
+            return 500, {"error": str(e)}, {}
+
+        self.counts["completed"] += 1
+        total = time.perf_counter() - start
+        self.latencies.append(total)
+        return 200, {**result, "backend": self.backend.name, "queue_s": round(queue_s, 3),
+                     "service_s": round(service_s, 3), "latency_s": round(total, 3)}, {}
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+
+        return {
+            "backend": self.backend.name,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "max_queue": self.max_queue,
+            "busy": self.busy,
+            **self.counts,
+            "p50_s": percentile(0.5),
+            "p95_s": percentile(0.95)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Polyreasoner HTTP API")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="v3")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE)
+    args = parser.parse_args()
+
+    backend = BACKENDS[args.backend]()
+    start = time.perf_counter()
+    backend.load()
+    print(f"[api] model ready in {time.perf_counter() - start:.1f}s")
+    try:
+        asyncio.run(EvaluationServer(backend, args.max_queue).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n[api] stopped")
+
+
+if __name__ == "__main__":
+    main()
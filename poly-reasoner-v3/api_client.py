@@ -0,0 +1,126 @@
+"""
+Polyreasoner API Client
+Calls a running api.py and measures latency at several concurrency levels
+
+Usage:
+    python api_client.py chat "What is Python used for?"
+    python api_client.py evaluate "AI-powered code review tool" --agents business risk
+    python api_client.py bench --concurrency 1 2 4 8 --requests 16
+"""
+
+import argparse
+import http.client
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HOST = "127.0.0.1"
+PORT = 8000
+TIMEOUT_S = 600
+
+BENCH_IDEAS = [
+    "Should I build a SaaS for freelancers to track invoices and expenses?",
+    "Evaluate: AI-powered code review tool for small engineering teams",
+    "What could go wrong with moving our monolith to microservices next quarter?",
+    "Should we open source our internal feature-flag service?"
+]
+
+
+def request(method: str, path: str, payload: dict | None = None,
+            host: str = HOST, port: int = PORT, timeout: float = TIMEOUT_S) -> tuple[int, dict, float]:
+    """Return (status, JSON body, seconds)"""
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        conn.request(method, path, body, {"Content-Type": "application/json"} if body else {})
+        response = conn.getresponse()
+        data = json.loads(response.read() or b"{}")
+        return response.status, data, time.perf_counter() - start
+    finally:
+        conn.close()
+
+
+def bench(path: str, concurrency_levels: list, requests: int, host: str, port: int) -> dict:
+    """
+    Send `requests` requests at each concurrency level (one client thread
+    per concurrent request) and report latency of the 200s, 429 rejections
+    and throughput.
+    """
+    result = {}
+    for level in concurrency_levels:
+        def one(i: int):
+            idea = BENCH_IDEAS[i % len(BENCH_IDEAS)]
+            key = "idea" if path == "/evaluate" else "message"
+            try:
+                return request("POST", path, {key: idea, "session_id": f"bench-{level}-{i}"}, host, port)
+            except OSError as e:
+                return 0, {"error": str(e)}, 0.0
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            responses = list(pool.map(one, range(requests)))
+        wall = time.perf_counter() - start
+
+        ok = sorted(seconds for status, _, seconds in responses if status == 200)
+        queue = [body["queue_s"] for status, body, _ in responses if status == 200]
+        row = {
+            "ok": len(ok),
+            "rejected_429": sum(1 for status, _, _ in responses if status == 429),
+            "errors": sum(1 for status, _, _ in responses if status not in (200, 429)),
+            "p50_s": round(ok[len(ok) // 2], 2) if ok else None,
+            "p95_s": round(ok[min(len(ok) - 1, int(0.95 * len(ok)))], 2) if ok else None,
+            "max_s": round(ok[-1], 2) if ok else None,
+            "avg_queue_s": round(sum(queue) / len(queue), 2) if queue else None,
+            "throughput_rps": round(len(ok) / wall, 3)
+        }
+        result[level] = row
+        print(f"  concurrency {level:>3}: ok={row['ok']} 429={row['rejected_429']} errors={row['errors']}  "
+              f"p50={row['p50_s']}s p95={row['p95_s']}s max={row['max_s']}s  "
+              f"queue={row['avg_queue_s']}s  {row['throughput_rps']} req/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Polyreasoner API client")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    chat = sub.add_parser("chat", help="POST /chat")
+    chat.add_argument("message")
+    chat.add_argument("--session", default="cli")
+
+    evaluate = sub.add_parser("evaluate", help="POST /evaluate")
+    evaluate.add_argument("idea")
+    evaluate.add_argument("--agents", nargs="*", default=[])
+
+    sub.add_parser("health", help="GET /health")
+
+    bench_cmd = sub.add_parser("bench", help="latency + 429s at several concurrency levels")
+    bench_cmd.add_argument("--path", choices=["/chat", "/evaluate"], default="/evaluate")
+    bench_cmd.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    bench_cmd.add_argument("--requests", type=int, default=16, help="requests per concurrency level")
+
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        print(f"\n--- api {args.path} ---")
+        bench(args.path, args.concurrency, args.requests, args.host, args.port)
+        print(f"  server: {request('GET', '/health', host=args.host, port=args.port)[1]}")
+        return
+
+    if args.command == "chat":
+        status, body, seconds = request("POST", "/chat", {"message": args.message, "session_id": args.session},
+                                        args.host, args.port)
+    elif args.command == "evaluate":
+        status, body, seconds = request("POST", "/evaluate", {"idea": args.idea, "agents": args.agents},
+                                        args.host, args.port)
+    else:
+        status, body, seconds = request("GET", "/health", host=args.host, port=args.port)
+    print(f"{status} in {seconds:.2f}s")
+    print(json.dumps(body, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Polyreasoner Batch Evaluation
+Evaluates a JSONL backlog of ideas, streaming results to JSONL, resumable
+
+Usage:
+    python batch.py ideas.jsonl results.jsonl
+    python batch.py ideas.jsonl results.jsonl --mode auto --chunk 16
+
+Input lines: {"idea" (or "text"), "id"?, "agents"?, "context"?}
+Output lines: {"line", "id", "idea", "mode", "response", "agents", ...}
+"""
+
+import argparse
+import json
+import os
+import time
+
+from agents import AGENT_STATS, run_agents_many
+from config import DEFAULT_AGENTS, AVAILABLE_AGENTS, MAX_AGENTS
+from main import Polyreasoner
+from planner import get_planner, STAGE_MAX_TOKENS
+from prompt_cache import get_prefix_cache
+
+CHUNK_SIZE = 8
+# Agent sequences decoded together (across ideas) per batched call
+MAX_SEQUENCES = 6
+
+
+def read_ideas(path: str):
+    """(line number, record or None) per non-blank input line"""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield number, record if isinstance(record, dict) else None
+
+
+def completed_lines(path: str) -> set:
+    """
+    Input lines already in the output file. A line cut short by a crash is
+    removed, so the idea it belonged to is evaluated again.
+    """
+    if not os.path.exists(path):
+        return set()
+
+    done = set()
+    with open(path, "rb+") as f:
+        good_bytes = 0
+        for raw in f:
+            try:
+                done.add(json.loads(raw)["line"])
+            except (ValueError, KeyError, TypeError):
+                break
+            good_bytes += len(raw)
+        if good_bytes < f.seek(0, os.SEEK_END):
+            print(f"[batch] dropping a partial record at the end of {path}")
+            f.truncate(good_bytes)
+    return done
+
+
+def format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m" if seconds >= 3600 else f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+class BatchEvaluator:
+    """
+    Runs ideas through routing, agents and synthesis chunk by chunk, one
+    stage at a time: each model is used for a whole chunk before the next
+    one (no router/agent model swap per idea when they differ), and agent
+    prompts of different ideas share batched decodes. Prompt snapshots and
+    the cascade router apply as in interactive use.
+
+    Every finished idea is appended to the output file and fsynced per
+    chunk; the output doubles as the checkpoint, so a rerun skips ideas
+    already written.
+    """
+
+    def __init__(self, reasoner: Polyreasoner, mode: str = "evaluate", chunk_size: int = CHUNK_SIZE,
+                 max_sequences: int = MAX_SEQUENCES):
+        self.reasoner = reasoner
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.max_sequences = max_sequences
+        # Ideas are independent - there's no conversation to continue
+        self.reasoner.continuation = None
+        self.max_tokens = get_planner().plan(None)["max_tokens"]
+        self.counts = {"done": 0, "polymode": 0, "chat": 0, "errors": 0}
+
+    def run(self, input_path: str, output_path: str):
+        done = completed_lines(output_path)
+        total = sum(1 for number, _ in read_ideas(input_path) if number not in done)
+        print(f"[batch] {total} ideas to evaluate ({len(done)} already in {output_path})")
+
+        self.started = time.perf_counter()
+        with open(output_path, "a", encoding="utf-8") as out:
+            chunk = []
+            for number, record in read_ideas(input_path):
+                if number in done:
+                    continue
+                chunk.append(self._job(number, record))
+                if len(chunk) >= self.chunk_size:
+                    self._run_chunk(chunk, out, total)
+                    chunk = []
+            if chunk:
+                self._run_chunk(chunk, out, total)
+
+        print(f"[batch] finished {self.counts['done']} ideas in {format_eta(time.perf_counter() - self.started)} "
+              f"({self.counts['polymode']} polymode, {self.counts['chat']} chat, {self.counts['errors']} errors)")
+
+    @staticmethod
+    def _job(number: int, record: dict | None) -> dict:
+        job = {"line": number, "id": None, "idea": "", "mode": None, "response": "", "agents": [],
+               "routed_by": None, "timings": {}}
+        idea = (record or {}).get("idea") or (record or {}).get("text")
+        if not isinstance(idea, str) or not idea.strip():
+            job["error"] = "no idea/text in input line"
+            return job
+        job.update(id=record.get("id"), idea=idea.strip(), context=record.get("context") or "",
+                   requested=record.get("agents") or [])
+        if not isinstance(job["requested"], list) or not all(isinstance(a, str) for a in job["requested"]):
+            job["error"] = '"agents" must be a list of agent names'
+        elif not isinstance(job["context"], str):
+            job["error"] = '"context" must be a string'
+        return job
+
+    def _run_chunk(self, chunk: list, out, total: int):
+        chunk_start = time.perf_counter()
+        jobs = [job for job in chunk if "error" not in job]
+
+        # 1. Routing (router model)
+        for job in jobs:
+            self._guard(job, self._route)
+
+        # 2. Agents for every polymode idea of the chunk (agent model)
+        poly = [job for job in jobs if job["mode"] == "polymode" and "error" not in job]
+        if poly:
+            start = time.perf_counter()
+            tokens_before = AGENT_STATS["completion_tokens"]
+            try:
+                results = run_agents_many(
+                    [(job["agent_names"], job["idea"], job["context"]) for job in poly],
+                    self.reasoner.load_agents(),
+                    max_tokens=self.max_tokens["agents"],
+                    max_sequences=self.max_sequences
+                )
+                for job, rows in zip(poly, results):
+                    job["agents"] = rows
+            except Exception as e:
+                for job in poly:
+                    job["error"] = f"agents failed: {e}"
+            elapsed = time.perf_counter() - start
+            get_planner().record("agents", AGENT_STATS["completion_tokens"] - tokens_before, elapsed,
+                                 outputs=sum(len(job["agents"]) for job in poly))
+            for job in poly:
+                job["timings"]["agents_batch_s"] = round(elapsed, 2)
+
+        # 3. Synthesis (router model), each idea written as soon as it's done
+        for job in chunk:
+            if job["mode"] == "polymode" and "error" not in job:
+                self._guard(job, self._synthesize)
+            self._write(job, out)
+        out.flush()
+        os.fsync(out.fileno())
+
+        elapsed = time.perf_counter() - self.started
+        rate = self.counts["done"] / elapsed
+        remaining = (total - self.counts["done"]) / rate if rate else 0.0
+        cache = get_prefix_cache().stats()
+        print(f"[batch] {self.counts['done']}/{total} ideas  chunk {time.perf_counter() - chunk_start:.1f}s  "
+              f"{rate * 60:.1f} ideas/min  ETA {format_eta(remaining)}  "
+              f"(prefix cache {cache['hit_rate']:.0%} hits)")
+
+    @staticmethod
+    def _guard(job: dict, stage):
+        try:
+            stage(job)
+        except Exception as e:
+            job["error"] = f"{stage.__name__.strip('_')} failed: {e}"
+
+    def _route(self, job: dict):
+        start = time.perf_counter()
+        reasoner = self.reasoner
+        names = None
+        if self.mode == "evaluate" or job["requested"]:
+            requested = [a for a in job["requested"] if a in AVAILABLE_AGENTS] or DEFAULT_AGENTS
+            names, job["routed_by"] = requested[:MAX_AGENTS], "request"
+        else:
+            route = reasoner.cascade.classify(job["idea"]) if reasoner.cascade is not None else None
+            if route and route["route"] in ("greeting", "polymode") and route["confidence"] >= reasoner.cascade.threshold:
+                job["routed_by"] = "cascade"
+                if route["route"] == "greeting":
+                    job["response"] = reasoner.cascade.reply(job["idea"])
+                else:
+                    names = route["agents"]
+            else:
+                job["routed_by"] = "llm"
+                session_id = f"batch-{job['line']}"
+                router = reasoner._route_with_llm(job["idea"], session_id)
+                try:
+                    while True:
+                        next(router)
+                except StopIteration as finished:
+                    output = finished.value[0]
+                reasoner.clear_session(session_id)
+                config = reasoner.detect_polymode(output)
+                if config:
+                    names = config["agents"]
+                    job["context"] = config.get("context", "") or job["context"]
+                else:
+                    job["response"] = output
+
+        job["mode"] = "polymode" if names else "chat"
+        job["agent_names"] = names or []
+        job["timings"]["route_s"] = round(time.perf_counter() - start, 2)
+
+    def _synthesize(self, job: dict):
+        start = time.perf_counter()
+        job["response"] = self.reasoner.synthesize(job["agents"], job["idea"], self.max_tokens["synthesis"])
+        job["timings"]["synthesis_s"] = round(time.perf_counter() - start, 2)
+
+    def _write(self, job: dict, out):
+        record = {k: job[k] for k in ("line", "id", "idea", "mode", "response", "agents", "routed_by", "timings")}
+        if "error" in job:
+            record["error"] = job["error"]
+            self.counts["errors"] += 1
+        elif job["mode"]:
+            self.counts[job["mode"]] += 1
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.counts["done"] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a JSONL file of ideas (resumable)")
+    parser.add_argument("input", help='.jsonl with "idea" or "text" per line (optional "id", "agents", "context")')
+    parser.add_argument("output", help=".jsonl results, appended to; rerun the same command to resume")
+    parser.add_argument("--mode", choices=["evaluate", "auto"], default="evaluate",
+                        help="evaluate: always run the agents; auto: route like the chat (may answer directly)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="ideas per routing/agents/synthesis round")
+    parser.add_argument("--max-sequences", type=int, default=MAX_SEQUENCES,
+                        help="agent sequences per batched decode")
+    args = parser.parse_args()
+
+    reasoner = Polyreasoner()
+    BatchEvaluator(reasoner, args.mode, args.chunk, args.max_sequences).run(args.input, args.output)
+
+
+if __name__ == "__main__":
+    main()
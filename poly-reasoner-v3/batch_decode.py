@@ -0,0 +1,275 @@
+"""
+Polyreasoner Batched Decoding
+Decodes several prompts as parallel sequences in one llama context
+"""
+
+import ctypes
+import time
+
+import numpy as np
+import llama_cpp
+from llama_cpp._internals import LlamaBatch, LlamaContext, LlamaSampler
+
+from prompt_cache import prime_prefix
+
+
+def _add_token(batch: LlamaBatch, token: int, pos: int, seq_id: int, logits: bool) -> int:
+    """Append one token to a batch, returns its index in the batch"""
+    b = batch.batch
+    i = b.n_tokens
+    b.token[i] = token
+    b.pos[i] = pos
+    b.n_seq_id[i] = 1
+    b.seq_id[i][0] = seq_id
+    b.logits[i] = logits
+    b.n_tokens += 1
+    return i
+
+
+def _sample(logits: np.ndarray, temperature: float, top_k: int, top_p: float, rng) -> int:
+    """Temperature + top-k + top-p sampling on raw logits"""
+    if temperature <= 0:
+        return int(np.argmax(logits))
+
+    top_k = min(top_k, len(logits))
+    candidates = np.argpartition(logits, -top_k)[-top_k:]
+    scaled = logits[candidates].astype(np.float64) / temperature
+
+    probs = np.exp(scaled - scaled.max())
+    probs /= probs.sum()
+
+    order = np.argsort(-probs)
+    candidates, probs = candidates[order], probs[order]
+    keep = (np.cumsum(probs) - probs) < top_p
+    probs = probs[keep] / probs[keep].sum()
+
+    return int(rng.choice(candidates[keep], p=probs))
+
+
+def _grammar_sampler(llm, grammar, temperature: float, top_k: int, top_p: float, seed: int):
+    """Native sampler chain for one sequence, with the grammar applied first"""
+    sampler = LlamaSampler()
+    sampler.add_grammar(llm._model, grammar)
+    if temperature <= 0:
+        sampler.add_greedy()
+    else:
+        sampler.add_top_k(top_k)
+        sampler.add_top_p(top_p, 1)
+        sampler.add_temp(temperature)
+        sampler.add_dist(seed)
+    return sampler
+
+
+def _release_batch_context(llm):
+    cached = getattr(llm, "_batch_context", None)
+    if cached is not None:
+        cached["batch"].close()
+        cached["ctx"].close()
+        llm._batch_context = None
+
+
+def _batch_context(llm, n_seq: int, slot: int) -> dict:
+    """
+    The model's batch context and batch, kept between calls instead of
+    allocating a new KV cache per call. Reused (cleared) while it holds at
+    least n_seq sequences of `slot` tokens, otherwise replaced by one big
+    enough for both shapes, so it settles at the largest shape in use.
+    Its KV cache stays allocated while the model is loaded; it is freed
+    before the model when the model is closed (e.g. evicted).
+    """
+    cached = getattr(llm, "_batch_context", None)
+    if cached is not None:
+        if cached["n_seq"] >= n_seq and cached["slot"] >= slot:
+            cached["ctx"].kv_cache_clear()
+            return cached
+        n_seq, slot = max(n_seq, cached["n_seq"]), max(slot, cached["slot"])
+        _release_batch_context(llm)
+    else:
+        # Closed with the Llama - its exit stack frees the model after this
+        llm._stack.callback(_release_batch_context, llm)
+
+    params = llama_cpp.llama_context_params.from_buffer_copy(llm.context_params)
+    # Non-unified KV caches split n_ctx evenly between sequences
+    params.n_ctx = n_seq * slot
+    params.n_seq_max = n_seq
+    if hasattr(llama_cpp.llama_context_params, "logits_all"):
+        params.logits_all = False
+
+    ctx = LlamaContext(model=llm._model, params=params, verbose=False)
+    batch = LlamaBatch(n_tokens=max(llm.n_batch, n_seq), embd=0, n_seq_max=n_seq, verbose=False)
+    llm._batch_context = {"ctx": ctx, "batch": batch, "n_seq": n_seq, "slot": slot}
+    return llm._batch_context
+
+
+def _copy_prefix(llm, ctx: LlamaContext, seq_id: int, prefix: str, tokens: list) -> int:
+    """
+    Restore the cached prefix state in the main context and copy its KV
+    cells into sequence `seq_id` of the batch context.
+    Returns the number of prompt tokens that no longer need prefilling.
+    """
+    prime_prefix(llm, prefix)
+
+    shared = 0
+    for a, b in zip(llm.input_ids[:llm.n_tokens], tokens[:-1]):
+        if a != b:
+            break
+        shared += 1
+    if shared == 0:
+        return 0
+
+    # Trim anything past the shared prefix, then copy sequence 0 across
+    llm.n_tokens = shared
+    llm._ctx.kv_cache_seq_rm(-1, shared, -1)
+
+    size = llama_cpp.llama_state_seq_get_size(llm.ctx, 0)
+    buffer = (ctypes.c_uint8 * size)()
+    llama_cpp.llama_state_seq_get_data(llm.ctx, buffer, size, 0)
+    if llama_cpp.llama_state_seq_set_data(ctx.ctx, buffer, size, seq_id) == 0:
+        return 0
+    return shared
+
+
+def decode_parallel(
+    llm,
+    prompts: list,
+    max_tokens: int,
+    temperature: float = 0.7,
+    stop: list | None = None,
+    prefixes: list | None = None,
+    top_k: int = 40,
+    top_p: float = 0.95,
+    seed: int | None = None,
+    grammars: list | None = None
+) -> list:
+    """
+    Decode every prompt as its own sequence in the model's batch context
+    (sharing one weights pass per step) and return, per prompt:
+    {"text", "prompt_tokens", "prefilled_tokens", "completion_tokens",
+     "first_token_s", "total_s", "tokens_per_s"}
+
+    `prefixes` (optional, one per prompt) are static prompt headers whose
+    cached state is copied in instead of being prefilled again.
+    `grammars` (optional, one LlamaGrammar or None per prompt) constrain
+    those sequences through llama.cpp's own sampler instead of _sample.
+    Raises on any llama.cpp failure so the caller can fall back.
+    """
+    stop = stop or []
+    n_seq = len(prompts)
+    start = time.perf_counter()
+
+    tokenized = [llm.tokenize(p.encode("utf-8")) for p in prompts]
+    longest = max(len(t) for t in tokenized)
+    # Room for the longest sequence in every slot
+    if longest + max_tokens > llm.n_ctx():
+        raise ValueError(f"prompt of {longest} tokens does not fit n_ctx={llm.n_ctx()}")
+
+    cached = _batch_context(llm, n_seq, longest + max_tokens)
+    ctx, batch = cached["ctx"], cached["batch"]
+    n_vocab = llm.n_vocab()
+    # Newer llama.cpp checks end-of-generation on the vocab, older on the model
+    eog_of = getattr(llm._model, "vocab", llm.model)
+    rng = np.random.default_rng(seed)
+    samplers = [
+        _grammar_sampler(llm, grammar, temperature, top_k, top_p,
+                         llama_cpp.LLAMA_DEFAULT_SEED if seed is None else seed + i)
+        if grammar is not None else None
+        for i, grammar in enumerate(grammars or [None] * n_seq)
+    ]
+
+    seqs = [{
+        "tokens": [],
+        "text": b"",
+        "pos": 0,
+        "done": False,
+        "first": None,
+        "end": None,
+        "prefilled": 0
+    } for _ in range(n_seq)]
+
+    def accept(seq_id: int, logits_idx: int):
+        """Sample the next token for a sequence and apply stop conditions"""
+        seq = seqs[seq_id]
+        if samplers[seq_id] is not None:
+            token = samplers[seq_id].sample(ctx, logits_idx)
+        else:
+            logits = np.ctypeslib.as_array(ctx.get_logits_ith(logits_idx), shape=(n_vocab,))
+            token = _sample(logits, temperature, top_k, top_p, rng)
+
+        now = time.perf_counter()
+        if seq["first"] is None:
+            seq["first"] = now
+
+        if llama_cpp.llama_token_is_eog(eog_of, token):
+            seq["done"], seq["end"] = True, now
+            return
+
+        seq["tokens"].append(token)
+        seq["text"] += llm.detokenize([token])
+        text = seq["text"].decode("utf-8", errors="ignore")
+
+        hits = [text.index(s) for s in stop if s in text]
+        if hits:
+            seq["text"] = text[:min(hits)].encode("utf-8")
+            seq["done"], seq["end"] = True, now
+        elif len(seq["tokens"]) >= max_tokens:
+            seq["done"], seq["end"] = True, now
+
+    try:
+        # 1. Prompt prefill - all sequences packed into n_batch sized chunks
+        queue = []
+        for seq_id, tokens in enumerate(tokenized):
+            skip = 0
+            if prefixes and prefixes[seq_id]:
+                skip = _copy_prefix(llm, ctx, seq_id, prefixes[seq_id], tokens)
+            seqs[seq_id]["prefilled"] = len(tokens) - skip
+            for pos in range(skip, len(tokens)):
+                queue.append((tokens[pos], pos, seq_id, pos == len(tokens) - 1))
+            seqs[seq_id]["pos"] = len(tokens)
+
+        for offset in range(0, len(queue), llm.n_batch):
+            batch.reset()
+            finishing = {}
+            for token, pos, seq_id, last in queue[offset:offset + llm.n_batch]:
+                i = _add_token(batch, token, pos, seq_id, last)
+                if last:
+                    finishing[seq_id] = i
+            ctx.decode(batch)
+            for seq_id, i in finishing.items():
+                accept(seq_id, i)
+
+        # 2. Generation - one token per live sequence per decode step
+        while True:
+            active = [i for i, s in enumerate(seqs) if not s["done"]]
+            if not active:
+                break
+
+            batch.reset()
+            indices = {}
+            for seq_id in active:
+                seq = seqs[seq_id]
+                indices[seq_id] = _add_token(batch, seq["tokens"][-1], seq["pos"], seq_id, True)
+                seq["pos"] += 1
+            ctx.decode(batch)
+
+            for seq_id, i in indices.items():
+                accept(seq_id, i)
+    finally:
+        for sampler in samplers:
+            if sampler is not None:
+                sampler.close()
+
+    results = []
+    for tokens, seq in zip(tokenized, seqs):
+        end = seq["end"] or time.perf_counter()
+        first = seq["first"] or end
+        decode_time = end - first
+        results.append({
+            "text": seq["text"].decode("utf-8", errors="ignore"),
+            "prompt_tokens": len(tokens),
+            "prefilled_tokens": seq["prefilled"],
+            "completion_tokens": len(seq["tokens"]),
+            "first_token_s": round(first - start, 2),
+            "total_s": round(end - start, 2),
+            "tokens_per_s": round(len(seq["tokens"]) / decode_time, 1) if decode_time > 0 else 0.0
+        })
+    return results
@@ -0,0 +1,426 @@
+"""
+Polyreasoner Benchmarks
+Timing harness for the performance features (run with real models)
+
+Usage:
+    python benchmark.py cold-start
+    python benchmark.py ttft
+    python benchmark.py agent-json
+    python benchmark.py speculative
+    python benchmark.py cascade
+    python benchmark.py continuation
+    python benchmark.py overflow
+    python benchmark.py sessions
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from agents import agent_stats, reset_agent_stats, run_agents
+from config import CASCADE, CONTEXT_WINDOW, DEFAULT_AGENTS, MAX_AGENTS, SPECULATIVE
+from context_window import context_stats
+from main import Polyreasoner
+from prompt_cache import get_prefix_cache
+from prompts import AGENT_PROMPTS
+from speculative import speculative_stats
+from cascade import CascadeRouter
+from sessions import make_session_store
+
+SAMPLE_QUERY = "Should I build an LLM firewall for enterprise apps?"
+CHAT_QUERY = "What is Python used for?"
+
+# Mixed turns for the cascade benchmark
+CASCADE_TURNS = [
+    "hi",
+    "What is Python used for?",
+    "thanks",
+    "Should I build a SaaS for freelancers to track invoices and expenses?",
+    "Explain how a hash map works",
+    "Evaluate: AI-powered code review tool for small engineering teams",
+    "What could go wrong with moving our monolith to microservices next quarter?",
+    "Evaluate: AI safety",
+    "Is Rust or Go better for a CLI tool?",
+    "hello"
+]
+
+# Follow-up chat turns for the router continuation benchmark
+CONVERSATION_TURNS = [
+    "What is Python used for?",
+    "Which of those areas pays best?",
+    "How long would it take to get job-ready in it?",
+    "What should I build for a portfolio?",
+    "How do I make that project stand out?",
+    "Should I learn Rust as well?",
+    "What about Go instead?",
+    "Summarize your advice in three points"
+]
+
+# Pasted-document filler for the overflow benchmark (~90 tokens per copy)
+PASTE_PARAGRAPH = (
+    "Our team has spent the last two years building internal tooling for invoice "
+    "reconciliation, vendor onboarding and expense approvals. The current system is a "
+    "collection of scripts, spreadsheets and a small web dashboard that three finance "
+    "analysts rely on daily, and we are considering turning it into a product. "
+)
+
+
+def bench_cold_start(query: str) -> dict:
+    """
+    Cold start to first fast query: model load + prompt snapshots,
+    then one full polymode-capable query. Run twice to compare a cold
+    snapshot directory against a warm one.
+    """
+    start = time.perf_counter()
+    reasoner = Polyreasoner()
+    reasoner.load_router()
+    reasoner.load_agents()
+    ready = time.perf_counter() - start
+
+    query_start = time.perf_counter()
+    reasoner.process(query)
+    first_query = time.perf_counter() - query_start
+
+    result = {
+        "startup_s": round(ready, 2),
+        "first_query_s": round(first_query, 2),
+        "cold_start_to_answer_s": round(ready + first_query, 2),
+        "prefix_cache": get_prefix_cache().stats()
+    }
+
+    print("\n--- cold start ---")
+    for key, value in result.items():
+        print(f"  {key}: {value}")
+    return result
+
+
+def bench_ttft(chat_query: str, poly_query: str, runs: int) -> dict:
+    """Time-to-first-token and total latency for the chat and polymode paths"""
+    reasoner = Polyreasoner()
+    reasoner.load_router()
+    reasoner.load_agents()
+
+    timings = {}
+    for query in [chat_query, poly_query] * runs:
+        reasoner.clear_session()
+        for event in reasoner.process_stream(query):
+            if event["type"] == "done":
+                timings.setdefault(event["mode"], []).append((event["ttft_s"], event["total_s"]))
+
+    print("\n--- time to first token ---")
+    result = {}
+    for mode, rows in timings.items():
+        ttft = sum(r[0] for r in rows) / len(rows)
+        total = sum(r[1] for r in rows) / len(rows)
+        result[mode] = {"runs": len(rows), "ttft_s": round(ttft, 2), "total_s": round(total, 2)}
+        print(f"  {mode:<9} runs={len(rows)}  ttft={ttft:.2f}s  total={total:.2f}s")
+    return result
+
+
+def bench_agent_json(query: str, runs: int) -> dict:
+    """Decoded tokens and parse-failure rate per agent run, free vs grammar-constrained"""
+    reasoner = Polyreasoner()
+    llm = reasoner.load_agents()
+
+    result = {}
+    for label, use_grammar in [("free", False), ("grammar", True)]:
+        reset_agent_stats()
+        start = time.perf_counter()
+        for _ in range(runs):
+            for i in range(0, len(AGENT_PROMPTS), MAX_AGENTS):
+                names = list(AGENT_PROMPTS)[i:i + MAX_AGENTS]
+                run_agents(names, query, "", llm, use_grammar)
+        result[label] = {**agent_stats(), "total_s": round(time.perf_counter() - start, 1)}
+
+    print("\n--- agent JSON output ---")
+    for label, stats in result.items():
+        print(f"  {label:<8} runs={stats['runs']}  avg_tokens={stats['avg_tokens']}  "
+              f"parse_failures={stats['parse_failure_rate']:.1%}  total={stats['total_s']}s")
+    return result
+
+
+def bench_speculative(query: str, runs: int) -> dict:
+    """
+    Synthesis tokens/s with and without drafts on the same model instance
+    (set SPECULATIVE["mode"] in config.py first).
+    """
+    if not SPECULATIVE["mode"]:
+        print("SPECULATIVE['mode'] is off in config.py - nothing to compare")
+        return {}
+
+    reasoner = Polyreasoner()
+    llm = reasoner.load_router()
+    agent_results = run_agents(DEFAULT_AGENTS[:MAX_AGENTS], query, "", reasoner.load_agents())
+
+    stages = SPECULATIVE["stages"]
+    result = {}
+    for label, enabled in [("plain", []), ("speculative", ["synthesis"])]:
+        SPECULATIVE["stages"] = enabled
+        tokens, seconds = 0, 0.0
+        for _ in range(runs):
+            start = time.perf_counter()
+            text = reasoner.synthesize(agent_results, query)
+            seconds += time.perf_counter() - start
+            tokens += len(llm.tokenize(text.encode("utf-8"), add_bos=False))
+        result[label] = {"tokens_per_s": round(tokens / seconds, 1), "avg_s": round(seconds / runs, 2)}
+    SPECULATIVE["stages"] = stages
+
+    draft = speculative_stats().get("synthesis", {})
+    print(f"\n--- speculative synthesis ({SPECULATIVE['mode']}) ---")
+    for label in ["plain", "speculative"]:
+        print(f"  {label:<12} {result[label]['tokens_per_s']} tok/s  avg={result[label]['avg_s']}s")
+    print(f"  speedup      {result['speculative']['tokens_per_s'] / result['plain']['tokens_per_s']:.2f}x")
+    print(f"  acceptance   {draft.get('acceptance_rate', 0):.0%} "
+          f"({draft.get('tokens_per_pass', 0)} tokens per main-model pass)")
+    result["draft"] = draft
+    return result
+
+
+def bench_cascade(threshold: float) -> dict:
+    """
+    Fraction of turns the cascade answers without the LLM router, and the
+    router time it saves (each short-circuited turn is also run through the
+    LLM router to measure what it would have cost).
+    """
+    reasoner = Polyreasoner()
+    reasoner.load_router()
+    cascade = CascadeRouter(threshold)
+
+    rows = []
+    for turn in CASCADE_TURNS:
+        start = time.perf_counter()
+        route = cascade.classify(turn)
+        classify_s = time.perf_counter() - start
+        skipped = route["route"] in ("greeting", "polymode") and route["confidence"] >= threshold
+
+        saved_s = 0.0
+        if skipped:
+            reasoner.clear_session()
+            start = time.perf_counter()
+            for _ in reasoner._route_with_llm(turn):
+                pass
+            saved_s = time.perf_counter() - start - classify_s
+        cascade.record(skipped, saved_s)
+        rows.append((turn, route["route"], route["confidence"], skipped, classify_s, saved_s))
+
+    print(f"\n--- cascade router (threshold {threshold}) ---")
+    for turn, name, confidence, skipped, classify_s, saved_s in rows:
+        print(f"  {'skip' if skipped else 'llm ':<5} {name:<9} {confidence:.2f}  "
+              f"{classify_s * 1000:5.1f}ms  saved {saved_s:5.1f}s  {turn[:50]}")
+    stats = cascade.stats()
+    print(f"  short-circuited {stats['fraction']:.0%} of turns, {stats['saved_s']}s of router time saved")
+    return stats
+
+
+def bench_continuation(sessions: int) -> dict:
+    """
+    Router time and prefill tokens for a multi-turn chat, with the router
+    continuation off and on. `sessions` conversations are interleaved turn
+    by turn, so with more than one every turn restores a saved state.
+    """
+    reasoner = Polyreasoner()
+    reasoner.load_router()
+    continuation = reasoner.continuation
+    if continuation is None:
+        print("ROUTER_CONTINUATION['enabled'] is off in config.py - nothing to compare")
+        return {}
+
+    result = {}
+    for label, enabled in [("full prompt", False), ("continuation", True)]:
+        reasoner.continuation = continuation if enabled else None
+        ids = [f"bench-{i}" for i in range(sessions)]
+        for session_id in ids:
+            reasoner.clear_session(session_id)
+        seconds, rows = 0.0, []
+        for turn in CONVERSATION_TURNS:
+            for session_id in ids:
+                start = time.perf_counter()
+                router = reasoner._route_with_llm(turn, session_id)
+                try:
+                    while True:
+                        next(router)
+                except StopIteration as done:
+                    output, _, prefill = done.value
+                seconds += time.perf_counter() - start
+                reasoner.history(session_id).append({"user": turn, "assistant": output})
+                if prefill:
+                    rows.append(prefill)
+        result[label] = {"router_s": round(seconds, 2), "turns": len(CONVERSATION_TURNS) * sessions}
+        if rows:
+            result[label].update({
+                "prompt_tokens": sum(r["prompt_tokens"] for r in rows),
+                "prefilled": sum(r["prefilled"] for r in rows),
+                "saved": sum(r["saved"] for r in rows),
+                "restores": sum(r["restored"] for r in rows),
+                "rebuilds": sum(1 for r in rows if r["rebuilt"])
+            })
+    reasoner.continuation = continuation
+
+    print(f"\n--- router continuation ({sessions} interleaved sessions) ---")
+    for label, row in result.items():
+        line = f"  {label:<13} {row['turns']} turns  router={row['router_s']}s"
+        if "prefilled" in row:
+            line += (f"  prefilled {row['prefilled']}/{row['prompt_tokens']} tokens  saved {row['saved']}  "
+                     f"restores {row['restores']}  rebuilds {row['rebuilds']}")
+        print(line)
+    print(f"  speedup       {result['full prompt']['router_s'] / result['continuation']['router_s']:.2f}x")
+    return result
+
+
+def bench_overflow(copies: int) -> dict:
+    """
+    Context overflow failures for oversized turns - a long pasted idea (chat
+    and polymode) and a long reply history - with context packing off vs on.
+    """
+    reasoner = Polyreasoner()
+    reasoner.load_router()
+    reasoner.load_agents()
+
+    paste = PASTE_PARAGRAPH * copies
+    long_reply = {"user": "Tell me everything about invoicing software", "assistant": paste}
+    cases = [
+        ("long chat paste", [], f"Here is our current setup:\n\n{paste}\nWhat do you think?"),
+        ("long idea", [], f"Evaluate: {paste}\nShould we build a SaaS around it?"),
+        ("long history", [long_reply] * 5, CHAT_QUERY)
+    ]
+
+    enabled = CONTEXT_WINDOW["enabled"]
+    result = {}
+    for label, packing in [("unpacked", False), ("packed", True)]:
+        CONTEXT_WINDOW["enabled"] = packing
+        rows = {}
+        for name, history, query in cases:
+            reasoner.clear_session()
+            reasoner.history().extend(dict(msg) for msg in history)
+            start = time.perf_counter()
+            try:
+                for event in reasoner.process_stream(query):
+                    if event["type"] == "done":
+                        failed = [r["agent"] for r in event["agents"] if "error" in r]
+                        rows[name] = f"failed agents: {', '.join(failed)}" if failed else f"ok ({event['mode']})"
+            except Exception as e:
+                rows[name] = f"failed: {e}"
+            rows[name] += f" in {time.perf_counter() - start:.1f}s"
+        result[label] = rows
+    CONTEXT_WINDOW["enabled"] = enabled
+
+    print(f"\n--- context overflow ({copies} pasted paragraphs) ---")
+    for label, rows in result.items():
+        failures = sum(1 for row in rows.values() if row.startswith("failed"))
+        print(f"  {label}: {failures}/{len(rows)} turns failed")
+        for name, row in rows.items():
+            print(f"    {name:<16} {row}")
+    print(f"  packing: {context_stats()}")
+    return result
+
+
+def bench_sessions(count: int, turns: int) -> dict:
+    """
+    RAM and lookup latency of the session store with many idle sessions
+    (no model needed): `count` sessions of `turns` exchanges are written,
+    then every one is read back - most of them from SQLite.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        tracemalloc.start()
+        store = make_session_store(os.path.join(tmp, "sessions.db"))
+        start = time.perf_counter()
+        for i in range(count):
+            session = store.get(f"user-{i}")
+            for t in range(turns):
+                session.history.append({"user": f"{CONVERSATION_TURNS[t % len(CONVERSATION_TURNS)]} ({i})",
+                                        "assistant": PASTE_PARAGRAPH})
+            store.save(session)
+        write_s = time.perf_counter() - start
+
+        hot_ids = list(store.hot)
+        start = time.perf_counter()
+        for session_id in hot_ids:
+            store.get(session_id)
+        hot_ms = (time.perf_counter() - start) * 1000 / max(len(hot_ids), 1)
+
+        start = time.perf_counter()
+        for i in range(count):
+            store.get(f"user-{i}")
+        cold_ms = (time.perf_counter() - start) * 1000 / count
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = store.stats(top=3)
+        store.db.close()
+        db_mb = os.path.getsize(os.path.join(tmp, "sessions.db")) / 1024 ** 2
+
+    result = {
+        "sessions": count,
+        "hot": stats["hot"],
+        "ram_mb": round(stats["size_kb"] / 1024, 1),
+        "peak_traced_mb": round(peak / 1024 ** 2, 1),
+        "db_mb": round(db_mb, 1),
+        "write_s": round(write_s, 2),
+        "hot_get_ms": round(hot_ms, 3),
+        "get_ms": round(cold_ms, 3),
+        "evictions": stats["evictions"],
+        "largest": stats["largest"]
+    }
+    print(f"\n--- session store ({count} sessions x {turns} exchanges) ---")
+    for key, value in result.items():
+        print(f"  {key}: {value}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Polyreasoner benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    cold = sub.add_parser("cold-start", help="startup + first query latency")
+    cold.add_argument("--query", default=SAMPLE_QUERY)
+
+    ttft = sub.add_parser("ttft", help="time to first streamed token (chat + polymode)")
+    ttft.add_argument("--chat-query", default=CHAT_QUERY)
+    ttft.add_argument("--poly-query", default=SAMPLE_QUERY)
+    ttft.add_argument("--runs", type=int, default=3)
+
+    agent_json = sub.add_parser("agent-json", help="agent tokens + parse failures, grammar off vs on")
+    agent_json.add_argument("--query", default=SAMPLE_QUERY)
+    agent_json.add_argument("--runs", type=int, default=3)
+
+    spec = sub.add_parser("speculative", help="synthesis tok/s with vs without speculative drafts")
+    spec.add_argument("--query", default=SAMPLE_QUERY)
+    spec.add_argument("--runs", type=int, default=3)
+
+    casc = sub.add_parser("cascade", help="turns short-circuited by the cascade router + time saved")
+    casc.add_argument("--threshold", type=float, default=CASCADE["threshold"])
+
+    cont = sub.add_parser("continuation", help="router prefill tokens + time, full prompt vs continuation")
+    cont.add_argument("--sessions", type=int, default=2)
+
+    over = sub.add_parser("overflow", help="context overflow failures, packing off vs on")
+    over.add_argument("--copies", type=int, default=80, help="pasted paragraphs per long input")
+
+    sess = sub.add_parser("sessions", help="session store RAM + lookup latency with many idle sessions")
+    sess.add_argument("--count", type=int, default=5000)
+    sess.add_argument("--turns", type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.bench == "cold-start":
+        bench_cold_start(args.query)
+    elif args.bench == "ttft":
+        bench_ttft(args.chat_query, args.poly_query, args.runs)
+    elif args.bench == "agent-json":
+        bench_agent_json(args.query, args.runs)
+    elif args.bench == "speculative":
+        bench_speculative(args.query, args.runs)
+    elif args.bench == "cascade":
+        bench_cascade(args.threshold)
+    elif args.bench == "continuation":
+        bench_continuation(args.sessions)
+    elif args.bench == "overflow":
+        bench_overflow(args.copies)
+    elif args.bench == "sessions":
+        bench_sessions(args.count, args.turns)
+
+
+if __name__ == "__main__":
+    main()
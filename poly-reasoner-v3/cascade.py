@@ -0,0 +1,177 @@
+"""
+Polyreasoner Cascaded Routing
+Cheap classifier in front of the LLM router - only ambiguous turns reach it
+"""
+
+import re
+
+from config import CASCADE, AVAILABLE_AGENTS, DEFAULT_AGENTS, MAX_AGENTS
+
+GREETINGS = {
+    "hi", "hello", "hey", "thanks", "thank you", "ok", "okay", "bye", "got it",
+    "how are you", "what's up", "whats up", "sup", "howdy", "good morning", "cheers"
+}
+FAREWELLS = {"bye"}
+ACKNOWLEDGEMENTS = {"ok", "okay", "got it"}
+
+GREETING_REPLY = "Hi! Ask me anything, or describe an idea or decision you'd like to evaluate."
+THANKS_REPLY = "You're welcome! Feel free to ask anything else."
+FAREWELL_REPLY = "Bye! Come back any time you have an idea to evaluate."
+ACKNOWLEDGEMENT_REPLY = "Great - let me know if there's anything else."
+
+# (pattern, confidence) - phrasings that ask for a multi-perspective evaluation
+DECISION_PATTERNS = [
+    (r"^evaluate\b|^assess\b", 0.95),
+    (r"\bshould i (build|start|launch|open source|quit|switch|move|invest|pursue|hire)\b", 0.9),
+    (r"\b(is|would) (it|this|that) (be )?worth (it|building|pursuing|doing)\b", 0.9),
+    (r"\bpros and cons\b|\btrade-?offs?\b", 0.85),
+    (r"\bwhat could go wrong\b|\brisks? of\b", 0.85),
+    (r"\bis (this|it) a good idea\b", 0.85),
+    (r"\bshould i\b|\bshould we\b", 0.7),
+    (r"\b(or|vs\.?|versus)\b.*\?$", 0.6)
+]
+
+# Factual/explanatory questions the router would answer directly
+CHAT_PATTERNS = [
+    r"^(what|who|when|where) (is|are|was|were)\b",
+    r"^(how do|how does|how to|explain|define|tell me about)\b"
+]
+
+# Turns that lean on earlier messages ("what about...", "should I build it?")
+FOLLOW_UP_PATTERN = r"^(and|also|what about|how about|but|so)\b|\b(it|this|that|these|those)\b"
+
+# Agent → keywords; the best matches are picked when the router is skipped
+AGENT_KEYWORDS = {
+    "business": ["market", "startup", "saas", "customer", "revenue", "pricing", "competitor", "product"],
+    "risk": ["risk", "wrong", "fail", "quit", "invest", "money", "loan"],
+    "security": ["security", "secure", "privacy", "attack", "breach", "firewall", "data", "compliance"],
+    "feasibility": ["build", "mvp", "technical", "timeline", "architecture", "microservice", "stack"],
+    "impact": ["scale", "long-term", "future", "growth", "career", "sustainab"],
+    "ethical": ["ethic", "fair", "bias", "society", "surveillance", "children", "moral"],
+    "contrarian": []
+}
+# Keywords match at the start of a word, so stems cover their inflections
+# ("sustainab" -> "sustainable", "risk" -> "risky") but "fair" misses "affair"
+AGENT_PATTERNS = {
+    agent: [re.compile(rf"\b{re.escape(keyword)}") for keyword in keywords]
+    for agent, keywords in AGENT_KEYWORDS.items()
+}
+
+DECISION_ANCHORS = [
+    "should I build this", "is it worth building", "evaluate this idea",
+    "pros and cons of", "is this a good idea", "what could go wrong with"
+]
+CHAT_ANCHORS = [
+    "what is python", "explain how this works", "tell me a fact",
+    "how do I write a function", "what does this term mean"
+]
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation except ? (used by the "X or Y?" pattern)"""
+    return re.sub(r"[^\w\s'?-]", "", text.lower()).strip()
+
+
+def pick_agents(text: str) -> list:
+    """Keyword-matched agents, always ending with contrarian for balance"""
+    scores = {
+        agent: sum(bool(pattern.search(text)) for pattern in patterns)
+        for agent, patterns in AGENT_PATTERNS.items()
+    }
+    ranked = [a for a in sorted(scores, key=scores.get, reverse=True) if scores[a] > 0]
+    agents = [a for a in ranked + DEFAULT_AGENTS if a != "contrarian"]
+    agents = list(dict.fromkeys(agents))[:MAX_AGENTS - 1] + ["contrarian"]
+    return [a for a in agents if a in AVAILABLE_AGENTS]
+
+
+class CascadeRouter:
+    """
+    Classifies a turn as greeting / polymode / chat with a confidence.
+    Keyword rules always run; if sentence-transformers is installed and
+    CASCADE["embeddings"] is on, anchor similarity can raise confidence.
+    Turns below CASCADE["threshold"] go to the LLM router.
+    """
+
+    def __init__(self, threshold: float = CASCADE["threshold"]):
+        self.threshold = threshold
+        self.encoder = None
+        self.anchors = None
+        if CASCADE["embeddings"]:
+            self._load_encoder()
+
+        self.turns = 0
+        self.short_circuited = 0
+        self.saved_s = 0.0
+
+    def _load_encoder(self):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            return
+        self.encoder = SentenceTransformer(CASCADE["embedding_model"])
+        self.anchors = {
+            "polymode": self.encoder.encode(DECISION_ANCHORS, normalize_embeddings=True),
+            "chat": self.encoder.encode(CHAT_ANCHORS, normalize_embeddings=True)
+        }
+
+    def classify(self, user_input: str, has_history: bool = False) -> dict:
+        """
+        Returns {"route": "greeting" | "polymode" | "chat", "confidence",
+        "agents", "why"}. Follow-ups in a running conversation, short or
+        vague ideas are left to the LLM router (it asks for clarification).
+        """
+        text = normalize(user_input)
+        words = len(text.split())
+
+        if text.rstrip("? ") in GREETINGS:
+            return {"route": "greeting", "confidence": 1.0, "agents": [], "why": "greeting"}
+
+        decision, why = 0.0, ""
+        for pattern, confidence in DECISION_PATTERNS:
+            match = re.search(pattern, text)
+            if match and confidence > decision:
+                decision, why = confidence, f'matched "{match.group(0)}"'
+
+        if self.encoder is not None:
+            query = self.encoder.encode([user_input], normalize_embeddings=True)[0]
+            similarity = {route: float((anchors @ query).max()) for route, anchors in self.anchors.items()}
+            if similarity["polymode"] > max(decision, similarity["chat"]):
+                decision, why = similarity["polymode"], f"decision anchor similarity {similarity['polymode']:.2f}"
+
+        chat = 0.8 if any(re.search(p, text) for p in CHAT_PATTERNS) else 0.0
+
+        if decision > chat:
+            # Vague ideas and follow-ups need the LLM router's judgement
+            follow_up = has_history and re.search(FOLLOW_UP_PATTERN, text)
+            if words < CASCADE["min_decision_words"] or follow_up:
+                decision = min(decision, self.threshold - 0.01)
+                why += " (short or follow-up)"
+            return {"route": "polymode", "confidence": decision, "agents": pick_agents(text), "why": why}
+
+        return {"route": "chat", "confidence": chat, "agents": [], "why": "factual question" if chat else "no match"}
+
+    def reply(self, user_input: str) -> str:
+        """Canned answer for a greeting, thanks, farewell or acknowledgement"""
+        text = normalize(user_input).rstrip("? ")
+        if "thank" in text or text == "cheers":
+            return THANKS_REPLY
+        if text in FAREWELLS:
+            return FAREWELL_REPLY
+        if text in ACKNOWLEDGEMENTS:
+            return ACKNOWLEDGEMENT_REPLY
+        return GREETING_REPLY
+
+    def record(self, short_circuited: bool, saved_s: float = 0.0):
+        """One routed turn; saved_s is the measured router time it skipped (0 if unknown)"""
+        self.turns += 1
+        if short_circuited:
+            self.short_circuited += 1
+            self.saved_s += saved_s
+
+    def stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "short_circuited": self.short_circuited,
+            "fraction": round(self.short_circuited / self.turns, 3) if self.turns else 0.0,
+            "saved_s": round(self.saved_s, 1)
+        }
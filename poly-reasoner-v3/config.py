@@ -1,41 +1,141 @@
-"""
-Polyreasoner Configuration
-Edit paths to match your model locations
-"""
-
-# Model paths (edit these to match your setup)
-MODEL_PATHS = {
-    "router": "models/Qwen2.5-14B-Instruct-Q5_K_M.gguf",  # Routing + Synthesis
-    "agents": "models/Qwen2.5-14B-Instruct-Q5_K_M.gguf"   # Same model = no swapping = fast
-}
-
-# Model settings - balanced for quality and speed
-MODEL_SETTINGS = {
-    "router": {
-        "n_ctx": 6144,       # Enough for conversation + routing
-        "n_gpu_layers": -1,  # Use all GPU layers
-        "verbose": False
-    },
-    "agents": {
-        "n_ctx": 4096,       # Agents need moderate context
-        "n_gpu_layers": -1,
-        "verbose": False
-    }
-}
-
-# Available perspectives
-AVAILABLE_AGENTS = [
-    "business",     # Market fit, revenue, competitive advantage
-    "risk",         # Threats, downsides, failure modes
-    "security",     # Vulnerabilities, privacy, attack vectors
-    "feasibility",  # Technical complexity, resources, timeline
-    "impact",       # Long-term consequences, scalability
-    "ethical",      # Moral implications, fairness
-    "contrarian"    # Devil's advocate, argues against
-]
-
-# Default agents when routing fails (keep minimal for speed)
-DEFAULT_AGENTS = ["business", "risk", "contrarian"]
-
-# Max agents to run (limits LLM calls)
-MAX_AGENTS = 3
+"""
+Polyreasoner Configuration
+Edit paths to match your model locations
+"""
+
+# Model paths (edit these to match your setup)
+MODEL_PATHS = {
+    "router": "models/Qwen2.5-14B-Instruct-Q5_K_M.gguf",  # Routing + Synthesis
+    "agents": "models/Qwen2.5-14B-Instruct-Q5_K_M.gguf",  # Same model = no swapping = fast
+    "draft": "models/Qwen2.5-0.5B-Instruct-Q8_0.gguf"     # Optional, same tokenizer as router
+}
+
+# Model settings - balanced for quality and speed
+MODEL_SETTINGS = {
+    "router": {
+        "n_ctx": 6144,       # Enough for conversation + routing
+        "n_gpu_layers": -1,  # Use all GPU layers
+        "verbose": False
+    },
+    "agents": {
+        "n_ctx": 4096,       # Agents need moderate context
+        "n_gpu_layers": -1,
+        "verbose": False
+    },
+    "draft": {
+        "n_ctx": 6144,       # Must hold the longest router/synthesis prompt
+        "n_gpu_layers": -1,
+        "verbose": False
+    }
+}
+
+# Model residency - when router and agents use different models, keep both
+# loaded while they fit this budget; otherwise the least recently used one
+# is unloaded (models are swapped per polymode query)
+MODEL_RESIDENCY = {
+    "max_bytes": 24 * 1024 ** 3,  # Memory for loaded models + KV caches (24 GB)
+    "estimate_factor": 1.2        # Size guess (x file size) before a first load
+}
+
+# Available perspectives
+AVAILABLE_AGENTS = [
+    "business",     # Market fit, revenue, competitive advantage
+    "risk",         # Threats, downsides, failure modes
+    "security",     # Vulnerabilities, privacy, attack vectors
+    "feasibility",  # Technical complexity, resources, timeline
+    "impact",       # Long-term consequences, scalability
+    "ethical",      # Moral implications, fairness
+    "contrarian"    # Devil's advocate, argues against
+]
+
+# Default agents when routing fails (keep minimal for speed)
+DEFAULT_AGENTS = ["business", "risk", "contrarian"]
+
+# Max agents to run (limits LLM calls)
+MAX_AGENTS = 3
+
+# Cascaded routing - a keyword (+ optional embedding) classifier answers
+# greetings and sends clear decision questions straight to the agents;
+# everything below the confidence threshold goes to the LLM router
+CASCADE = {
+    "enabled": True,
+    "threshold": 0.8,            # Raise to send more turns to the LLM router
+    "min_decision_words": 8,     # Shorter ideas are likely vague - let the router ask
+    "embeddings": False,         # Needs sentence-transformers
+    "embedding_model": "all-MiniLM-L6-v2"
+}
+
+# Latency planner - fits the agent count and per-stage token limits to a
+# per-request time budget, from measured tokens/s and recent output lengths
+LATENCY_PLANNER = {
+    "budget_s": None,                       # Default budget per request (None = no limit)
+    "history_path": "cache/latency.json",   # Measurements kept across restarts
+    # Never plan below these (agents stay at AGENT_MAX_TOKENS with AGENT_GRAMMAR,
+    # whose list/string bounds assume the full limit)
+    "min_tokens": {"agents": 120, "synthesis": 160}
+}
+
+# How selected agents are executed:
+#   "batched"    - decode all agents as parallel sequences in one context
+#                  (one weights pass per step, falls back to sequential)
+#   "sequential" - one agent after another (lowest memory)
+AGENT_EXECUTION = "batched"
+
+# Constrain agent decoding to each agent's JSON schema (grammars.py), so
+# outputs always parse and stop at the closing brace
+AGENT_GRAMMAR = True
+
+# Agent output limit; the grammars' list and string bounds are derived from it
+AGENT_MAX_TOKENS = 200  # Shorter for speed
+
+# Speculative decoding for the router and synthesis calls
+#   "prompt_lookup" - draft by n-gram lookup in the prompt (synthesis mostly
+#                     quotes the agent outputs, so no extra model is needed)
+#   "draft_model"   - draft with the small model in MODEL_PATHS["draft"]
+#   None            - off
+# Enabling it makes the router model keep logits for every token.
+SPECULATIVE = {
+    "mode": None,
+    "stages": ["synthesis", "router"],
+    "num_pred_tokens": 10,  # Tokens drafted per main-model pass
+    "max_ngram_size": 2     # prompt_lookup only
+}
+
+# Prefix state cache - snapshots the model state after each static prompt
+# header so only the idea/context suffix has to be prefilled
+PREFIX_CACHE = {
+    "enabled": True,
+    "max_bytes": 2 * 1024 ** 3,  # RAM budget for saved states (2 GB)
+    "snapshot_dir": "cache/snapshots"  # Persist across restarts (None = RAM only)
+}
+
+# Router continuation - each session's router conversation stays evaluated,
+# so a turn only prefills its own tokens. The history window grows to
+# max_exchanges, then slides back to the last slide_to exchanges (a slide
+# re-prefills the window once; slide_to = max_exchanges slides every turn)
+ROUTER_CONTINUATION = {
+    "enabled": True,
+    "max_exchanges": 5,
+    "slide_to": 3,
+    "save_states": True,            # Snapshot after each reply so switching sessions can restore it
+    "max_bytes": 4 * 1024 ** 3      # RAM budget for saved session states (4 GB)
+}
+
+# Context window packing - prompts are measured with the model's tokenizer
+# and fitted into n_ctx before each call: history is packed newest first and
+# a long idea or reply is trimmed, instead of overflowing the context
+CONTEXT_WINDOW = {
+    "enabled": True,
+    "reserve_tokens": 32,           # Headroom for tokens merging where prompt pieces join
+    "count_cache_entries": 4096     # Cached per-text token counts
+}
+
+# Session store - each web app user's conversation. The most recently used
+# sessions stay in RAM; the rest live only in the SQLite file (web app) and
+# are loaded again when their user returns
+SESSIONS = {
+    "db_path": "cache/sessions.db",  # Used by the web app; the CLI keeps one in-RAM session
+    "max_sessions": 256,             # Sessions kept in RAM
+    "max_bytes": 64 * 1024 ** 2,     # RAM budget for their histories (64 MB)
+    "max_turns": 50                  # Exchanges stored per session (the router sees the last few)
+}
@@ -0,0 +1,111 @@
+"""
+Polyreasoner Context Window
+Token-accurate packing of prompts into the model's n_ctx
+"""
+
+import hashlib
+from collections import OrderedDict
+
+from config import CONTEXT_WINDOW
+
+TRIM_MARKER = " [...] "
+
+# Prompts fitted since startup (see context_stats)
+CONTEXT_STATS = {"trimmed_texts": 0, "trimmed_tokens": 0, "dropped_exchanges": 0}
+
+
+class TokenCounter:
+    """
+    Token counts per (model, text) with the model's own tokenizer, LRU
+    cached - a history turn is tokenized once, not on every prompt it's in.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.counts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, llm, text: str) -> int:
+        model = getattr(llm, "model_path", None) or str(id(llm))
+        key = (model, hashlib.sha1(text.encode("utf-8")).digest())
+        if key in self.counts:
+            self.counts.move_to_end(key)
+            self.hits += 1
+            return self.counts[key]
+
+        self.misses += 1
+        n = len(llm.tokenize(text.encode("utf-8"), add_bos=False, special=True))
+        self.counts[key] = n
+        if len(self.counts) > self.max_entries:
+            self.counts.popitem(last=False)
+        return n
+
+
+_counter = None
+
+
+def get_token_counter() -> TokenCounter:
+    global _counter
+    if _counter is None:
+        _counter = TokenCounter(CONTEXT_WINDOW["count_cache_entries"])
+    return _counter
+
+
+def count_tokens(llm, text: str) -> int:
+    return get_token_counter().count(llm, text)
+
+
+def prompt_budget(llm, max_tokens: int) -> int:
+    """Prompt tokens that fit n_ctx next to max_tokens of output and the reserve (BOS included)"""
+    return llm.n_ctx() - max_tokens - CONTEXT_WINDOW["reserve_tokens"]
+
+
+def trim_text(llm, text: str, max_tokens: int, keep: str = "start") -> str:
+    """
+    Cut text to at most max_tokens tokens. keep="start" keeps the beginning,
+    "both" keeps the beginning and the end (pasted ideas often close with
+    the actual question). No-op when packing is disabled or the text fits.
+    """
+    if not CONTEXT_WINDOW["enabled"] or count_tokens(llm, text) <= max_tokens:
+        return text
+
+    tokens = llm.tokenize(text.encode("utf-8"), add_bos=False, special=True)
+    room = max_tokens - count_tokens(llm, TRIM_MARKER) - 2  # detokenized pieces can merge at the seams
+    if room <= 0:
+        trimmed = ""
+    elif keep == "both":
+        head = llm.detokenize(tokens[:room - room // 3]).decode("utf-8", errors="ignore")
+        tail = llm.detokenize(tokens[len(tokens) - room // 3:]).decode("utf-8", errors="ignore")
+        trimmed = head.rstrip() + TRIM_MARKER + tail.lstrip()
+    else:
+        trimmed = llm.detokenize(tokens[:room]).decode("utf-8", errors="ignore").rstrip() + TRIM_MARKER.rstrip()
+
+    CONTEXT_STATS["trimmed_texts"] += 1
+    CONTEXT_STATS["trimmed_tokens"] += len(tokens) - count_tokens(llm, trimmed)
+    return trimmed
+
+
+def pack_newest(counts: list, budget: int) -> int:
+    """
+    Index of the oldest item to keep so the newest items fit the budget,
+    given each item's token count (oldest first). len(counts) = none fit.
+    """
+    if not CONTEXT_WINDOW["enabled"]:
+        return 0
+    start = len(counts)
+    used = 0
+    while start > 0 and used + counts[start - 1] <= budget:
+        start -= 1
+        used += counts[start]
+    CONTEXT_STATS["dropped_exchanges"] += start
+    return start
+
+
+def context_stats() -> dict:
+    counter = get_token_counter()
+    total = counter.hits + counter.misses
+    return {
+        **CONTEXT_STATS,
+        "count_cache_hit_rate": round(counter.hits / total, 3) if total else 0.0
+    }
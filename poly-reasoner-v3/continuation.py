@@ -0,0 +1,205 @@
+"""
+Polyreasoner Router Continuation
+Keeps each session's evaluated router conversation so a turn only prefills its new tokens
+"""
+
+import sys
+from collections import OrderedDict
+
+from config import ROUTER_CONTINUATION
+from context_window import count_tokens, pack_newest
+from prompt_cache import PrefixStateCache, compact_state, prime_prefix
+
+
+def exchange_text(msg: dict) -> str:
+    return f"User: {msg['user']}\nAssistant: {msg['assistant']}\n"
+
+
+def common_prefix(a, b) -> int:
+    """Number of leading tokens two sequences share"""
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class RouterSession:
+    """One session's router prompt as token pieces, plus its saved model state"""
+
+    def __init__(self, header_tokens: list, start: int):
+        self.start = start            # index of the first history exchange in the prompt
+        self.exchanges = []           # (user, assistant) pairs already in `tokens`
+        self.tokens = list(header_tokens)
+        self.state = None             # LlamaState after the last turn, or None
+        self.state_bytes = 0
+
+
+class RouterContinuation:
+    """
+    Per-session router conversations kept as evaluated token sequences.
+
+    The router prompt is built from token pieces (router prompt, one piece
+    per exchange, the new user line) instead of one re-tokenized string, so
+    a session's previous prompt is always an exact token prefix of its next
+    one. Before a turn the model context is brought to the longest evaluated
+    prefix available - what is already in the context, the session's saved
+    state, or the router prompt snapshot - and llama-cpp only prefills the rest.
+
+    The history window holds up to `max_exchanges` exchanges; when it would
+    grow past that it slides to the last `slide_to`, and the session is
+    rebuilt from the router prompt (as is a cleared or unknown session).
+    Exchanges that would push the prompt past max_prompt_tokens are dropped
+    oldest first, which also rebuilds the session. Saved states are evicted least recently used over max_bytes.
+    """
+
+    def __init__(self, header: str, max_exchanges: int, slide_to: int, max_bytes: int,
+                 save_states: bool = True):
+        self.header = header
+        self.max_exchanges = max_exchanges
+        self.slide_to = min(slide_to, max_exchanges)
+        self.max_bytes = max_bytes
+        self.save_states = save_states
+        self.sessions = OrderedDict()  # session id -> RouterSession
+        self.size_bytes = 0
+        self.totals = {"turns": 0, "prompt_tokens": 0, "prefilled": 0, "saved": 0,
+                       "restores": 0, "rebuilds": 0}
+
+    @staticmethod
+    def _tokenize(llm, text: str) -> list:
+        return llm.tokenize(text.encode("utf-8"), add_bos=False, special=True)
+
+    def _window(self, session: RouterSession | None, history: list) -> tuple[int, str | None]:
+        """First history index to include, and why the session must be rebuilt (None = continue)"""
+        if session is None:
+            return max(0, len(history) - self.max_exchanges), "new"
+        start = session.start
+        if len(history) - start > self.max_exchanges:
+            return max(0, len(history) - self.slide_to), "slide"
+        cached = [(m["user"], m["assistant"]) for m in history[start:start + len(session.exchanges)]]
+        if cached != session.exchanges:
+            return max(0, len(history) - self.max_exchanges), "changed"
+        return start, None
+
+    def prepare(self, llm, session_id: str, history: list, user_input: str,
+                max_prompt_tokens: int | None = None) -> tuple[list, dict]:
+        """
+        Prompt tokens for this turn, with the model context already holding
+        as much of them as possible. Returns (tokens, prefill stats).
+        """
+        session = self.sessions.get(session_id)
+        start, rebuild = self._window(session, history)
+        header_tokens = llm.tokenize(self.header.encode("utf-8"))
+        header = header_tokens + self._tokenize(llm, "\n\n")
+        turn = self._tokenize(llm, f"User: {user_input}\nAssistant:")
+
+        if max_prompt_tokens is not None:
+            counts = [count_tokens(llm, exchange_text(msg)) for msg in history[start:]]
+            if len(header) + sum(counts) + len(turn) > max_prompt_tokens:
+                dropped = pack_newest(counts, max_prompt_tokens - len(header) - len(turn))
+                if dropped:
+                    start += dropped
+                    rebuild = "overflow"
+
+        if rebuild:
+            if session is not None:
+                self._drop_state(session)
+            session = RouterSession(header, start)
+            self.sessions[session_id] = session
+            self.totals["rebuilds"] += 1
+        self.sessions.move_to_end(session_id)
+
+        for msg in history[start + len(session.exchanges):]:
+            session.tokens += self._tokenize(llm, exchange_text(msg))
+            session.exchanges.append((msg["user"], msg["assistant"]))
+        prompt = session.tokens + turn
+
+        # llama-cpp re-evaluates at least the last prompt token for fresh logits
+        reusable = prompt[:-1]
+        in_context = common_prefix(llm.input_ids[:llm.n_tokens], reusable)
+        restored = False
+        if session.state is not None and in_context < len(reusable):
+            saved = common_prefix(session.state.input_ids[:session.state.n_tokens], reusable)
+            if saved > in_context:
+                llm.load_state(session.state)
+                in_context = saved
+                restored = True
+
+        if in_context < len(header_tokens):
+            prime_prefix(llm, self.header)
+            in_context = common_prefix(llm.input_ids[:llm.n_tokens], reusable)
+
+        stats = {
+            "prompt_tokens": len(prompt),
+            "reused": in_context,
+            "prefilled": len(prompt) - in_context,
+            # Beyond what the router prompt snapshot alone would have reused
+            "saved": max(0, in_context - len(header_tokens)),
+            "restored": restored,
+            "rebuilt": rebuild
+        }
+        self.totals["turns"] += 1
+        self.totals["prompt_tokens"] += stats["prompt_tokens"]
+        self.totals["prefilled"] += stats["prefilled"]
+        self.totals["saved"] += stats["saved"]
+        self.totals["restores"] += int(restored)
+        return prompt, stats
+
+    def save(self, llm, session_id: str):
+        """Snapshot the context after the router reply, for when another session or stage takes the model"""
+        session = self.sessions.get(session_id)
+        if session is None or not self.save_states:
+            return
+        self._drop_state(session)
+        state = compact_state(llm, llm.save_state())
+        size = PrefixStateCache.state_size(state)
+        if size > self.max_bytes:
+            return
+        session.state, session.state_bytes = state, size
+        self.size_bytes += size
+
+        for other in list(self.sessions.values()):
+            if self.size_bytes <= self.max_bytes:
+                break
+            if other is not session:
+                self._drop_state(other)
+
+    def _drop_state(self, session: RouterSession):
+        self.size_bytes -= session.state_bytes
+        session.state, session.state_bytes = None, 0
+
+    def reset(self, session_id: str):
+        """Forget a session (on clear) - its next turn starts from the router prompt"""
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self._drop_state(session)
+
+    def session_bytes(self, session_id: str) -> int:
+        """RAM held for one session: its saved state plus its token list"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return 0
+        return session.state_bytes + sys.getsizeof(session.tokens) + 28 * len(session.tokens)
+
+    def stats(self) -> dict:
+        t = self.totals
+        return {
+            **t,
+            "saved_fraction": round(t["saved"] / t["prompt_tokens"], 3) if t["prompt_tokens"] else 0.0,
+            "sessions": len(self.sessions),
+            "states": sum(1 for s in self.sessions.values() if s.state is not None),
+            "size_mb": round(self.size_bytes / 1024 ** 2, 1)
+        }
+
+
+def make_continuation(header: str) -> RouterContinuation | None:
+    if not ROUTER_CONTINUATION["enabled"]:
+        return None
+    return RouterContinuation(
+        header,
+        max_exchanges=ROUTER_CONTINUATION["max_exchanges"],
+        slide_to=ROUTER_CONTINUATION["slide_to"],
+        max_bytes=ROUTER_CONTINUATION["max_bytes"],
+        save_states=ROUTER_CONTINUATION["save_states"]
+    )
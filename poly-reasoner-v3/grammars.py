@@ -0,0 +1,115 @@
+"""
+Polyreasoner Agent Grammars
+Turns the JSON schema in each agent prompt into a llama.cpp grammar
+"""
+
+import re
+
+from prompts import AGENT_PROMPTS
+
+# List and string bounds are derived per schema from the agent's max_tokens, so
+# the longest object the grammar allows still closes inside the token budget.
+# The {m,n} repetitions need the grammar parser of llama-cpp-python 0.3+
+# (requirements.txt); older builds reject these grammars.
+CHARS_PER_TOKEN = 3      # Conservative for English text (typically ~4)
+MAX_LIST_ITEMS = 3
+MIN_STRING_CHARS = 40    # Below this, lists get fewer items instead of shorter ones
+
+SHARED_RULES = r"""
+list   ::= "[" ws (string ("," ws string){0,LIST_TAIL})? ws "]"
+string ::= "\"" char{0,STRING_CHARS} "\""
+char   ::= [^"\\\x7F\x00-\x1F] | "\\" ["\\/bfnrt]
+score  ::= "0" ("." [0-9] [0-9]?)? | "1" (".0")?
+ws     ::= [ \n]?
+"""
+
+_grammars = {}
+
+
+def parse_schema(prompt: str) -> list:
+    """
+    Read the example JSON block after "Output your analysis as JSON:".
+    Returns [(key, kind, options)] with kind in enum | score | list | string.
+    """
+    block = prompt.split("as JSON:", 1)[-1]
+    block = block[block.index("{") + 1:block.rindex("}")]
+
+    fields = []
+    for line in block.splitlines():
+        match = re.match(r'\s*"(\w+)"\s*:\s*(.+?),?\s*$', line)
+        if not match:
+            continue
+        key, value = match.groups()
+
+        if value.startswith("["):
+            fields.append((key, "list", None))
+        elif re.fullmatch(r'"[^"]*"(\s*\|\s*"[^"]*")+', value):
+            fields.append((key, "enum", re.findall(r'"([^"]*)"', value)))
+        elif re.fullmatch(r'[\d.]+\s+to\s+[\d.]+', value):
+            fields.append((key, "score", None))
+        else:
+            fields.append((key, "string", None))
+
+    return fields
+
+
+def longest_output(fields: list, list_items: int, string_chars: int, filler: str = "x") -> str:
+    """The longest object a grammar with these bounds allows, strings filled with `filler`"""
+    string = '"' + (filler * string_chars)[:string_chars] + '"'
+    values = {
+        "score": "0.00",
+        "list": "[\n" + ",\n".join([string] * list_items) + "\n]",
+        "string": string
+    }
+    parts = []
+    for key, kind, options in fields:
+        value = f'"{max(options, key=len)}"' if kind == "enum" else values[kind]
+        parts.append(f'"{key}": {value}')
+    return "{\n" + ",\n".join(parts) + "\n}"
+
+
+def output_bounds(fields: list, max_tokens: int) -> tuple[int, int]:
+    """(list items, string chars) that fit a complete object in max_tokens"""
+    budget = max_tokens * CHARS_PER_TOKEN
+    for list_items in range(MAX_LIST_ITEMS, 0, -1):
+        strings = sum(list_items if kind == "list" else 1 for _, kind, _ in fields if kind in ("list", "string"))
+        string_chars = (budget - len(longest_output(fields, list_items, 0))) // max(strings, 1)
+        if string_chars >= MIN_STRING_CHARS:
+            break
+    if string_chars < 1:
+        raise ValueError(f"max_tokens={max_tokens} is too small for a complete object")
+    return list_items, string_chars
+
+
+def schema_to_gbnf(fields: list, max_tokens: int) -> str:
+    """Compact JSON object with the fields in prompt order, closing at the last brace"""
+    rules = []
+    parts = []
+
+    for i, (key, kind, options) in enumerate(fields):
+        if kind == "enum":
+            rule = f"enum-{key.replace('_', '-')}"
+            choices = " | ".join(f'"\\"{option}\\""' for option in options)
+            rules.append(f"{rule} ::= {choices}")
+            value = rule
+        else:
+            value = kind
+
+        separator = "" if i == 0 else '"," ws '
+        parts.append(f'{separator}"\\"{key}\\":" " "? {value}')
+
+    root = 'root ::= "{" ws ' + " ".join(parts) + ' ws "}"'
+    list_items, string_chars = output_bounds(fields, max_tokens)
+    shared = SHARED_RULES.replace("LIST_TAIL", str(list_items - 1)).replace("STRING_CHARS", str(string_chars))
+    return "\n".join([root] + rules) + "\n" + shared
+
+
+def get_agent_grammar(agent_name: str, max_tokens: int):
+    """LlamaGrammar for an agent's output schema within max_tokens (built once, then cached)"""
+    key = (agent_name, max_tokens)
+    if key not in _grammars:
+        from llama_cpp import LlamaGrammar
+
+        gbnf = schema_to_gbnf(parse_schema(AGENT_PROMPTS[agent_name]), max_tokens)
+        _grammars[key] = LlamaGrammar.from_string(gbnf, verbose=False)
+    return _grammars[key]
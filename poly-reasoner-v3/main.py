@@ -1,225 +1,521 @@
-"""
-Polyreasoner - Main Entry Point
-Multi-perspective reasoning system with dynamic agent selection
-"""
-
-import json
-import re
-import sys
-from pathlib import Path
-
-from llama_cpp import Llama
-
-from config import MODEL_PATHS, MODEL_SETTINGS, DEFAULT_AGENTS, AVAILABLE_AGENTS, MAX_AGENTS
-from prompts import ROUTER_PROMPT, SYNTHESIS_PROMPT
-from agents import run_agents_sequential, format_agent_outputs
-
-
-class Polyreasoner:
-    """
-    Multi-perspective reasoning system.
-    Uses LLM to dynamically decide when to activate multi-agent analysis.
-    """
-    
-    def __init__(self):
-        self.router_llm = None
-        self.agent_llm = None
-        self.conversation_history = []
-    
-    def load_router(self):
-        """Load the router/synthesizer model (Qwen 14B)"""
-        if self.router_llm is None:
-            print("Loading router model...")
-            self.router_llm = Llama(
-                model_path=MODEL_PATHS["router"],
-                **MODEL_SETTINGS["router"]
-            )
-            print("Router model loaded.")
-        return self.router_llm
-    
-    def load_agents(self):
-        """Load the agent model (Mistral 7B)"""
-        # Check if same model as router
-        if MODEL_PATHS["agents"] == MODEL_PATHS["router"]:
-            return self.load_router()
-        
-        if self.agent_llm is None:
-            print("Loading agent model...")
-            # Unload router to free VRAM if different model
-            if self.router_llm is not None:
-                del self.router_llm
-                self.router_llm = None
-            
-            self.agent_llm = Llama(
-                model_path=MODEL_PATHS["agents"],
-                **MODEL_SETTINGS["agents"]
-            )
-            print("Agent model loaded.")
-        return self.agent_llm
-    
-    def reload_router(self):
-        """Reload router after using agent model"""
-        if MODEL_PATHS["agents"] != MODEL_PATHS["router"]:
-            if self.agent_llm is not None:
-                del self.agent_llm
-                self.agent_llm = None
-            self.router_llm = None
-            return self.load_router()
-        return self.router_llm
-    
-    def detect_polymode(self, response: str) -> dict | None:
-        """
-        Check if response contains <polymode> tag.
-        Returns parsed JSON config or None.
-        """
-        match = re.search(r'<polymode>([\s\S]*?)</polymode>', response)
-        if not match:
-            return None
-        
-        try:
-            config = json.loads(match.group(1))
-            
-            # Validate agents
-            valid_agents = [a for a in config.get("agents", []) if a in AVAILABLE_AGENTS]
-            if not valid_agents:
-                valid_agents = DEFAULT_AGENTS
-            
-            # Limit to MAX_AGENTS for speed
-            config["agents"] = valid_agents[:MAX_AGENTS]
-            return config
-            
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            return {
-                "agents": DEFAULT_AGENTS[:MAX_AGENTS],
-                "context": "",
-                "reasoning": "JSON parse failed, using defaults"
-            }
-    
-    def synthesize(self, agent_outputs: list, original_query: str) -> str:
-        """
-        Combine agent perspectives into final response.
-        Uses router model for synthesis.
-        """
-        llm = self.reload_router()
-        
-        formatted_outputs = format_agent_outputs(agent_outputs)
-        
-        prompt = SYNTHESIS_PROMPT.format(
-            agent_outputs=formatted_outputs,
-            original_query=original_query
-        )
-        
-        response = llm(
-            prompt,
-            max_tokens=512,  # Enough for full structured synthesis
-            temperature=0.7,
-            stop=["</response>"]
-        )
-        
-        return response["choices"][0]["text"].strip()
-    
-    def process(self, user_input: str) -> str:
-        """
-        Main processing function.
-        Handles both normal conversation and multi-agent reasoning.
-        """
-        # Build prompt with conversation history
-        history_text = ""
-        for msg in self.conversation_history[-5:]:  # Last 5 exchanges
-            history_text += f"User: {msg['user']}\nAssistant: {msg['assistant']}\n"
-        
-        full_prompt = f"{ROUTER_PROMPT}\n\n{history_text}User: {user_input}\nAssistant:"
-        
-        # Get router response
-        llm = self.load_router()
-        response = llm(
-            full_prompt,
-            max_tokens=256,  # Faster routing
-            temperature=0.7,
-            stop=["User:", "</response>"]
-        )
-        
-        router_output = response["choices"][0]["text"].strip()
-        
-        # Check for polymode activation
-        polymode_config = self.detect_polymode(router_output)
-        
-        if polymode_config:
-            # Multi-agent mode activated
-            print("\n🔍 poly-reasoning...")
-            print(f"   Agents: {', '.join(polymode_config['agents'])}")
-            print(f"   Reason: {polymode_config.get('reasoning', 'N/A')}\n")
-            
-            # Run agents sequentially (same model can't be accessed in parallel)
-            agent_llm = self.load_agents()
-            agent_results = run_agents_sequential(
-                agent_names=polymode_config["agents"],
-                idea=user_input,
-                context=polymode_config.get("context", ""),
-                llm=agent_llm
-            )
-            
-            # Synthesize results
-            print("\n📊 Synthesizing perspectives...\n")
-            final_response = self.synthesize(agent_results, user_input)
-            
-        else:
-            # Normal conversation mode
-            final_response = router_output
-        
-        # Store in conversation history
-        self.conversation_history.append({
-            "user": user_input,
-            "assistant": final_response
-        })
-        
-        return final_response
-
-
-def main():
-    """CLI entry point"""
-    print("=" * 60)
-    print("  POLYREASONER")
-    print("  Multi-Perspective Reasoning System")
-    print("=" * 60)
-    print()
-    print("Type your questions or ideas. For complex decisions,")
-    print("I'll automatically activate multi-perspective analysis.")
-    print()
-    print("Commands: 'quit' to exit, 'clear' to reset conversation")
-    print("-" * 60)
-    print()
-    
-    reasoner = Polyreasoner()
-    
-    while True:
-        try:
-            user_input = input("You: ").strip()
-            
-            if not user_input:
-                continue
-            
-            if user_input.lower() == 'quit':
-                print("Goodbye!")
-                break
-            
-            if user_input.lower() == 'clear':
-                reasoner.conversation_history = []
-                print("Conversation cleared.\n")
-                continue
-            
-            print()
-            response = reasoner.process(user_input)
-            print(f"Polyreasoner: {response}")
-            print()
-            
-        except KeyboardInterrupt:
-            print("\n\nGoodbye!")
-            break
-        except Exception as e:
-            print(f"\nError: {e}\n")
-
-
-if __name__ == "__main__":
-    main()
+"""
+Polyreasoner - Main Entry Point
+Multi-perspective reasoning system with dynamic agent selection
+"""
+
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+from config import (MODEL_PATHS, MODEL_SETTINGS, MODEL_RESIDENCY, LATENCY_PLANNER, CASCADE,
+                    DEFAULT_AGENTS, AVAILABLE_AGENTS, MAX_AGENTS)
+from prompts import ROUTER_PROMPT, SYNTHESIS_PROMPT, AGENT_PROMPTS
+from agents import run_agents, format_agent_outputs, AGENT_STATS
+from prompt_cache import prime_prefix, get_prefix_cache, preload_prefixes
+from speculative import speculative, speculative_kwargs, speculative_stats
+from residency import ModelResidency
+from planner import get_planner, keep_agents, StageTimer, STAGE_MAX_TOKENS
+from cascade import CascadeRouter
+from continuation import make_continuation, exchange_text
+from sessions import make_session_store
+from context_window import count_tokens, prompt_budget, trim_text, pack_newest, context_stats
+
+# Static part of the synthesis prompt (everything before the agent outputs)
+SYNTHESIS_HEADER = SYNTHESIS_PROMPT.split("{agent_outputs}")[0]
+
+POLYMODE_TAG = "<polymode>"
+
+# Session used by the CLI and callers that don't pass one
+DEFAULT_SESSION = "default"
+
+
+class Polyreasoner:
+    """
+    Multi-perspective reasoning system.
+    Uses LLM to dynamically decide when to activate multi-agent analysis.
+    """
+    
+    def __init__(self, session_db: str | None = None):
+        """session_db: SQLite file cold sessions are spilled to (None = sessions only live in RAM)"""
+        router = {
+            "path": MODEL_PATHS["router"],
+            "settings": {**MODEL_SETTINGS["router"], **speculative_kwargs()}
+        }
+        agents = router
+        if MODEL_PATHS["agents"] != MODEL_PATHS["router"]:
+            agents = {"path": MODEL_PATHS["agents"], "settings": MODEL_SETTINGS["agents"]}
+        
+        # Router and agent models stay loaded together when they fit the budget
+        self.models = ModelResidency(
+            {"router": router, "agents": agents},
+            max_bytes=MODEL_RESIDENCY["max_bytes"],
+            estimate_factor=MODEL_RESIDENCY["estimate_factor"],
+            on_load=self._on_model_load
+        )
+        self.cascade = CascadeRouter() if CASCADE["enabled"] else None
+        self.continuation = make_continuation(ROUTER_PROMPT)
+        self.sessions = make_session_store(session_db, on_evict=self._on_session_evict)
+    
+    @property
+    def conversation_history(self) -> list:
+        return self.history(DEFAULT_SESSION)
+    
+    def history(self, session_id: str = DEFAULT_SESSION) -> list:
+        return self.sessions.get(session_id).history
+    
+    def clear_session(self, session_id: str = DEFAULT_SESSION):
+        """Forget a session's conversation and its evaluated router state"""
+        self.sessions.drop(session_id)
+        if self.continuation is not None:
+            self.continuation.reset(session_id)
+    
+    def _on_session_evict(self, session_id: str):
+        # An idle session's KV state is the largest thing it holds; its history is in SQLite
+        if self.continuation is not None:
+            self.continuation.reset(session_id)
+    
+    def session_stats(self, top: int = 10) -> dict:
+        """Session store counts plus RAM per session (history + router state) for the largest ones"""
+        stats = self.sessions.stats(top)
+        for row in stats["largest"]:
+            row["router_state_bytes"] = self.continuation.session_bytes(row["id"]) if self.continuation else 0
+        if self.continuation is not None:
+            stats["router_states_mb"] = self.continuation.stats()["size_mb"]
+        return stats
+    
+    @property
+    def router_llm(self):
+        return self.models.resident("router")
+    
+    @property
+    def agent_llm(self):
+        return self.models.resident("agents")
+    
+    def _on_model_load(self, path: str, llm):
+        """Warm the static prompts of every role served by a freshly loaded model"""
+        prefixes = []
+        if path == MODEL_PATHS["router"]:
+            prefixes += [ROUTER_PROMPT, SYNTHESIS_HEADER]
+        if path == MODEL_PATHS["agents"]:
+            prefixes += list(AGENT_PROMPTS.values())
+        self.warm_prompts(llm, prefixes)
+    
+    def load_router(self):
+        """Get the router/synthesizer model, loading it if needed"""
+        return self.models.get("router")
+    
+    def load_agents(self):
+        """Get the agent model (the router model when the paths match)"""
+        return self.models.get("agents")
+    
+    def warm_prompts(self, llm, prefixes: list) -> dict:
+        """Load (or build and save) the static prompt snapshots for a model"""
+        warm = preload_prefixes(llm, prefixes)
+        print(f"Prompt snapshots ready in {warm['seconds']}s "
+              f"({warm['from_disk']} from disk, {warm['evaluated']} evaluated)")
+        return warm
+    
+    def reload_router(self):
+        """Router model for synthesis (only reloaded if it was evicted)"""
+        return self.load_router()
+    
+    def detect_polymode(self, response: str) -> dict | None:
+        """
+        Check if response contains <polymode> tag.
+        Returns parsed JSON config or None.
+        """
+        match = re.search(r'<polymode>([\s\S]*?)</polymode>', response)
+        if not match:
+            return None
+        
+        try:
+            config = json.loads(match.group(1))
+            
+            # Validate agents
+            valid_agents = [a for a in config.get("agents", []) if a in AVAILABLE_AGENTS]
+            if not valid_agents:
+                valid_agents = DEFAULT_AGENTS
+            
+            # Limit to MAX_AGENTS for speed
+            config["agents"] = valid_agents[:MAX_AGENTS]
+            return config
+            
+        except json.JSONDecodeError:
+            # Fallback if JSON parsing fails
+            return {
+                "agents": DEFAULT_AGENTS[:MAX_AGENTS],
+                "context": "",
+                "reasoning": "JSON parse failed, using defaults"
+            }
+    
+    def synthesize_stream(self, agent_outputs: list, original_query: str,
+                          max_tokens: int = STAGE_MAX_TOKENS["synthesis"]):
+        """
+        Combine agent perspectives into final response, yielding text chunks.
+        Uses router model for synthesis.
+        """
+        llm = self.reload_router()
+        
+        formatted_outputs = format_agent_outputs(agent_outputs)
+        
+        # Agent outputs are bounded by their max_tokens; a long pasted idea
+        # is cut to whatever room is left
+        budget = prompt_budget(llm, max_tokens) - count_tokens(llm, SYNTHESIS_PROMPT) - 1
+        formatted_outputs = trim_text(llm, formatted_outputs, budget * 3 // 4)
+        original_query = trim_text(llm, original_query, budget - count_tokens(llm, formatted_outputs), keep="both")
+        
+        prompt = SYNTHESIS_PROMPT.format(
+            agent_outputs=formatted_outputs,
+            original_query=original_query
+        )
+        
+        prime_prefix(llm, SYNTHESIS_HEADER)
+        with speculative(llm, "synthesis"):
+            for chunk in llm(
+                prompt,
+                max_tokens=max_tokens,  # 512 = enough for full structured synthesis
+                temperature=0.7,
+                stop=["</response>"],
+                stream=True
+            ):
+                yield chunk["choices"][0]["text"]
+    
+    def synthesize(self, agent_outputs: list, original_query: str,
+                   max_tokens: int = STAGE_MAX_TOKENS["synthesis"]) -> str:
+        """Combine agent perspectives into final response"""
+        return "".join(self.synthesize_stream(agent_outputs, original_query, max_tokens)).strip()
+    
+    def predict_latency(self, latency_budget_s: float | None = None) -> dict:
+        """Predicted seconds for a chat reply and for polymode (UI ETA)"""
+        if latency_budget_s is None:
+            latency_budget_s = LATENCY_PLANNER["budget_s"]
+        plan = get_planner().plan(latency_budget_s)
+        return {**get_planner().predict(plan["agents"], plan["max_tokens"]), "plan": plan}
+    
+    def _route_with_llm(self, user_input: str, session_id: str = DEFAULT_SESSION):
+        """
+        Stream the LLM router's reply as token events, holding text back
+        while it may be opening a <polymode> tag.
+        The generator's return value is (router_output, first_token_at, prefill),
+        prefill being the continuation's token counts (None when it's off).
+        """
+        first_token_at = None
+        llm = self.load_router()
+        prefill = None
+        
+        # The new turn always fits (a long one is cut); history fills the rest, newest first
+        budget = prompt_budget(llm, STAGE_MAX_TOKENS["router"])
+        fixed = count_tokens(llm, ROUTER_PROMPT) + count_tokens(llm, "\n\nUser: \nAssistant:") + 1
+        user_input = trim_text(llm, user_input, budget - fixed, keep="both")
+        
+        if self.continuation is not None:
+            # Session's conversation stays evaluated - only the new turn is prefilled
+            full_prompt, prefill = self.continuation.prepare(
+                llm, session_id, self.history(session_id), user_input, budget)
+        else:
+            # Build prompt with conversation history
+            exchanges = [exchange_text(msg) for msg in self.history(session_id)[-5:]]  # Last 5 exchanges
+            counts = [count_tokens(llm, text) for text in exchanges]
+            start = pack_newest(counts, budget - fixed - count_tokens(llm, user_input))
+            history_text = "".join(exchanges[start:])
+            
+            full_prompt = f"{ROUTER_PROMPT}\n\n{history_text}User: {user_input}\nAssistant:"
+            prime_prefix(llm, ROUTER_PROMPT)
+        
+        # Get router response - stream it unless it may be opening a <polymode> tag
+        router_output = ""
+        streaming = False
+        timer = StageTimer()
+        
+        with speculative(llm, "router"):
+            for chunk in llm(
+                full_prompt,
+                max_tokens=STAGE_MAX_TOKENS["router"],  # 256 = faster routing
+                temperature=0.7,
+                stop=["User:", "</response>"],
+                stream=True
+            ):
+                piece = chunk["choices"][0]["text"]
+                router_output += piece
+                timer.token()
+                
+                if not streaming:
+                    head = router_output.lstrip()
+                    if not head or head.startswith(POLYMODE_TAG) or POLYMODE_TAG.startswith(head):
+                        continue
+                    streaming = True
+                    piece = head
+                
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield {"type": "token", "text": piece}
+        
+        timer.record("router")
+        if self.continuation is not None:
+            self.continuation.save(llm, session_id)
+        return router_output.strip(), first_token_at, prefill
+    
+    def process_stream(self, user_input: str, latency_budget_s: float | None = None,
+                       session_id: str = DEFAULT_SESSION, agents: list | None = None):
+        """
+        Streaming version of process().
+        latency_budget_s caps the polymode run (default LATENCY_PLANNER["budget_s"]):
+        the planner picks the agent count and token limits to fit it.
+        session_id selects the conversation (one per web app user).
+        agents skips routing and runs polymode with those agents ([] = DEFAULT_AGENTS).
+        Yields events as they happen:
+          {"type": "stage", "stage": "polymode" | "synthesis", "text": ...}
+          {"type": "token", "text": ...}   - user-visible response text
+          {"type": "done", "response", "mode", "agents", "plan", "routed_by",
+           "router_prefill", "ttft_s", "total_s"}
+        """
+        start = time.perf_counter()
+        first_token_at = None
+        if latency_budget_s is None:
+            latency_budget_s = LATENCY_PLANNER["budget_s"]
+        planner = get_planner()
+        session = self.sessions.get(session_id)
+        history = session.history
+        router_prefill = None
+        
+        # Cheap classifier first - greetings and clear decisions skip the LLM router
+        route = None
+        routed_by = "llm"
+        if agents is not None:
+            requested = [a for a in agents if a in AVAILABLE_AGENTS] or DEFAULT_AGENTS
+            route = {"route": "polymode", "agents": requested[:MAX_AGENTS], "why": "agents requested by the caller"}
+            routed_by = "request"
+        elif self.cascade is not None:
+            route = self.cascade.classify(user_input, has_history=bool(history))
+            if route["route"] not in ("greeting", "polymode") or route["confidence"] < self.cascade.threshold:
+                route = None
+            else:
+                routed_by = "cascade"
+        
+        if route is None:
+            router_output, first_token_at, router_prefill = yield from self._route_with_llm(user_input, session_id)
+            polymode_config = self.detect_polymode(router_output)
+            if self.cascade is not None:
+                self.cascade.record(False)
+        else:
+            if routed_by == "cascade":
+                # Only credit router time that has actually been measured, not DEFAULT_SPEED
+                saved_s = planner.predict()["router_s"] if "router" in planner.measured else 0.0
+                self.cascade.record(True, saved_s)
+            router_output = ""
+            polymode_config = None
+            if route["route"] == "greeting":
+                router_output = self.cascade.reply(user_input)
+                first_token_at = time.perf_counter()
+                yield {"type": "token", "text": router_output}
+            else:
+                polymode_config = {
+                    "agents": route["agents"],
+                    "context": "",
+                    "reasoning": f"cascade router: {route['why']}" if routed_by == "cascade" else route["why"]
+                }
+        
+        agent_results = []
+        plan = None
+        
+        if polymode_config:
+            # Fit agents and token limits to what's left of the budget
+            remaining = None
+            if latency_budget_s is not None:
+                remaining = latency_budget_s - (time.perf_counter() - start)
+            plan = planner.plan(remaining, max_agents=len(polymode_config["agents"]),
+                                include_router=False)
+            polymode_config["agents"] = keep_agents(polymode_config["agents"], plan["agents"])
+            
+            # Multi-agent mode activated
+            yield {
+                "type": "stage",
+                "stage": "polymode",
+                "text": "🔍 poly-reasoning...",
+                "agents": polymode_config["agents"],
+                "reasoning": polymode_config.get("reasoning", "N/A"),
+                "eta_s": plan["predicted_s"]
+            }
+            
+            # Run agents (batched in one context, or sequentially)
+            agent_llm = self.load_agents()
+            agents_start = time.perf_counter()
+            tokens_before = AGENT_STATS["completion_tokens"]
+            agent_results = run_agents(
+                agent_names=polymode_config["agents"],
+                idea=user_input,
+                context=polymode_config.get("context", ""),
+                llm=agent_llm,
+                max_tokens=plan["max_tokens"]["agents"]
+            )
+            planner.record(
+                "agents",
+                AGENT_STATS["completion_tokens"] - tokens_before,
+                time.perf_counter() - agents_start,
+                outputs=len(agent_results)
+            )
+            
+            # Synthesize results
+            yield {"type": "stage", "stage": "synthesis", "text": "📊 Synthesizing perspectives..."}
+            first_token_at = None
+            final_response = ""
+            timer = StageTimer()
+            for piece in self.synthesize_stream(agent_results, user_input, plan["max_tokens"]["synthesis"]):
+                timer.token()
+                if not final_response and not piece.strip():
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                final_response += piece
+                yield {"type": "token", "text": piece}
+            final_response = final_response.strip()
+            timer.record("synthesis")
+            
+        else:
+            # Normal conversation mode
+            final_response = router_output
+        
+        # Store in conversation history
+        history.append({
+            "user": user_input,
+            "assistant": final_response
+        })
+        self.sessions.save(session)
+        
+        end = time.perf_counter()
+        yield {
+            "type": "done",
+            "response": final_response,
+            "mode": "polymode" if polymode_config else "chat",
+            "agents": agent_results,
+            "plan": plan,
+            "routed_by": routed_by,
+            "router_prefill": router_prefill,
+            "ttft_s": round((first_token_at or end) - start, 2),
+            "total_s": round(end - start, 2)
+        }
+    
+    def print_stats(self):
+        """Cache, model, routing and decoding counters (the CLI prints them after a polymode turn)"""
+        cache_stats = get_prefix_cache().stats()
+        print(f"   Prefix cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['size_mb']} MB)")
+        model_stats = self.models.stats()
+        print(f"   Models: {', '.join(model_stats['resident'])} resident "
+              f"({model_stats['loads']} loads, {model_stats['evictions']} evictions)")
+        if self.cascade is not None:
+            cascade_stats = self.cascade.stats()
+            print(f"   Cascade: {cascade_stats['fraction']:.0%} of turns skipped the LLM router "
+                  f"(~{cascade_stats['saved_s']}s saved)")
+        window = context_stats()
+        if window["trimmed_texts"] or window["dropped_exchanges"]:
+            print(f"   Context window: {window['trimmed_texts']} inputs trimmed "
+                  f"({window['trimmed_tokens']} tokens), {window['dropped_exchanges']} exchanges dropped")
+        for stage, spec in speculative_stats().items():
+            print(f"   Speculative {stage}: {spec['acceptance_rate']:.0%} of drafts accepted, "
+                  f"{spec['tokens_per_pass']} tokens/pass, {spec['tokens_per_s']} tok/s")
+        if self.continuation is not None:
+            cont = self.continuation.stats()
+            print(f"   Router continuation: {cont['saved']} prefill tokens saved over {cont['turns']} turns "
+                  f"({cont['saved_fraction']:.0%}), {cont['states']} session states ({cont['size_mb']} MB)")
+    
+    def evaluate(self, user_input: str, latency_budget_s: float | None = None,
+                 session_id: str = DEFAULT_SESSION, agents: list | None = None) -> dict:
+        """
+        Non-streaming process_stream(): the final "done" event (response,
+        mode, agent outputs, plan, timings) without the "type" key
+        """
+        for event in self.process_stream(user_input, latency_budget_s, session_id, agents):
+            if event["type"] == "done":
+                return {k: v for k, v in event.items() if k != "type"}
+    
+    def process(self, user_input: str) -> str:
+        """
+        Main processing function.
+        Handles both normal conversation and multi-agent reasoning.
+        """
+        for event in self.process_stream(user_input):
+            if event["type"] == "stage":
+                print_stage(event)
+            elif event["type"] == "done":
+                if event["mode"] == "polymode":
+                    self.print_stats()
+                return event["response"]
+
+
+def print_stage(event: dict):
+    """CLI rendering of a stage event"""
+    print(f"\n{event['text']}")
+    if event["stage"] == "polymode":
+        print(f"   Agents: {', '.join(event['agents'])}")
+        print(f"   Reason: {event['reasoning']}")
+        print(f"   ETA:    ~{event['eta_s']}s")
+    print()
+
+
+def main():
+    """CLI entry point"""
+    print("=" * 60)
+    print("  POLYREASONER")
+    print("  Multi-Perspective Reasoning System")
+    print("=" * 60)
+    print()
+    print("Type your questions or ideas. For complex decisions,")
+    print("I'll automatically activate multi-perspective analysis.")
+    print()
+    print("Commands: 'quit' to exit, 'clear' to reset conversation")
+    print("-" * 60)
+    print()
+    
+    reasoner = Polyreasoner()
+    
+    while True:
+        try:
+            user_input = input("You: ").strip()
+            
+            if not user_input:
+                continue
+            
+            if user_input.lower() == 'quit':
+                print("Goodbye!")
+                break
+            
+            if user_input.lower() == 'clear':
+                reasoner.clear_session()
+                print("Conversation cleared.\n")
+                continue
+            
+            print()
+            started = False
+            for event in reasoner.process_stream(user_input):
+                if event["type"] == "stage":
+                    print_stage(event)
+                    started = False
+                elif event["type"] == "token":
+                    if not started:
+                        print("Polyreasoner: ", end="")
+                        started = True
+                    print(event["text"], end="", flush=True)
+                elif event["type"] == "done":
+                    prefill = event["router_prefill"]
+                    reused = ""
+                    if prefill:
+                        reused = (f", router prefill {prefill['prefilled']}/{prefill['prompt_tokens']} "
+                                  f"tokens ({prefill['saved']} saved)")
+                    print(f"\n\n   ({event['mode']}: first token {event['ttft_s']}s, "
+                          f"total {event['total_s']}s{reused})")
+                    if event["mode"] == "polymode":
+                        reasoner.print_stats()
+            print()
+            
+        except KeyboardInterrupt:
+            print("\n\nGoodbye!")
+            break
+        except Exception as e:
+            print(f"\nError: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Polyreasoner Latency Planner
+Fits agent count and per-stage token limits to a latency budget
+"""
+
+import atexit
+import json
+import os
+import time
+from collections import deque
+
+from config import LATENCY_PLANNER, MAX_AGENTS, AGENT_GRAMMAR, AGENT_MAX_TOKENS
+
+# Upper token limits per stage (the planner only ever lowers these)
+STAGE_MAX_TOKENS = {
+    "router": 256,
+    "agents": AGENT_MAX_TOKENS,
+    "synthesis": 512
+}
+
+# Used until a stage has been measured (14B Q5 on a mid-range GPU).
+# "agents" tokens/s is the aggregate over all agents of one request.
+DEFAULT_SPEED = {
+    "router": {"ttft_s": 1.0, "tokens_per_s": 15.0},
+    "agents": {"ttft_s": 1.5, "tokens_per_s": 30.0},
+    "synthesis": {"ttft_s": 1.5, "tokens_per_s": 15.0}
+}
+
+# Weight of the newest measurement in the moving averages
+SMOOTHING = 0.3
+# Output length percentile used to predict a stage's length
+LENGTH_PERCENTILE = 0.75
+HISTORY_SIZE = 50
+# Measurements are written to disk at most this often (and at exit)
+SAVE_INTERVAL_S = 30.0
+
+
+class LatencyPlanner:
+    """
+    Predicts stage latency as ttft + tokens / tokens_per_s, from moving
+    averages of measured speed and recent output lengths, and picks the
+    largest plan (most agents, then most tokens) that fits a budget.
+    Measurements are kept on disk so predictions survive restarts.
+    """
+
+    def __init__(self, history_path: str | None = None):
+        self.history_path = history_path
+        self.speed = {stage: dict(values) for stage, values in DEFAULT_SPEED.items()}
+        self.lengths = {stage: deque(maxlen=HISTORY_SIZE) for stage in STAGE_MAX_TOKENS}
+        self.measured = set()
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        if not self.history_path or not os.path.exists(self.history_path):
+            return
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for stage, values in data.get("speed", {}).items():
+            if stage in self.speed:
+                self.speed[stage].update(values)
+                self.measured.add(stage)
+        for stage, lengths in data.get("lengths", {}).items():
+            if stage in self.lengths:
+                self.lengths[stage].extend(lengths)
+
+    def flush(self):
+        """Write pending measurements now"""
+        if self.dirty:
+            self._save()
+
+    def _save(self):
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        if not self.history_path:
+            return
+        os.makedirs(os.path.dirname(self.history_path) or ".", exist_ok=True)
+        tmp = f"{self.history_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "speed": self.speed,
+                "lengths": {stage: list(values) for stage, values in self.lengths.items()}
+            }, f)
+        os.replace(tmp, self.history_path)
+
+    def record(self, stage: str, tokens: int, seconds: float, ttft_s: float | None = None,
+               outputs: int = 1):
+        """
+        Record one finished stage: total generated tokens, wall time and
+        time to first token. `outputs` is the number of generations the
+        tokens were spread over (agents in a batch). Without ttft_s the
+        stage's current ttft estimate is taken off the wall time, and
+        only its speed is updated.
+        """
+        if tokens <= 0 or seconds <= 0:
+            return
+
+        if ttft_s is None:
+            decode_s = max(seconds - self.speed[stage]["ttft_s"], 1e-3)
+            sample = {"tokens_per_s": tokens / decode_s}
+        else:
+            decode_s = max(seconds - ttft_s, 1e-3)
+            sample = {"ttft_s": ttft_s, "tokens_per_s": tokens / decode_s}
+
+        speed = self.speed[stage]
+        for key, value in sample.items():
+            if stage in self.measured:
+                speed[key] = (1 - SMOOTHING) * speed[key] + SMOOTHING * value
+            else:
+                speed[key] = value
+        self.measured.add(stage)
+
+        self.lengths[stage].append(round(tokens / outputs))
+        self.dirty = True
+        if time.monotonic() - self.saved_at >= SAVE_INTERVAL_S:
+            self._save()
+
+    def expected_tokens(self, stage: str, max_tokens: int) -> int:
+        """Likely output length for a stage, capped at its token limit"""
+        history = sorted(self.lengths[stage])
+        if not history:
+            return max_tokens
+        index = min(len(history) - 1, int(len(history) * LENGTH_PERCENTILE))
+        return min(history[index], max_tokens)
+
+    def stage_seconds(self, stage: str, max_tokens: int, outputs: int = 1) -> float:
+        speed = self.speed[stage]
+        tokens = self.expected_tokens(stage, max_tokens) * outputs
+        return speed["ttft_s"] + tokens / speed["tokens_per_s"]
+
+    def predict(self, n_agents: int = MAX_AGENTS, max_tokens: dict | None = None) -> dict:
+        """
+        Predicted seconds per stage for a chat reply and a polymode run.
+        Cheap enough to call before every request (UI ETA).
+        """
+        limits = {**STAGE_MAX_TOKENS, **(max_tokens or {})}
+        router = self.stage_seconds("router", limits["router"])
+        agents = self.stage_seconds("agents", limits["agents"], n_agents) if n_agents else 0.0
+        synthesis = self.stage_seconds("synthesis", limits["synthesis"])
+        return {
+            "router_s": round(router, 1),
+            "agents_s": round(agents, 1),
+            "synthesis_s": round(synthesis, 1),
+            "chat_s": round(router, 1),
+            "polymode_s": round(router + agents + synthesis, 1)
+        }
+
+    def plan(self, budget_s: float | None, max_agents: int = MAX_AGENTS,
+             include_router: bool = True) -> dict:
+        """
+        Choose agent count and token limits for a polymode run. Agents
+        are dropped first, then agent and synthesis tokens are scaled down
+        (not below LATENCY_PLANNER["min_tokens"]). With AGENT_GRAMMAR agent
+        tokens are never lowered: the grammar's list/string bounds are sized
+        for AGENT_MAX_TOKENS, and a shorter limit would cut the JSON off.
+        include_router=False plans only the remaining stages, once routing
+        is done.
+        Returns {"agents", "max_tokens", "predicted_s", "fits"}.
+        """
+        limits = dict(STAGE_MAX_TOKENS)
+
+        def cost(n: int) -> float:
+            predicted = self.predict(n, limits)
+            if include_router:
+                return predicted["polymode_s"]
+            return round(predicted["agents_s"] + predicted["synthesis_s"], 1)
+
+        def result(n: int, fits: bool) -> dict:
+            return {"agents": n, "max_tokens": dict(limits), "predicted_s": cost(n), "fits": fits}
+
+        if budget_s is None:
+            return result(max_agents, True)
+
+        for n in range(max_agents, 0, -1):
+            if cost(n) <= budget_s:
+                return result(n, True)
+
+        # One agent still too slow - shrink agent + synthesis outputs together
+        minimum = dict(LATENCY_PLANNER["min_tokens"])
+        if AGENT_GRAMMAR:
+            minimum["agents"] = STAGE_MAX_TOKENS["agents"]
+        for scale in [0.8, 0.6, 0.4, 0.2, 0.0]:
+            for stage in ["agents", "synthesis"]:
+                span = STAGE_MAX_TOKENS[stage] - minimum[stage]
+                limits[stage] = minimum[stage] + int(span * scale)
+            if cost(1) <= budget_s:
+                return result(1, True)
+        return result(1, False)
+
+
+def keep_agents(agents: list, n: int) -> list:
+    """
+    The first n agents, still ending with contrarian if it was picked - the
+    router and cascade add it for balance, and it comes last, so a plain
+    cut would drop it first. A single agent is the most relevant one.
+    """
+    if len(agents) <= n or n < 2 or "contrarian" not in agents:
+        return agents[:n]
+    return [a for a in agents if a != "contrarian"][:n - 1] + ["contrarian"]
+
+
+_planner = None
+
+
+def get_planner() -> LatencyPlanner:
+    global _planner
+    if _planner is None:
+        _planner = LatencyPlanner(LATENCY_PLANNER["history_path"])
+    return _planner
+
+
+class StageTimer:
+    """Measures one streamed stage: call token() per generated token"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first = None
+        self.tokens = 0
+
+    def token(self):
+        if self.first is None:
+            self.first = time.perf_counter()
+        self.tokens += 1
+
+    def record(self, stage: str):
+        end = time.perf_counter()
+        ttft = (self.first or end) - self.start
+        get_planner().record(stage, self.tokens, end - self.start, ttft)
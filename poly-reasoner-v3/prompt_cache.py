@@ -0,0 +1,277 @@
+"""
+Polyreasoner Prefix Cache
+Reuses the evaluated model state for static prompt headers
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from config import PREFIX_CACHE, MODEL_SETTINGS
+
+# Files whose contents invalidate every on-disk snapshot when edited
+SOURCE_FILES = [
+    Path(__file__).with_name("prompts.py"),
+    Path(__file__).with_name("config.py")
+]
+
+
+def compact_state(llm, state):
+    """
+    Drop all but the last saved logits row. llama-cpp broadcasts the
+    remaining row back on load, and generation re-evaluates from the first
+    new token, so earlier rows are never read (even with logits_all, which
+    speculative decoding needs) - this only saves memory.
+    """
+    if len(state.scores) > 1:
+        state.scores = state.scores[-1:].copy()
+    return state
+
+
+class PromptSnapshotStore:
+    """
+    On-disk copies of prefix snapshots so a restart doesn't have to
+    prefill the static prompts again.
+
+    Snapshots live in one directory per fingerprint (model file path,
+    size and mtime, MODEL_SETTINGS, n_ctx, prompts.py and config.py).
+    Directories with an outdated fingerprint are removed automatically.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.sources_digest = self._sources_digest()
+        self._checked = set()
+
+    @staticmethod
+    def _sources_digest() -> str:
+        digest = hashlib.sha256()
+        for path in SOURCE_FILES:
+            digest.update(path.read_bytes() if path.exists() else b"")
+        return digest.hexdigest()[:16]
+
+    def fingerprint(self, llm) -> tuple[str, dict]:
+        """Return (fingerprint, metadata) for a loaded model"""
+        model_path = os.path.abspath(llm.model_path)
+        stat = os.stat(model_path)
+        meta = {
+            "model_path": model_path,
+            "model_size": stat.st_size,
+            "model_mtime": stat.st_mtime_ns,
+            "n_ctx": llm.n_ctx(),
+            "settings": MODEL_SETTINGS,
+            "sources": self.sources_digest
+        }
+        raw = json.dumps(meta, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()[:16], meta
+
+    def _model_dir(self, llm) -> Path:
+        fingerprint, meta = self.fingerprint(llm)
+        model_dir = self.directory / fingerprint
+
+        if fingerprint not in self._checked:
+            self._prune(meta)
+            model_dir.mkdir(parents=True, exist_ok=True)
+            (model_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+            self._checked.add(fingerprint)
+
+        return model_dir
+
+    def _prune(self, current: dict):
+        """Remove snapshots built from other prompts/config or a changed model file"""
+        if not self.directory.exists():
+            return
+
+        for model_dir in self.directory.iterdir():
+            meta_file = model_dir / "meta.json"
+            try:
+                meta = json.loads(meta_file.read_text())
+            except (OSError, ValueError):
+                shutil.rmtree(model_dir, ignore_errors=True)
+                continue
+
+            stale = meta.get("sources") != current["sources"]
+            if meta.get("model_path") == current["model_path"]:
+                stale = stale or (meta.get("model_size"), meta.get("model_mtime")) != (
+                    current["model_size"], current["model_mtime"])
+            elif not os.path.exists(meta.get("model_path", "")):
+                stale = True
+
+            if stale:
+                print(f"  Removing stale prompt snapshots: {model_dir.name}")
+                shutil.rmtree(model_dir, ignore_errors=True)
+
+    def load(self, llm, prefix_digest: str):
+        """Return (tokens, LlamaState) or None"""
+        path = self._model_dir(llm) / f"{prefix_digest}.state"
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            path.unlink(missing_ok=True)
+            return None
+
+    def save(self, llm, prefix_digest: str, tokens: list, state):
+        path = self._model_dir(llm) / f"{prefix_digest}.state"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump((tokens, state), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+class PrefixStateCache:
+    """
+    LRU cache of llama states snapshotted right after a static prompt
+    prefix (agent prompt, router prompt, synthesis header) was evaluated.
+
+    Restoring a snapshot before a completion means llama-cpp's own
+    prefix matching only has to prefill the suffix (idea, context, history).
+    Misses fall back to the on-disk store before evaluating the prefix.
+    """
+
+    def __init__(self, max_bytes: int, store: PromptSnapshotStore | None = None):
+        self.max_bytes = max_bytes
+        self.store = store
+        self.states = OrderedDict()  # key -> (prefix tokens, LlamaState)
+        self.size_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def prefix_digest(prefix: str) -> str:
+        return hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def make_key(cls, llm, prefix: str) -> str:
+        """Key a snapshot by model file, context size and prefix text"""
+        model = getattr(llm, "model_path", None) or str(id(llm))
+        return f"{model}|{llm.n_ctx()}|{cls.prefix_digest(prefix)}"
+
+    @staticmethod
+    def state_size(state) -> int:
+        """Approximate RAM held by a saved LlamaState"""
+        return state.llama_state_size + state.scores.nbytes + state.input_ids.nbytes
+
+    def prime(self, llm, prefix: str) -> bool:
+        """
+        Make sure the model context starts with the evaluated prefix.
+        Returns True on a cache hit (nothing had to be prefilled).
+        """
+        key = self.make_key(llm, prefix)
+        entry = self.states.get(key)
+
+        if entry is not None:
+            tokens, state = entry
+            self.states.move_to_end(key)
+            self.hits += 1
+            # Already sitting on this prefix - no need to copy state back in
+            if not self._has_prefix(llm, tokens):
+                llm.load_state(state)
+            return True
+
+        if self.store is not None:
+            entry = self.store.load(llm, self.prefix_digest(prefix))
+            if entry is not None:
+                tokens, state = entry
+                llm.load_state(state)
+                self.put(key, tokens, state)
+                self.disk_hits += 1
+                return True
+
+        self.misses += 1
+        tokens = llm.tokenize(prefix.encode("utf-8"))
+        llm.reset()
+        llm.eval(tokens)
+        state = compact_state(llm, llm.save_state())
+        self.put(key, tokens, state)
+
+        if self.store is not None:
+            self.store.save(llm, self.prefix_digest(prefix), tokens, state)
+        return False
+
+    def put(self, key: str, tokens: list, state):
+        """Store a snapshot, evicting least recently used ones over budget"""
+        size = self.state_size(state)
+        if size > self.max_bytes:
+            return
+
+        if key in self.states:
+            self.size_bytes -= self.state_size(self.states.pop(key)[1])
+
+        self.states[key] = (tokens, state)
+        self.size_bytes += size
+
+        while self.size_bytes > self.max_bytes:
+            _, (_, evicted) = self.states.popitem(last=False)
+            self.size_bytes -= self.state_size(evicted)
+
+    def clear(self):
+        self.states.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / total, 3) if total else 0.0,
+            "entries": len(self.states),
+            "size_mb": round(self.size_bytes / 1024 ** 2, 1)
+        }
+
+    @staticmethod
+    def _has_prefix(llm, tokens: list) -> bool:
+        n = len(tokens)
+        return llm.n_tokens >= n and list(llm.input_ids[:n]) == list(tokens)
+
+
+# Global instance (shared by router, agents and synthesis)
+_cache = None
+
+
+def get_prefix_cache() -> PrefixStateCache:
+    global _cache
+    if _cache is None:
+        store = None
+        if PREFIX_CACHE.get("snapshot_dir"):
+            store = PromptSnapshotStore(PREFIX_CACHE["snapshot_dir"])
+        _cache = PrefixStateCache(PREFIX_CACHE["max_bytes"], store)
+    return _cache
+
+
+def prime_prefix(llm, prefix: str) -> bool:
+    """Restore (or build) the cached state for a static prompt prefix"""
+    if not PREFIX_CACHE["enabled"]:
+        return False
+    return get_prefix_cache().prime(llm, prefix)
+
+
+def preload_prefixes(llm, prefixes: list) -> dict:
+    """
+    Bring every static prefix into the RAM cache at startup, reading
+    snapshots from disk where possible. Returns timing and counts.
+    """
+    cache = get_prefix_cache()
+    before = cache.stats()
+    start = time.perf_counter()
+
+    if PREFIX_CACHE["enabled"]:
+        for prefix in prefixes:
+            cache.prime(llm, prefix)
+
+    after = cache.stats()
+    return {
+        "seconds": round(time.perf_counter() - start, 2),
+        "from_disk": after["disk_hits"] - before["disk_hits"],
+        "evaluated": after["misses"] - before["misses"],
+        "size_mb": after["size_mb"]
+    }
@@ -0,0 +1,118 @@
+"""
+Polyreasoner Model Residency
+Keeps router and agent models loaded together while they fit a memory budget
+"""
+
+import gc
+import os
+import time
+from collections import OrderedDict
+
+
+def kv_cache_bytes(llm) -> int:
+    """f16 K+V cache for the full context, from the GGUF metadata"""
+    meta = llm.metadata
+    arch = meta.get("general.architecture", "llama")
+    try:
+        n_layer = int(meta[f"{arch}.block_count"])
+        n_embd = int(meta[f"{arch}.embedding_length"])
+        n_head = int(meta[f"{arch}.attention.head_count"])
+        n_head_kv = int(meta.get(f"{arch}.attention.head_count_kv", n_head))
+    except (KeyError, ValueError):
+        return 0
+    return 2 * llm.n_ctx() * n_layer * (n_embd // n_head) * n_head_kv * 2
+
+
+class ModelResidency:
+    """
+    Loads models on demand and keeps them resident while the total stays
+    under max_bytes; past that, the least recently used model is evicted.
+
+    Models are identified by file path, so roles that point at the same
+    GGUF share one instance. Every load and eviction is logged with its
+    cost. Sizes are estimated as file size * estimate_factor until a model
+    has been loaded once, then file size + its KV cache.
+    """
+
+    def __init__(self, specs: dict, max_bytes: int, estimate_factor: float = 1.2, on_load=None):
+        self.specs = specs  # role -> {"path", "settings"}
+        self.max_bytes = max_bytes
+        self.estimate_factor = estimate_factor
+        self.on_load = on_load  # callback(path, llm) after every load
+        self.models = OrderedDict()  # path -> {"llm", "bytes", "loaded_at", "uses"}
+        self.measured = {}  # path -> bytes, remembered across evictions
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def path(self, role: str) -> str:
+        return self.specs[role]["path"]
+
+    def resident(self, role: str):
+        """Loaded model for a role, or None (never triggers a load)"""
+        entry = self.models.get(self.path(role))
+        return entry["llm"] if entry else None
+
+    def used_bytes(self) -> int:
+        return sum(entry["bytes"] for entry in self.models.values())
+
+    def estimate(self, path: str) -> int:
+        if path in self.measured:
+            return self.measured[path]
+        return int(os.path.getsize(path) * self.estimate_factor)
+
+    def get(self, role: str):
+        """Model for a role, loading it (and evicting others) if needed"""
+        path = self.path(role)
+        entry = self.models.get(path)
+        if entry is not None:
+            self.models.move_to_end(path)
+            entry["uses"] += 1
+            return entry["llm"]
+
+        needed = self.estimate(path)
+        while self.models and self.used_bytes() + needed > self.max_bytes:
+            self.evict(next(iter(self.models)))
+
+        from llama_cpp import Llama
+
+        start = time.perf_counter()
+        llm = Llama(model_path=path, **self.specs[role]["settings"])
+        seconds = time.perf_counter() - start
+
+        size = os.path.getsize(path) + kv_cache_bytes(llm)
+        self.measured[path] = size
+        self.models[path] = {"llm": llm, "bytes": size, "loaded_at": time.perf_counter(), "uses": 1}
+        self.loads += 1
+        self.load_seconds += seconds
+        print(f"[models] loaded {os.path.basename(path)} in {seconds:.1f}s "
+              f"({size / 1024 ** 3:.1f} GB, {self.used_bytes() / 1024 ** 3:.1f}/"
+              f"{self.max_bytes / 1024 ** 3:.1f} GB resident)")
+
+        # The first-load estimate can be low - settle up against the real size
+        while len(self.models) > 1 and self.used_bytes() > self.max_bytes:
+            self.evict(next(iter(self.models)))
+
+        if self.on_load is not None:
+            self.on_load(path, llm)
+        return llm
+
+    def evict(self, path: str):
+        entry = self.models.pop(path)
+        start = time.perf_counter()
+        entry["llm"].close()
+        del entry["llm"]
+        gc.collect()
+        self.evictions += 1
+        print(f"[models] evicted {os.path.basename(path)} after "
+              f"{time.perf_counter() - entry['loaded_at']:.0f}s resident, {entry['uses']} uses "
+              f"(freed {entry['bytes'] / 1024 ** 3:.1f} GB in {time.perf_counter() - start:.2f}s)")
+
+    def stats(self) -> dict:
+        return {
+            "resident": [os.path.basename(p) for p in self.models],
+            "used_gb": round(self.used_bytes() / 1024 ** 3, 2),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "load_s": round(self.load_seconds, 1)
+        }
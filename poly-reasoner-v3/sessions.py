@@ -0,0 +1,168 @@
+"""
+Polyreasoner Session Store
+Per-user conversation state: hot sessions in RAM, cold ones spilled to SQLite
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from config import SESSIONS
+
+
+class Session:
+    """One user's conversation ([{"user", "assistant"}], oldest first)"""
+
+    def __init__(self, session_id: str, history: list | None = None, updated: float | None = None):
+        self.id = session_id
+        self.history = history if history is not None else []
+        self.updated = updated or time.time()
+        self.size_bytes = self.measure()
+
+    def measure(self) -> int:
+        """Approximate RAM held by the history"""
+        return sys.getsizeof(self.history) + sum(
+            sys.getsizeof(msg) + sum(sys.getsizeof(v) for v in msg.values()) for msg in self.history
+        )
+
+
+class SessionStore:
+    """
+    Sessions keyed by id (the Gradio session hash in the web app).
+
+    At most `max_sessions` sessions / `max_bytes` of history stay in RAM;
+    the least recently used ones are evicted, and `on_evict(session_id)`
+    lets the caller drop state tied to them (e.g. the router's saved KV).
+    With a db_path every saved turn is written through to SQLite, so an
+    evicted session costs no RAM and is loaded lazily when its user returns.
+    Without one, evicted sessions are forgotten. Histories are capped at
+    `max_turns` exchanges, which keeps any one session bounded too.
+    """
+
+    def __init__(self, db_path: str | None, max_sessions: int, max_bytes: int, max_turns: int,
+                 on_evict=None):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_turns = max_turns
+        self.on_evict = on_evict
+        self.hot = OrderedDict()  # session id -> Session
+        self.size_bytes = 0
+        self.counts = {"hits": 0, "loads": 0, "created": 0, "evictions": 0}
+        self._lock = threading.RLock()
+
+        self.db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            # Gradio calls handlers from worker threads; access is serialized by _lock
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, history TEXT, updated REAL)"
+            )
+            self.db.commit()
+
+    def get(self, session_id: str) -> Session:
+        """The session, loaded from SQLite or created if it isn't in RAM"""
+        with self._lock:
+            session = self.hot.get(session_id)
+            if session is not None:
+                self.hot.move_to_end(session_id)
+                self.counts["hits"] += 1
+                return session
+
+            row = None
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT history, updated FROM sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+            if row:
+                session = Session(session_id, json.loads(row[0]), row[1])
+                self.counts["loads"] += 1
+            else:
+                session = Session(session_id)
+                self.counts["created"] += 1
+
+            self.hot[session_id] = session
+            self.size_bytes += session.size_bytes
+            self._evict(keep=session_id)
+            return session
+
+    def save(self, session: Session):
+        """Record a changed session (call after each turn)"""
+        with self._lock:
+            if len(session.history) > self.max_turns:
+                # Cut back to half, so history indices (which the router continuation
+                # keys on) only shift once every max_turns / 2 turns
+                del session.history[:len(session.history) - self.max_turns // 2]
+            session.updated = time.time()
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO sessions (id, history, updated) VALUES (?, ?, ?)",
+                    (session.id, json.dumps(session.history), session.updated)
+                )
+                self.db.commit()
+
+            size = session.measure()
+            if session.id in self.hot:
+                self.size_bytes += size - session.size_bytes
+            session.size_bytes = size
+            self._evict(keep=session.id)
+
+    def drop(self, session_id: str):
+        """Forget a session everywhere (on clear)"""
+        with self._lock:
+            session = self.hot.pop(session_id, None)
+            if session is not None:
+                self.size_bytes -= session.size_bytes
+            if self.db is not None:
+                self.db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self.db.commit()
+
+    def _evict(self, keep: str):
+        while len(self.hot) > 1 and (len(self.hot) > self.max_sessions or self.size_bytes > self.max_bytes):
+            session_id = next(iter(self.hot))
+            if session_id == keep:
+                self.hot.move_to_end(keep)
+                continue
+            session = self.hot.pop(session_id)
+            self.size_bytes -= session.size_bytes
+            self.counts["evictions"] += 1
+            if self.on_evict is not None:
+                self.on_evict(session_id)
+
+    def stored(self) -> int:
+        """Sessions in SQLite (hot ones included once they have a saved turn)"""
+        if self.db is None:
+            return 0
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stats(self, top: int = 10) -> dict:
+        """Counts, RAM use, and the `top` largest sessions in RAM"""
+        with self._lock:
+            largest = sorted(self.hot.values(), key=lambda s: s.size_bytes, reverse=True)[:top]
+            return {
+                **self.counts,
+                "hot": len(self.hot),
+                "stored": self.stored(),
+                "size_kb": round(self.size_bytes / 1024, 1),
+                "largest": [
+                    {"id": s.id, "turns": len(s.history), "bytes": s.size_bytes,
+                     "idle_s": round(time.time() - s.updated, 1)}
+                    for s in largest
+                ]
+            }
+
+
+def make_session_store(db_path: str | None = None, on_evict=None) -> SessionStore:
+    return SessionStore(
+        db_path,
+        max_sessions=SESSIONS["max_sessions"],
+        max_bytes=SESSIONS["max_bytes"],
+        max_turns=SESSIONS["max_turns"],
+        on_evict=on_evict
+    )
@@ -0,0 +1,180 @@
+"""
+Polyreasoner Speculative Decoding
+Drafts tokens for the router and synthesis calls, verified by the main model
+"""
+
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from config import MODEL_PATHS, MODEL_SETTINGS, SPECULATIVE
+
+
+class DraftModelDecoding:
+    """
+    Greedy drafts from a small GGUF that shares the main model's vocabulary.
+    The draft keeps its own KV cache and only evaluates tokens it hasn't seen.
+    """
+
+    def __init__(self, model_path: str, num_pred_tokens: int, **settings):
+        from llama_cpp import Llama
+
+        self.llm = Llama(model_path=model_path, **settings)
+        self.num_pred_tokens = num_pred_tokens
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs) -> np.ndarray:
+        import llama_cpp
+
+        draft = self.llm
+        ids = input_ids.tolist()
+        if len(ids) + self.num_pred_tokens > draft.n_ctx():
+            return np.array([], dtype=np.intc)
+
+        # Reuse the longest prefix already in the draft's cache, but always
+        # evaluate at least the last token to get fresh logits
+        shared = 0
+        for a, b in zip(draft.input_ids[:draft.n_tokens], ids[:-1]):
+            if a != b:
+                break
+            shared += 1
+        draft.n_tokens = shared
+        draft._ctx.kv_cache_seq_rm(-1, shared, -1)
+        draft.eval(ids[shared:])
+
+        tokens = []
+        for _ in range(self.num_pred_tokens):
+            token = int(np.argmax(draft.scores[draft.n_tokens - 1]))
+            if llama_cpp.llama_token_is_eog(draft.model, token):
+                break
+            tokens.append(token)
+            draft.eval([token])
+        return np.array(tokens, dtype=np.intc)
+
+
+class TrackedDraft:
+    """
+    Wraps a draft model and measures how many drafted tokens the main
+    model accepts, per stage.
+
+    llama-cpp calls the draft with every token confirmed so far, so the
+    previous proposal is settled by comparing it against the tokens that
+    were appended since.
+    """
+
+    def __init__(self, draft):
+        self.draft = draft
+        self.stage = None
+        self.stats = {}
+        self._pending = None
+        self._started = None
+
+    def begin(self, stage: str):
+        self.stage = stage
+        self._pending = None
+        self._started = time.perf_counter()
+        self._stage_stats()["calls"] += 1
+
+    def end(self):
+        # The last proposal is cut off by stop/max_tokens - leave it uncounted
+        self._pending = None
+        self._stage_stats()["seconds"] += time.perf_counter() - self._started
+
+    def _stage_stats(self) -> dict:
+        return self.stats.setdefault(self.stage, {
+            "calls": 0, "steps": 0, "proposed": 0, "accepted": 0, "seconds": 0.0
+        })
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs) -> np.ndarray:
+        stats = self._stage_stats()
+
+        if self._pending is not None:
+            start, proposal = self._pending
+            actual = input_ids[start:].tolist()
+            accepted = 0
+            for a, b in zip(proposal, actual):
+                if a != b:
+                    break
+                accepted += 1
+            stats["steps"] += 1
+            stats["proposed"] += len(proposal)
+            stats["accepted"] += accepted
+
+        proposal = self.draft(input_ids, **kwargs)
+        self._pending = (len(input_ids), proposal.tolist())
+        return proposal
+
+    def summary(self) -> dict:
+        """Per stage: acceptance rate and tokens produced per main-model pass"""
+        result = {}
+        for stage, s in self.stats.items():
+            tokens = s["steps"] + s["accepted"]
+            result[stage] = {
+                **s,
+                "seconds": round(s["seconds"], 2),
+                "acceptance_rate": round(s["accepted"] / s["proposed"], 3) if s["proposed"] else 0.0,
+                "tokens_per_pass": round(tokens / s["steps"], 2) if s["steps"] else 0.0,
+                "tokens_per_s": round(tokens / s["seconds"], 1) if s["seconds"] else 0.0
+            }
+        return result
+
+
+_draft = None
+
+
+def speculative_kwargs() -> dict:
+    """Extra Llama() arguments for a model that verifies drafts"""
+    # Verification samples at every drafted position, so all logits are kept
+    return {"logits_all": True} if SPECULATIVE["mode"] else {}
+
+
+def get_draft() -> TrackedDraft | None:
+    """Shared draft for the configured mode (loaded on first use)"""
+    global _draft
+    mode = SPECULATIVE["mode"]
+    if not mode:
+        return None
+
+    if _draft is None:
+        if mode == "prompt_lookup":
+            from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+
+            draft = LlamaPromptLookupDecoding(
+                max_ngram_size=SPECULATIVE["max_ngram_size"],
+                num_pred_tokens=SPECULATIVE["num_pred_tokens"]
+            )
+        elif mode == "draft_model":
+            print("Loading draft model...")
+            draft = DraftModelDecoding(
+                MODEL_PATHS["draft"],
+                SPECULATIVE["num_pred_tokens"],
+                **MODEL_SETTINGS["draft"]
+            )
+            print("Draft model loaded.")
+        else:
+            raise ValueError(f"Unknown SPECULATIVE mode: {mode}")
+        _draft = TrackedDraft(draft)
+    return _draft
+
+
+@contextmanager
+def speculative(llm, stage: str):
+    """Attach the draft to `llm` for calls made inside this block"""
+    draft = get_draft() if stage in SPECULATIVE["stages"] else None
+
+    # Without logits for every position the drafts can't be verified
+    if draft is None or not llm.context_params.logits_all:
+        yield
+        return
+
+    draft.begin(stage)
+    llm.draft_model = draft
+    try:
+        yield
+    finally:
+        llm.draft_model = None
+        draft.end()
+
+
+def speculative_stats() -> dict:
+    return _draft.summary() if _draft is not None else {}
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Run from poly-reasoner-v3: modules import each other by top-level name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
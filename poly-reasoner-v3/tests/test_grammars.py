@@ -0,0 +1,43 @@
+"""Agent grammars: the longest object each one allows must fit the agents' token budget"""
+
+from pathlib import Path
+
+import pytest
+
+from config import AGENT_MAX_TOKENS, MODEL_PATHS
+from grammars import CHARS_PER_TOKEN, longest_output, output_bounds, parse_schema, schema_to_gbnf
+from prompts import AGENT_PROMPTS
+
+MODEL = Path(__file__).resolve().parent.parent / MODEL_PATHS["agents"]
+# What an agent writes into its strings - English prose, not single characters
+FILLER = "Customers may churn if onboarding stays slow and support is thin. "
+
+
+def longest(agent_name: str, max_tokens: int = AGENT_MAX_TOKENS) -> str:
+    fields = parse_schema(AGENT_PROMPTS[agent_name])
+    return longest_output(fields, *output_bounds(fields, max_tokens), filler=FILLER)
+
+
+@pytest.mark.parametrize("agent_name", sorted(AGENT_PROMPTS))
+def test_longest_object_within_char_budget(agent_name):
+    assert len(longest(agent_name)) <= AGENT_MAX_TOKENS * CHARS_PER_TOKEN
+
+
+@pytest.mark.parametrize("agent_name", sorted(AGENT_PROMPTS))
+def test_bounds_are_in_the_grammar(agent_name):
+    fields = parse_schema(AGENT_PROMPTS[agent_name])
+    list_items, string_chars = output_bounds(fields, AGENT_MAX_TOKENS)
+    gbnf = schema_to_gbnf(fields, AGENT_MAX_TOKENS)
+    assert f"{{0,{list_items - 1}}}" in gbnf
+    assert f"char{{0,{string_chars}}}" in gbnf
+
+
+@pytest.mark.parametrize("agent_name", sorted(AGENT_PROMPTS))
+def test_longest_object_within_token_budget(agent_name):
+    if not MODEL.exists():
+        pytest.skip("needs the agent model")
+    Llama = pytest.importorskip("llama_cpp").Llama
+
+    llm = Llama(model_path=str(MODEL), vocab_only=True, verbose=False)
+    tokens = llm.tokenize(longest(agent_name).encode("utf-8"), add_bos=False)
+    assert len(tokens) <= AGENT_MAX_TOKENS
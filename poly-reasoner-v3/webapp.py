@@ -1,95 +1,235 @@
-"""
-Polyreasoner Web Interface
-Gradio-based chat UI for multi-perspective reasoning
-"""
-
-import gradio as gr
-from main import Polyreasoner
-
-# Global instance
-reasoner = Polyreasoner()
-
-
-def chat_response(message, history):
-    """
-    Process user message and return response.
-    Gradio ChatInterface handles history automatically.
-    """
-    if not message.strip():
-        return "Please enter a message."
-    
-    # Handle commands
-    if message.lower() == 'clear':
-        reasoner.conversation_history = []
-        return "✨ Conversation cleared."
-    
-    try:
-        # Process with Polyreasoner
-        response = reasoner.process(message)
-        return response
-    
-    except Exception as e:
-        return f"❌ Error: {str(e)}\n\nPlease check your model configuration."
-
-
-def create_ui():
-    """Create and configure Gradio interface"""
-    
-    # Create ChatInterface
-    with gr.Blocks(title="Polyreasoner") as demo:
-        
-        gr.Markdown("""
-        # 🧠 Polyreasoner
-        ### Multi-Perspective Reasoning System
-        
-        Ask complex questions or evaluate ideas. I'll automatically activate multi-agent analysis when needed.
-        
-        **Examples:**
-        - "Should I open source my ML project?"
-        - "Evaluate: building a mobile app for freelancers"
-        - "What are the risks of switching to microservices?"
-        """)
-        
-        chatbot = gr.ChatInterface(
-            fn=chat_response,
-            chatbot=gr.Chatbot(height=500),
-            textbox=gr.Textbox(
-                placeholder="Ask a question or describe an idea to evaluate...",
-                container=False
-            ),
-            examples=[
-                "Should I build a SaaS or open source first?",
-                "Evaluate: AI-powered code review tool",
-                "What could go wrong with this startup idea?",
-            ]
-        )
-        
-        gr.Markdown("""
-        ---
-        💡 **Tip:** Type 'clear' to reset conversation history | The system uses local LLMs for complete privacy
-        
-        **How it works:**
-        - Simple questions → Direct response
-        - Complex decisions → Automatic multi-agent analysis (business, risk, security, feasibility, impact, ethical, contrarian perspectives)
-        """)
-    
-    return demo
-
-
-if __name__ == "__main__":
-    print("=" * 60)
-    print("  🧠 POLYREASONER WEB INTERFACE")
-    print("  Multi-Perspective Reasoning System")
-    print("=" * 60)
-    print()
-    print("Starting Gradio server...")
-    print("This will load the LLM models (may take a moment)")
-    print()
-    
-    demo = create_ui()
-    demo.launch(
-        server_name="127.0.0.1",
-        server_port=7860,
-        share=False,
-        show_error=True
-    )
+"""
+Polyreasoner Web Interface
+Gradio-based chat UI for multi-perspective reasoning
+"""
+
+import threading
+import time
+
+import gradio as gr
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from config import SESSIONS, SPECULATIVE
+from main import Polyreasoner
+from speculative import get_draft
+
+# How long a request waits for warmup before being turned away
+WARMUP_WAIT_S = 120
+
+# Global instance (not thread-safe - every model call holds reasoner_lock).
+# Conversations are per user: one session per Gradio session hash.
+reasoner = Polyreasoner(session_db=SESSIONS["db_path"])
+reasoner_lock = threading.Lock()
+
+
+class ModelWarmup:
+    """
+    Loads and warms the models in a background thread so the first user
+    doesn't pay for model load, page-in and the first prefill.
+    Each phase is timed and logged.
+    """
+    
+    def __init__(self, reasoner: Polyreasoner, lock: threading.Lock):
+        self.reasoner = reasoner
+        self.lock = lock
+        self.finished = threading.Event()
+        self.phase = "not started"
+        self.phases = {}
+        self.error = None
+        self.started_at = None
+    
+    @property
+    def ready(self) -> bool:
+        return self.finished.is_set() and self.error is None
+    
+    def start(self):
+        self.started_at = time.perf_counter()
+        threading.Thread(target=self._run, name="model-warmup", daemon=True).start()
+    
+    def _timed(self, phase: str, fn):
+        self.phase = phase
+        start = time.perf_counter()
+        fn()
+        self.phases[phase] = round(time.perf_counter() - start, 2)
+        print(f"[warmup] {phase}: {self.phases[phase]}s")
+    
+    def _run(self):
+        try:
+            with self.lock:
+                # Model load + prompt snapshots (agents share it when the paths match)
+                self._timed("load_router", self.reasoner.load_router)
+                models = self.reasoner.models
+                separate = models.path("agents") != models.path("router")
+                if separate and models.used_bytes() + models.estimate(models.path("agents")) <= models.max_bytes:
+                    self._timed("load_agents", self.reasoner.load_agents)
+                if SPECULATIVE["mode"] and set(SPECULATIVE["stages"]) & {"router", "synthesis"}:
+                    self._timed("load_draft", get_draft)
+                # One real decode step faults every weight page in
+                self._timed("first_token", lambda: self.reasoner.router_llm("Hello", max_tokens=1))
+                if separate and self.reasoner.agent_llm is not None:
+                    self._timed("first_token_agents", lambda: self.reasoner.agent_llm("Hello", max_tokens=1))
+            self.phase = "ready"
+            print(f"[warmup] ready in {time.perf_counter() - self.started_at:.2f}s")
+            if separate and self.reasoner.agent_llm is None:
+                print("[warmup] agent model doesn't fit next to the router - it loads on first polymode")
+        except Exception as e:
+            print(f"[warmup] failed during {self.phase}: {e}")
+            self.error = str(e)
+            self.phase = "failed"
+        finally:
+            self.finished.set()
+    
+    def status(self) -> dict:
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {
+            "status": "ready" if self.ready else ("failed" if self.error else "warming"),
+            "phase": self.phase,
+            "phases": self.phases,
+            "elapsed_s": round(elapsed, 2),
+            "error": self.error
+        }
+
+
+warmup = ModelWarmup(reasoner, reasoner_lock)
+
+
+def health():
+    """Readiness probe: 200 once the models are warm, 503 before that"""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["status"] == "ready" else 503)
+
+
+def eta(budget_s: float | None = None):
+    """Predicted latency for a chat reply and a polymode run, before sending"""
+    return reasoner.predict_latency(budget_s)
+
+
+def sessions(top: int = 10):
+    """Session store counts and RAM held by the largest sessions"""
+    return reasoner.session_stats(top)
+
+
+def chat_response(message, history, request: gr.Request):
+    """
+    Process user message and stream the response.
+    Gradio ChatInterface handles history automatically; each yield
+    replaces the message shown so far. Each browser session keeps its own
+    conversation (and evaluated router state) under its session hash.
+    """
+    session_id = getattr(request, "session_hash", None) or "default"
+    if not message.strip():
+        yield "Please enter a message."
+        return
+    
+    # Hold requests until the models are warm, reporting progress
+    deadline = time.perf_counter() + WARMUP_WAIT_S
+    while not warmup.finished.is_set() and time.perf_counter() < deadline:
+        yield f"⏳ Warming up models ({warmup.phase})... your message will run as soon as they're ready."
+        warmup.finished.wait(1.0)
+    if not warmup.ready:
+        if warmup.error:
+            yield f"❌ Model failed to load: {warmup.error}\n\nPlease check your model configuration."
+        else:
+            yield "⏳ Models are still warming up - please try again in a minute."
+        return
+    
+    # Handle commands
+    if message.lower() == 'clear':
+        with reasoner_lock:
+            reasoner.clear_session(session_id)
+        yield "✨ Conversation cleared."
+        return
+    
+    try:
+        # Process with Polyreasoner, streaming stage updates and tokens
+        status = ""
+        answer = ""
+        # One request at a time on the shared model; others wait here
+        with reasoner_lock:
+            for event in reasoner.process_stream(message, session_id=session_id):
+                if event["type"] == "stage":
+                    status = f"*{event['text']}*\n\n"
+                    if event["stage"] == "polymode":
+                        status = (f"*{event['text']} ({', '.join(event['agents'])}) "
+                                  f"- about {event['eta_s']:.0f}s*\n\n")
+                    answer = ""
+                    yield status
+                elif event["type"] == "token":
+                    answer += event["text"]
+                    yield status + answer
+                elif event["type"] == "done":
+                    prefill = event["router_prefill"]
+                    reused = f", router prefilled {prefill['prefilled']}/{prefill['prompt_tokens']}" if prefill else ""
+                    print(f"[{event['mode']}] first token {event['ttft_s']}s, total {event['total_s']}s{reused}")
+                    yield event["response"]
+    
+    except Exception as e:
+        yield f"❌ Error: {str(e)}\n\nPlease check your model configuration."
+
+
+def create_ui():
+    """Create and configure Gradio interface"""
+    
+    # Create ChatInterface
+    with gr.Blocks(title="Polyreasoner") as demo:
+        
+        gr.Markdown("""
+        # 🧠 Polyreasoner
+        ### Multi-Perspective Reasoning System
+        
+        Ask complex questions or evaluate ideas. I'll automatically activate multi-agent analysis when needed.
+        
+        **Examples:**
+        - "Should I open source my ML project?"
+        - "Evaluate: building a mobile app for freelancers"
+        - "What are the risks of switching to microservices?"
+        """)
+        
+        chatbot = gr.ChatInterface(
+            fn=chat_response,
+            chatbot=gr.Chatbot(height=500),
+            textbox=gr.Textbox(
+                placeholder="Ask a question or describe an idea to evaluate...",
+                container=False
+            ),
+            examples=[
+                "Should I build a SaaS or open source first?",
+                "Evaluate: AI-powered code review tool",
+                "What could go wrong with this startup idea?",
+            ]
+        )
+        
+        gr.Markdown("""
+        ---
+        💡 **Tip:** Type 'clear' to reset conversation history | The system uses local LLMs for complete privacy
+        
+        **How it works:**
+        - Simple questions → Direct response
+        - Complex decisions → Automatic multi-agent analysis (business, risk, security, feasibility, impact, ethical, contrarian perspectives)
+        """)
+    
+    return demo
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  🧠 POLYREASONER WEB INTERFACE")
+    print("  Multi-Perspective Reasoning System")
+    print("=" * 60)
+    print()
+    print("Starting Gradio server...")
+    print("Models load in the background - readiness at /health")
+    print()
+    
+    warmup.start()
+    
+    app = FastAPI()
+    app.get("/health")(health)
+    app.get("/eta")(eta)
+    app.get("/sessions")(sessions)
+    
+    demo = create_ui()
+    app = gr.mount_gradio_app(app, demo.queue(), path="/")
+    uvicorn.run(app, host="127.0.0.1", port=7860)